@@ -42,7 +42,33 @@ def get_args():
         type=float,
         default=0,
         required=False,
-        help="Interval(seconds) that each node fetch data from queue.",
+        help="Timeout(seconds) of the blocking fetch of each node, i.e. the interval at which idle nodes check the "
+        "stop sign. Data is processed as soon as it arrives. If 0, the default 0.1s is used.",
+    )
+    parser.add_argument(
+        "--node_shm_size",
+        type=int,
+        default=0,
+        required=False,
+        help="Size(MB) of the shared memory ring of each connection between pipeline nodes. Large numpy arrays "
+        "(frames, crops, network inputs) are written once into the ring instead of being pickled through the queue. "
+        "It should hold several 4K frames, e.g. 512. If 0, the shared memory transport is disabled.",
+    )
+    parser.add_argument(
+        "--micro_batch_wait_ms",
+        type=float,
+        default=0,
+        required=False,
+        help="Maximum time(ms) that the det/rec inference nodes wait for inputs of other images to fill the largest "
+        "batch size gear of the model. Larger values increase throughput at the cost of latency. If 0, only the "
+        "inputs already waiting in the queue are batched together.",
+    )
+    parser.add_argument(
+        "--micro_batch_max_size",
+        type=int,
+        default=32,
+        required=False,
+        help="Maximum batch size of the det/rec inference nodes for models with dynamic batch size.",
     )
     parser.add_argument(
         "--result_contain_score",
@@ -114,6 +140,16 @@ def get_args():
     )
     parser.add_argument("--save_log_dir", type=str, required=False, help="Log saving dir.")
 
+    parser.add_argument(
+        "--server_max_pending_tasks",
+        type=int,
+        default=64,
+        required=False,
+        help="Maximum number of requests processed by the OCR server at the same time, further requests wait.",
+    )
+    parser.add_argument("--server_host", type=str, default="127.0.0.1", required=False, help="HTTP server host.")
+    parser.add_argument("--server_port", type=int, default=8000, required=False, help="HTTP server port.")
+
     args = parser.parse_args()
     setup_logger(args)
     args = update_task_info(args)
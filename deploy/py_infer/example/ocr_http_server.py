@@ -0,0 +1,111 @@
+"""
+Local HTTP endpoint for the OCR server, built on asyncio with the standard library only.
+
+Endpoints:
+    POST /ocr     body: an encoded image (e.g. png/jpg bytes), or a JSON object {"image_path": "path/to/image_or_dir"}
+                  return: JSON object {"result": ...} with the output of OCRServer.infer
+    GET  /health  return: {"status": "ok"}
+
+Example:
+    python deploy/py_infer/example/ocr_http_server.py --input_images_dir=... --det_model_path=... \
+        --rec_model_path=... --server_port=8000
+    python deploy/py_infer/example/ocr_load_test.py --url http://127.0.0.1:8000/ocr --image path/to/image.png
+"""
+import asyncio
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ocr_infer_server import OCRServer  # noqa
+
+HTTP_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OCRHttpServer:
+    def __init__(self, ocr_server: OCRServer, host: str, port: int):
+        self.ocr_server = ocr_server
+        self.host = host
+        self.port = port
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            status, payload = await self.route(request_line, headers, body)
+        except Exception as error:
+            status, payload = 500, {"error": str(error)}
+
+        content = json.dumps(payload, default=_to_json, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(content)}\r\nConnection: close\r\n\r\n"
+            ).encode("latin-1")
+            + content
+        )
+        await writer.drain()
+        writer.close()
+
+    async def route(self, request_line, headers, body):
+        if len(request_line) < 2:
+            return 400, {"error": "malformed request"}
+        method, path = request_line[0], request_line[1]
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method != "POST" or path != "/ocr":
+            return 404, {"error": f"unknown endpoint {method} {path}"}
+
+        if headers.get("content-type", "").startswith("application/json"):
+            try:
+                img = json.loads(body)["image_path"]
+            except (ValueError, KeyError, TypeError) as error:  # JSONDecodeError and UnicodeDecodeError included
+                return 400, {"error": f"expect a JSON object with the field 'image_path': {error!r}"}
+            if not isinstance(img, str):
+                return 400, {"error": "'image_path' must be a string"}
+        else:
+            img = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                return 400, {"error": "cannot decode the image"}
+        result = await self.ocr_server.async_infer(img)
+        return 200, {"result": result}
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f"OCR server listening on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    ocr_server = OCRServer()
+    ocr_server.warmup()
+    try:
+        asyncio.run(OCRHttpServer(ocr_server, ocr_server.args.server_host, ocr_server.args.server_port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ocr_server.stop()
+
+
+if __name__ == "__main__":
+    main()
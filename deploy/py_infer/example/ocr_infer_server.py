@@ -1,9 +1,10 @@
-import copy
+import asyncio
+import itertools
 import os
+import queue
 import sys
-import time
-from ctypes import c_uint64
-from multiprocessing import Lock, Manager, Process
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import numpy as np
 
@@ -18,50 +19,106 @@ from deploy.py_infer.src.parallel import ParallelPipeline  # noqa
 
 
 class OCRServer:
-    def __init__(self) -> None:
-        self.lock = Lock()
-        self.update_lock = Lock()
-        self.args = get_args()
-        self.task_id = Manager().Value(c_uint64, 0)
-        self.result = Manager().dict()
+    """
+    OCR server running the parallel pipeline, which can be called concurrently from several threads or coroutines.
+
+    Each request gets a task id and a future. A dispatcher thread drains the result queue of the pipeline and resolves
+    the future of each finished task, so that callers do not poll nor wait for each other. The number of requests in
+    the pipeline is limited by `--server_max_pending_tasks`: further requests wait for a slot (backpressure), and
+    sending the images blocks while the input queue of the pipeline is full.
+    """
+
+    RESULT_FETCH_TIMEOUT = 0.1
+
+    def __init__(self, args=None) -> None:
+        self.args = args if args is not None else get_args()
+        self.parallel_pipeline = None
+        self.task_ids = itertools.count()
+        self.futures = {}  # task id -> Future
+        self.futures_lock = threading.Lock()
+        self.pending_slots = threading.BoundedSemaphore(self.args.server_max_pending_tasks)
+        self.send_lock = threading.Lock()  # images of a task are sent consecutively
+        self.stop_event = threading.Event()
+        self.dispatcher = None
+        self.executor = ThreadPoolExecutor(max_workers=self.args.server_max_pending_tasks)  # for async callers
 
     def warmup(self):
         self.parallel_pipeline = ParallelPipeline(self.args)
         self.parallel_pipeline.start_pipeline()
-
-    def infer(self, img):
-        self.lock.acquire()
-        task_id = copy.copy(self.task_id.value)
-        self.task_id.value += 1
-        self.lock.release()
-        data_type = 0  # str or list[str]
+        self.dispatcher = threading.Thread(target=self._dispatch_results, name="result-dispatcher", daemon=True)
+        self.dispatcher.start()
+
+    def _dispatch_results(self):
+        result_queue = self.parallel_pipeline.pipeline_manager.result_queue
+        while not self.stop_event.is_set():
+            try:
+                rst = result_queue.get(block=True, timeout=self.RESULT_FETCH_TIMEOUT)
+            except queue.Empty:
+                continue
+            for task_id, task_rst in rst.items():
+                with self.futures_lock:
+                    future = self.futures.pop(task_id, None)
+                if future is not None:
+                    future.set_result(task_rst)
+
+    def submit(self, img) -> Future:
+        """
+        Send images to the pipeline, return a future of the output.
+
+        Args:
+            img: image path, folder of images, image array or list of image arrays.
+        """
         if isinstance(img, str):
-            self.parallel_pipeline.infer_for_images(img, task_id)
+            data_type = 0  # str or list[str]
         elif isinstance(img, np.ndarray):
-            self.parallel_pipeline.infer_for_array(img, task_id)
             data_type = 1  # ndarray
         elif isinstance(img, (tuple, list)) and len(img) > 0 and cv_utils.check_type_in_container(img, np.ndarray):
-            self.parallel_pipeline.infer_for_array(img, task_id)
             data_type = 2  # list[ndarray]
         else:
             raise ValueError(f"unknown input data: {type(img)}")
-        rst = self.fetch_result(task_id)
-        rst = self.produce_output(rst, data_type)
-        return rst
-
-    def fetch_result(self, task_id):
-        while task_id not in self.result.keys():
-            self.update_lock.acquire()
-            rst = self.parallel_pipeline.fetch_result()
-            if rst:
-                self.result.update(rst)
-            self.update_lock.release()
-            time.sleep(self.args.node_fetch_interval)
-        rst = self.result[task_id]
-        self.update_lock.acquire()
-        self.result.pop(task_id)
-        self.update_lock.release()
-        return rst
+
+        self.pending_slots.acquire()
+        task_id = next(self.task_ids)
+        task_future = Future()
+        with self.futures_lock:
+            self.futures[task_id] = task_future
+        try:
+            with self.send_lock:
+                if data_type == 0:
+                    self.parallel_pipeline.infer_for_images(img, task_id)
+                else:
+                    self.parallel_pipeline.infer_for_array(img, task_id)
+        except Exception:
+            with self.futures_lock:
+                self.futures.pop(task_id, None)
+            self.pending_slots.release()
+            raise
+
+        output_future = Future()
+
+        def _on_done(future):
+            self.pending_slots.release()
+            if future.cancelled():
+                output_future.cancel()
+            elif future.exception() is not None:
+                output_future.set_exception(future.exception())
+            else:
+                try:
+                    output_future.set_result(self.produce_output(future.result(), data_type))
+                except Exception as error:
+                    output_future.set_exception(error)
+
+        task_future.add_done_callback(_on_done)
+        return output_future
+
+    def infer(self, img, timeout=None):
+        return self.submit(img).result(timeout=timeout)
+
+    async def async_infer(self, img):
+        """Coroutine version of `infer`, the images are sent from a worker thread to keep the event loop free."""
+        loop = asyncio.get_running_loop()
+        future = await loop.run_in_executor(self.executor, self.submit, img)
+        return await asyncio.wrap_future(future)
 
     def produce_output(self, rst, data_type):
         def produce_each_sample(sample):
@@ -98,6 +155,14 @@ class OCRServer:
             return output_dict
 
     def stop(self):
+        self.stop_event.set()
+        if self.dispatcher is not None:
+            self.dispatcher.join()
+        with self.futures_lock:
+            futures, self.futures = self.futures, {}
+        for future in futures.values():
+            future.set_exception(RuntimeError("OCR server stopped before the task was finished."))
+        self.executor.shutdown(wait=False)
         self.parallel_pipeline.stop_pipeline()
 
 
@@ -120,7 +185,7 @@ def test_multi_ocr_system():
     process_list = []
     # process 1
     process_list.append(
-        Process(
+        threading.Thread(
             target=call1,
             args=(server1,),
             daemon=True,
@@ -128,7 +193,7 @@ def test_multi_ocr_system():
     )
     # process 2
     process_list.append(
-        Process(
+        threading.Thread(
             target=call2,
             args=(server2,),
             daemon=True,
@@ -161,7 +226,7 @@ def test_multi_infer_call_one_ocr_system():
     process_list = []
     # process 1
     process_list.append(
-        Process(
+        threading.Thread(
             target=call1,
             args=(server,),
             daemon=True,
@@ -169,7 +234,7 @@ def test_multi_infer_call_one_ocr_system():
     )
     # process 2
     process_list.append(
-        Process(
+        threading.Thread(
             target=call2,
             args=(server,),
             daemon=True,
@@ -211,7 +276,7 @@ def test_ndarray_list_input():
     process_list = []
     # process 1
     process_list.append(
-        Process(
+        threading.Thread(
             target=call1,
             args=(server,),
             daemon=True,
@@ -219,7 +284,7 @@ def test_ndarray_list_input():
     )
     # process 2
     process_list.append(
-        Process(
+        threading.Thread(
             target=call2,
             args=(server,),
             daemon=True,
@@ -252,7 +317,7 @@ def test_feed_folder():
     process_list = []
     # process 1
     process_list.append(
-        Process(
+        threading.Thread(
             target=call1,
             args=(server,),
             daemon=True,
@@ -260,7 +325,7 @@ def test_feed_folder():
     )
     # process 2
     process_list.append(
-        Process(
+        threading.Thread(
             target=call2,
             args=(server,),
             daemon=True,
@@ -293,7 +358,7 @@ def test_feed_folder_rec():
     process_list = []
     # process 1
     process_list.append(
-        Process(
+        threading.Thread(
             target=call1,
             args=(server,),
             daemon=True,
@@ -302,7 +367,7 @@ def test_feed_folder_rec():
 
     # process 2
     process_list.append(
-        Process(
+        threading.Thread(
             target=call2,
             args=(server,),
             daemon=True,
@@ -335,7 +400,7 @@ def test_feed_folder_cls():
     process_list = []
     # process 1
     process_list.append(
-        Process(
+        threading.Thread(
             target=call1,
             args=(server,),
             daemon=True,
@@ -344,7 +409,7 @@ def test_feed_folder_cls():
 
     # process 2
     process_list.append(
-        Process(
+        threading.Thread(
             target=call2,
             args=(server,),
             daemon=True,
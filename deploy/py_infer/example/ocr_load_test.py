@@ -0,0 +1,59 @@
+"""
+Load test of the OCR HTTP server: send requests from concurrent clients and report the throughput and the latency
+percentiles.
+
+Example:
+    python deploy/py_infer/example/ocr_load_test.py --url http://127.0.0.1:8000/ocr --image path/to/image.png \
+        --concurrency 16 --num_requests 512
+"""
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def send_request(url, body, content_type):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the OCR HTTP server.")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8000/ocr", help="URL of the OCR endpoint.")
+    parser.add_argument("--image", type=str, required=True, help="Image file sent in each request.")
+    parser.add_argument(
+        "--send_path", action="store_true", help="Send the image path (readable by the server) instead of its bytes."
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent clients.")
+    parser.add_argument("--num_requests", type=int, default=256, help="Total number of requests.")
+    args = parser.parse_args()
+
+    if args.send_path:
+        body, content_type = json.dumps({"image_path": args.image}).encode("utf-8"), "application/json"
+    else:
+        with open(args.image, "rb") as f:
+            body, content_type = f.read(), "application/octet-stream"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(executor.map(lambda _: send_request(args.url, body, content_type), range(args.num_requests)))
+    total_time = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    print(f"requests: {args.num_requests}, concurrency: {args.concurrency}, total time: {total_time:.2f}s")
+    print(f"throughput: {args.num_requests / total_time:.2f} requests/s")
+    print(
+        "latency (ms): "
+        + ", ".join(f"p{p} {np.percentile(latencies, p):.2f}" for p in (50, 90, 99))
+        + f", max {latencies.max():.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ class InferBase(metaclass=ABCMeta):
         self.model = None
         self.requires_gear_hw = False
         self.requires_gear_bs = False
+        self.dynamic_bs = False  # whether the model accepts any batch size, _bs_list being replaced by the default
 
         self._bs_list: Tuple[int] = tuple()
         self._hw_list: Tuple[Tuple[int]] = tuple()
@@ -34,6 +35,7 @@ class InferBase(metaclass=ABCMeta):
             if len(self._bs_list) > 1 or self._bs_list[0] not in {-1, 1}:
                 self.requires_gear_bs = True  # need padding to batch
             if self._bs_list[0] == -1:  # when dynamic shape, len(self._bs_list[0]) == 1, self._bs_list[0] == -1
+                self.dynamic_bs = True
                 batch_size_map = {
                     "TextDetector": 1,
                     "TextClassifier": self.args.cls_batch_num,
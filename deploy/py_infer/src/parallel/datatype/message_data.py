@@ -13,4 +13,5 @@ class ProfilingData:
     device_id: int = 0
     process_cost_time: float = 0.0
     send_cost_time: float = 0.0
+    avg_queue_depth: float = 0.0
     image_total: int = -1
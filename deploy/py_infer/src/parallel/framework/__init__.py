@@ -1,3 +1,4 @@
+from .micro_batch_base import MicroBatchModuleBase
 from .module_base import ModuleBase
 from .module_manager import ModuleManager
 from .pipeline_manager import ParallelPipelineManager
@@ -0,0 +1,122 @@
+import queue
+import time
+from abc import abstractmethod
+from typing import List
+
+import numpy as np
+
+from ...data_process import gear_utils
+from .module_base import ModuleBase
+
+
+class MicroBatchModuleBase(ModuleBase):
+    """
+    Base of the inference nodes which coalesce the net inputs of several items (from different images and tasks) into
+    micro-batches matching the batch size gears of the model, and split the predictions back to each item.
+
+    After fetching a first item, the node takes the items already available and waits up to `--micro_batch_wait_ms`
+    for more items, until the largest batch size gear is filled. Items of different input shapes are inferred in
+    different batches, and the order of the items is kept with respect to the skipped ones (e.g. StopData).
+
+    Subclasses set `self.bs_list` in `init_self_args`, (-1,) for a model with dynamic batch size (whose batches are
+    then capped by `--micro_batch_max_size` and not padded), and implement `get_valid_size`, `model_infer` and
+    `set_result`.
+    """
+
+    def __init__(self, args, msg_queue):
+        super().__init__(args, msg_queue)
+        self.bs_list = (1,)
+        self.max_wait = args.micro_batch_wait_ms / 1000
+
+    @property
+    def is_dynamic_batch(self):
+        return -1 in self.bs_list
+
+    @property
+    def max_batch_size(self):
+        return self.args.micro_batch_max_size if self.is_dynamic_batch else max(self.bs_list)
+
+    @abstractmethod
+    def get_valid_size(self, input_data) -> int:
+        """Number of valid samples in the (possibly padded) net inputs of the item."""
+        pass
+
+    @abstractmethod
+    def model_infer(self, net_inputs: List[np.ndarray]) -> List[np.ndarray]:
+        pass
+
+    @abstractmethod
+    def set_result(self, input_data, pred: List[np.ndarray]):
+        """Set the predictions of the valid samples of the item to its data."""
+        pass
+
+    def fetch(self):
+        items = super().fetch()
+        if not items:
+            return []
+
+        deadline = time.time() + self.max_wait
+        while sum(self.get_valid_size(item) for item in items if not item.skip) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                # once the deadline is passed, only the items already available are taken
+                items.append(self.input_queue.get(block=remaining > 0, timeout=max(remaining, 0)))
+            except queue.Empty:
+                break
+
+        return [items]  # processed at once
+
+    def process(self, input_data):
+        items = input_data if isinstance(input_data, list) else [input_data]
+
+        pending = []
+        for item in items:
+            if item.skip:
+                self.process_batch(pending)
+                pending = []
+                self.send_to_next_module(item)
+            else:
+                pending.append(item)
+        self.process_batch(pending)
+
+    def process_batch(self, items):
+        # group the items by shape and type of net inputs, except the batch size
+        groups = {}
+        for item in items:
+            key = tuple((x.shape[1:], x.dtype.str) for x in item.data["net_inputs"])
+            groups.setdefault(key, []).append(item)
+
+        for group in groups.values():
+            sizes = [self.get_valid_size(item) for item in group]
+            num_inputs = len(group[0].data["net_inputs"])
+            net_inputs = [
+                np.concatenate([item.data["net_inputs"][i][:size] for item, size in zip(group, sizes)])
+                for i in range(num_inputs)
+            ]
+            pred = self.infer_by_gears(net_inputs, sum(sizes))
+
+            start_index = 0
+            for item, size in zip(group, sizes):
+                self.set_result(item, [x[start_index : start_index + size] for x in pred])
+                start_index += size
+                self.send_to_next_module(item)
+
+    def infer_by_gears(self, net_inputs: List[np.ndarray], total: int) -> List[np.ndarray]:
+        if self.is_dynamic_batch:
+            batch_list = [self.max_batch_size] * (-(-total // self.max_batch_size))
+        else:
+            batch_list = gear_utils.get_matched_gear_bs(total, tuple(sorted(self.bs_list)))
+
+        split_pred = []
+        start_index = 0
+        for batch in batch_list:
+            size = min(batch, total - start_index)
+            data = {"net_inputs": [x[start_index : start_index + size] for x in net_inputs]}
+            if not self.is_dynamic_batch:
+                data = gear_utils.padding_to_batch(data, batch)
+            split_pred.append([x[:size] for x in self.model_infer(data["net_inputs"])])
+            start_index += size
+
+        if len(split_pred) == 1:
+            return split_pred[0]
+        return [np.concatenate(x) for x in zip(*split_pred)]
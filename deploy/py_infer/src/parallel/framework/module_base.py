@@ -1,14 +1,18 @@
 import os.path
+import queue
 import time
 from abc import abstractmethod
-from ctypes import c_longdouble
-from multiprocessing import Manager
+from ctypes import c_longdouble, c_uint64
+from multiprocessing import Value
 
 from ...utils import log
 from ..datatype import ModuleInitArgs, ProfilingData, StopData
 
 
 class ModuleBase(object):
+    # default timeout(seconds) of the blocking fetch, i.e. the interval at which an idle node checks the stop event
+    FETCH_TIMEOUT = 0.1
+
     def __init__(self, args, msg_queue):
         self.args = args
         self.pipeline_name = ""
@@ -19,18 +23,22 @@ class ModuleBase(object):
         self.msg_queue = msg_queue
         self.input_queue = None
         self.output_queue = None
-        self.send_cost = Manager().Value(typecode=c_longdouble, value=0)
-        self.process_cost = Manager().Value(typecode=c_longdouble, value=0)
+        # profiling counters in shared memory, written only by the node process and read by the pipeline manager
+        # when the node is stopped, so they need neither a lock nor a manager process
+        self.send_cost = Value(c_longdouble, 0, lock=False)
+        self.process_cost = Value(c_longdouble, 0, lock=False)
+        self.fetch_count = Value(c_uint64, 0, lock=False)
+        self.queue_depth_sum = Value(c_uint64, 0, lock=False)
 
     def assign_init_args(self, init_args: ModuleInitArgs):
         self.pipeline_name = init_args.pipeline_name
         self.module_name = init_args.module_name
         self.instance_id = init_args.instance_id
 
-    def process_handler(self, stop_manager, module_params, input_queue, output_queue):
+    def process_handler(self, start_event, stop_event, module_params, input_queue, output_queue):
         self.input_queue = input_queue
         self.output_queue = output_queue
-        self.stop_manager = stop_manager
+        self.stop_event = stop_event
 
         try:
             params = self.init_self_args()
@@ -40,24 +48,37 @@ class ModuleBase(object):
             log.error(f"{self.__class__.__name__} init failed: {error}")
             raise error
 
-        # waiting for init sign
-        while not self.msg_queue.full():
-            continue
-
-        # waiting for the release of stop sign
-        while self.stop_manager.value:
-            continue
-
-        while True:
-            time.sleep(self.args.node_fetch_interval)
-            if self.stop_manager.value:
-                break
-            if self.input_queue.empty():
-                time.sleep(self.args.node_fetch_interval)
-                continue
-            else:
-                data = self.input_queue.get(block=True)
-            self.call_process(data)
+        # notify the pipeline manager once the params of the module are available
+        self.msg_queue.put(f"{self.__class__.__name__} instance id {self.instance_id} init complete")
+
+        # waiting for all the modules to be initialized and the pipeline to be started
+        start_event.wait()
+
+        while not self.stop_event.is_set():
+            for data in self.fetch():
+                self.call_process(data)
+
+    def fetch(self):
+        """
+        Block until an item is available in the input queue, or the fetch times out. A single item is fetched, so that
+        the items are spread over the instances of the node sharing the input queue.
+        """
+        try:
+            items = [self.input_queue.get(block=True, timeout=self.args.node_fetch_interval or self.FETCH_TIMEOUT)]
+        except queue.Empty:
+            return []
+
+        queue_depth = self.get_queue_depth()
+        self.fetch_count.value += 1
+        self.queue_depth_sum.value += 1 if queue_depth is None else queue_depth + 1
+        return items
+
+    def get_queue_depth(self):
+        """Number of items waiting in the input queue, or None if it is not supported by the platform."""
+        try:
+            return self.input_queue.qsize()
+        except NotImplementedError:
+            return None
 
     def call_process(self, send_data=None):
         if send_data is not None or self.without_input_queue:
@@ -66,7 +87,8 @@ class ModuleBase(object):
                 self.process(send_data)
             except Exception as error:
                 self.process(StopData(exception=True))
-                image_path = [os.path.basename(filename) for filename in send_data.image_path]
+                items = send_data if isinstance(send_data, list) else [send_data]  # list for micro-batching nodes
+                image_path = [os.path.basename(f) for item in items for f in getattr(item, "image_path", [])]
                 log.exception(f"ERROR occurred in {self.module_name} module for {', '.join(image_path)}: {error}.")
 
             cost_time = time.time() - start_time
@@ -78,7 +100,6 @@ class ModuleBase(object):
 
     @abstractmethod
     def init_self_args(self):
-        self.msg_queue.put(f"{self.__class__.__name__} instance id {self.instance_id} init complete")
         log.info(f"{self.__class__.__name__} instance id {self.instance_id} init complete")
 
     def send_to_next_module(self, output_data):
@@ -95,12 +116,17 @@ class ModuleBase(object):
     def get_instance_id(self):
         return self.instance_id
 
+    def get_avg_queue_depth(self):
+        """Average number of items in the input queue when the node fetched data, including the fetched one."""
+        return self.queue_depth_sum.value / self.fetch_count.value if self.fetch_count.value else 0.0
+
     def stop(self):
         profiling_data = ProfilingData(
             module_name=self.module_name,
             instance_id=self.instance_id,
             process_cost_time=self.process_cost.value,
             send_cost_time=self.send_cost.value,
+            avg_queue_depth=self.get_avg_queue_depth(),
         )
         self.msg_queue.put(profiling_data, block=False)
         self.is_stop = True
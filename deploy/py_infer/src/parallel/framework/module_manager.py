@@ -1,10 +1,10 @@
 from collections import defaultdict, namedtuple
-from ctypes import c_bool
-from multiprocessing import Manager, Process, Queue
+from multiprocessing import Event, Manager, Process, Queue
 
 from ...utils import log
 from ..datatype.module_data import ModuleInitArgs, ModulesInfo
 from ..module import processor_initiator
+from .shm_queue import SharedMemoryQueue
 
 OutputRegisterInfo = namedtuple("OutputRegisterInfo", ["pipeline_name", "module_send", "module_recv"])
 
@@ -15,7 +15,8 @@ class ModuleManager:
     def __init__(self, msg_queue: Queue, task_queue: Queue, result_queue: Queue, args):
         self.pipeline_map = defaultdict(lambda: defaultdict(ModulesInfo))
         self.msg_queue = msg_queue
-        self.stop_manager = Manager().Value(c_bool, True)
+        self.start_event = Event()  # set when all the modules are initialized
+        self.stop_event = Event()  # set by the CollectNode when all the images are processed
         self.args = args
         self.pipeline_name = ""
         self.process_list = []
@@ -24,6 +25,7 @@ class ModuleManager:
         self.task_queue = task_queue  # input_queue for HandoutNode
         self.result_queue = result_queue  # output_queue for CollectNode
         self.module_params = Manager().dict()
+        self.shm_queue_list = []
 
     @staticmethod
     def stop_module(module):
@@ -81,7 +83,7 @@ class ModuleManager:
             if recv_name not in modules_info_dict:
                 raise ValueError(f"cannot find receive module {recv_name}")
 
-            queue = Queue(self.MODULE_QUEUE_MAX_SIZE)
+            queue = self._create_module_queue()
             connect_info_dict[send_name].append(queue)
             connect_info_dict[recv_name].append(queue)
             last_module = recv_name
@@ -90,6 +92,15 @@ class ModuleManager:
         log.info("------------register_module_connects end------------")
         log.info("----------------------------------------------------")
 
+    def _create_module_queue(self):
+        # with shared memory transport, large arrays are written once to a ring shared by the two connected modules,
+        # only their metadata is pickled through the queue
+        if self.args.node_shm_size > 0:
+            queue = SharedMemoryQueue(self.MODULE_QUEUE_MAX_SIZE, slab_size=self.args.node_shm_size << 20)
+            self.shm_queue_list.append(queue)
+            return queue
+        return Queue(self.MODULE_QUEUE_MAX_SIZE)
+
     def run_pipeline(self):
         log.info("-------------- start pipeline-----------------------")
         log.info("----------------------------------------------------")
@@ -110,7 +121,13 @@ class ModuleManager:
                     self.process_list.append(
                         Process(
                             target=module.process_handler,
-                            args=(self.stop_manager, self.module_params, input_queue, output_queue),
+                            args=(
+                                self.start_event,
+                                self.stop_event,
+                                self.module_params,
+                                input_queue,
+                                output_queue,
+                            ),
                             daemon=True,
                         )
                     )
@@ -141,5 +158,8 @@ class ModuleManager:
             if process.is_alive():
                 process.kill()
 
+        for queue in self.shm_queue_list:
+            queue.close()
+
         log.info("------------------pipeline stopped------------------")
         log.info("----------------------------------------------------")
@@ -70,36 +70,32 @@ class ParallelPipelineManager:
         # start the pipeline, init start
         manager.run_pipeline()
 
-        # waiting for task receive
-        while not msg_queue.full() or len(manager.module_params) != len(module_order):
-            time.sleep(0.1)
-            continue
-
+        # waiting for all the modules to be initialized, each one sends a message after updating its params
         for _ in range(module_size):
-            msg_queue.get()
+            msg_queue.get(block=True)
 
         self.module_params.update(**manager.module_params)
 
         # send sign for blocking input queue
         self.input_queue.put(StopSign(), block=True)
 
-        manager.stop_manager.value = False
+        manager.start_event.set()
 
         start_time = time.time()
 
-        while not manager.stop_manager.value:
-            time.sleep(self.args.node_fetch_interval)
+        manager.stop_event.wait()
 
         cost_time = time.time() - start_time
 
         manager.deinit_pipeline_module()
         # collect the profiling data
-        profiling_data = defaultdict(lambda: [0, 0])
+        profiling_data = defaultdict(lambda: [0, 0, []])
         image_total = 0
         for _ in range(module_size):
             msg_info = msg_queue.get()
             profiling_data[msg_info.module_name][0] += msg_info.process_cost_time
             profiling_data[msg_info.module_name][1] += msg_info.send_cost_time
+            profiling_data[msg_info.module_name][2].append(msg_info.avg_queue_depth)
             if msg_info.module_name != -1:
                 image_total = msg_info.image_total
         if image_total > 0:
@@ -122,11 +118,13 @@ class ParallelPipelineManager:
             total_time = data[0]
             process_time = data[0] - data[1]
             send_time = data[1]
+            queue_depth = safe_div(sum(data[2]), len(data[2]))
             process_avg = safe_div(process_time * 1000, image_total)
             e2e_cost_time_per_image += process_avg
             log.info(
                 f"{module_name} cost total {total_time:.2f} s, process avg cost {process_avg:.2f} ms, "
-                f"send waiting time avg cost {safe_div(send_time * 1000, image_total):.2f} ms"
+                f"send waiting time avg cost {safe_div(send_time * 1000, image_total):.2f} ms, "
+                f"input queue avg depth {queue_depth:.2f}"
             )
             log.info("----------------------------------------------------")
         log.info(f"e2e cost time per image {e2e_cost_time_per_image}ms")
@@ -0,0 +1,213 @@
+import dataclasses
+import os
+import sys
+import weakref
+from multiprocessing import Queue, RLock, resource_tracker, shared_memory
+
+import numpy as np
+
+from ...utils import log
+
+_ALIGNMENT = 64
+# control block at the beginning of the slab: head offset, tail offset, number of bytes in use
+_CONTROL_SIZE = _ALIGNMENT
+# each block starts with a header: block size (header included), released flag
+_BLOCK_HEADER_SIZE = _ALIGNMENT
+
+
+def _align(size):
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def _attach(name):
+    """
+    Attach to an existing shared memory segment without tracking it: before Python 3.13, attaching registers the
+    segment to the resource tracker of the process, which unlinks it (or warns of a leak) when the process exits,
+    while the other nodes still use it. The segment is unlinked by its creator only.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+@dataclasses.dataclass
+class SharedArrayHandle:
+    """Metadata of a numpy array stored in a shared memory ring, which is sent through the queue instead of the data"""
+
+    offset: int
+    shape: tuple
+    dtype: str
+
+
+class SharedMemoryRing:
+    """
+    Ring buffer allocator over a shared memory slab, shared by all the producers and consumers of a queue.
+
+    Blocks are allocated sequentially and released out of order: a released block is reclaimed once all the blocks
+    allocated before it are released. Arrays read by the consumers are views on the slab, so the block of an array is
+    released when the array (and every view of it) is garbage collected.
+    """
+
+    def __init__(self, size: int):
+        self.size = _align(size)
+        self._shm = shared_memory.SharedMemory(create=True, size=_CONTROL_SIZE + self.size)
+        self.name = self._shm.name
+        self._lock = RLock()  # reentrant: releases may be triggered by garbage collection inside `_allocate`
+        self._owner = True
+        self._control[:] = 0
+
+    def __getstate__(self):
+        return {"size": self.size, "name": self.name, "_lock": self._lock}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = _attach(self.name)
+        self._owner = False
+
+    @property
+    def _control(self):
+        return np.ndarray((3,), dtype=np.int64, buffer=self._shm.buf)
+
+    def _header(self, offset):
+        return np.ndarray((2,), dtype=np.int64, buffer=self._shm.buf, offset=_CONTROL_SIZE + offset)
+
+    def _reclaim(self, control):
+        head, tail, used = control
+        while used > 0:
+            block_size, released = self._header(tail)
+            if not released:
+                break
+            used -= block_size
+            tail = (tail + block_size) % self.size
+        if used == 0:
+            head = tail = 0
+        control[:] = head, tail, used
+
+    def _allocate(self, nbytes):
+        """Return the offset of a new block of `nbytes` bytes, or None if the ring is full"""
+        block_size = _BLOCK_HEADER_SIZE + _align(nbytes)
+        with self._lock:
+            control = self._control
+            self._reclaim(control)
+            head, tail, used = (int(x) for x in control)
+            if used > 0 and head <= tail:  # free space: [head, tail)
+                if tail - head < block_size:
+                    return None
+            elif self.size - head < block_size:  # free space: [head, size) and [0, tail)
+                if tail < block_size or used == 0:
+                    return None
+                # pad the end of the ring with a released block and wrap around
+                self._header(head)[:] = self.size - head, 1
+                used += self.size - head
+                head = 0
+            self._header(head)[:] = block_size, 0
+            control[:] = (head + block_size) % self.size, tail, used + block_size
+        return head
+
+    def _release(self, offset):
+        with self._lock:
+            self._header(offset)[1] = 1
+
+    def write(self, array: np.ndarray):
+        offset = self._allocate(array.nbytes)
+        if offset is None:
+            return None
+        start = _CONTROL_SIZE + offset + _BLOCK_HEADER_SIZE
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf, offset=start)[...] = array
+        return SharedArrayHandle(offset=offset, shape=array.shape, dtype=array.dtype.str)
+
+    def read(self, handle: SharedArrayHandle):
+        start = _CONTROL_SIZE + handle.offset + _BLOCK_HEADER_SIZE
+        array = np.ndarray(handle.shape, dtype=handle.dtype, buffer=self._shm.buf, offset=start)
+        weakref.finalize(array, self._release, handle.offset)
+        return array
+
+    def close(self):
+        try:
+            self._shm.close()
+        except BufferError:  # arrays read from the ring are still alive in this process
+            pass
+        if self._owner:
+            self._shm.unlink()
+
+
+class SharedMemoryQueue:
+    """
+    Queue between pipeline nodes passing large numpy arrays through a shared memory ring instead of pickling them.
+
+    The arrays of at least `min_bytes` bytes found in the sent object (dataclass fields, lists, tuples and dicts are
+    visited) are written once into the ring and replaced by a small handle; the receiver gets views on the ring. When
+    the ring is full, the arrays are sent through the queue as usual.
+
+    Args:
+        maxsize: maximum number of items in the queue.
+        slab_size: size of the shared memory ring in bytes.
+        min_bytes: minimum size in bytes of the arrays passed through the ring. Default: 64KB.
+    """
+
+    def __init__(self, maxsize: int, slab_size: int, min_bytes: int = 1 << 16):
+        self._queue = Queue(maxsize)
+        self._ring = SharedMemoryRing(slab_size)
+        self.min_bytes = min_bytes
+        self._full_warned = False
+
+    def _pack(self, obj):
+        if isinstance(obj, np.ndarray):
+            if obj.nbytes < self.min_bytes or obj.dtype == object:
+                return obj
+            handle = self._ring.write(obj)
+            if handle is None and not self._full_warned:
+                log.warning("Shared memory ring is full, arrays are sent through the queue. Consider a larger slab.")
+                self._full_warned = True
+            return obj if handle is None else handle
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return dataclasses.replace(
+                obj, **{f.name: self._pack(getattr(obj, f.name)) for f in dataclasses.fields(obj) if f.init}
+            )
+        if isinstance(obj, list):
+            return [self._pack(x) for x in obj]
+        if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+            return tuple(self._pack(x) for x in obj)
+        if isinstance(obj, dict):
+            return {k: self._pack(v) for k, v in obj.items()}
+        return obj
+
+    def _unpack(self, obj):
+        if isinstance(obj, SharedArrayHandle):
+            return self._ring.read(obj)
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            for f in dataclasses.fields(obj):
+                setattr(obj, f.name, self._unpack(getattr(obj, f.name)))
+            return obj
+        if isinstance(obj, list):
+            return [self._unpack(x) for x in obj]
+        if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+            return tuple(self._unpack(x) for x in obj)
+        if isinstance(obj, dict):
+            return {k: self._unpack(v) for k, v in obj.items()}
+        return obj
+
+    def put(self, obj, block=True, timeout=None):
+        self._queue.put(self._pack(obj), block, timeout)
+
+    def get(self, block=True, timeout=None):
+        return self._unpack(self._queue.get(block, timeout))
+
+    def empty(self):
+        return self._queue.empty()
+
+    def full(self):
+        return self._queue.full()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def close(self):
+        self._queue.close()
+        self._ring.close()
+
+    def join_thread(self):
+        self._queue.join_thread()
@@ -147,14 +147,14 @@ class CollectNode(ModuleBase):
         elif isinstance(input_data, StopData):
             self._collect_stop(input_data)
             if input_data.exception:
-                self.stop_manager.value = True
+                self.stop_event.set()
         else:
             raise ValueError("unknown input data")
 
         infer_size_sum = sum(self.infer_size.values())
         if self.image_total.value and infer_size_sum == self.image_total.value:
             self.final_text_save()
-            self.stop_manager.value = True
+            self.stop_event.set()
 
     def stop(self):
         profiling_data = ProfilingData(
@@ -162,6 +162,7 @@ class CollectNode(ModuleBase):
             instance_id=self.instance_id,
             process_cost_time=self.process_cost.value,
             send_cost_time=self.send_cost.value,
+            avg_queue_depth=self.get_avg_queue_depth(),
             image_total=self.image_total.value,
         )
         self.msg_queue.put(profiling_data, block=False)
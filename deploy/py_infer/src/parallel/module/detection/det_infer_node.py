@@ -1,8 +1,8 @@
 from ....infer import TextDetector
-from ...framework import ModuleBase
+from ...framework import MicroBatchModuleBase
 
 
-class DetInferNode(ModuleBase):
+class DetInferNode(MicroBatchModuleBase):
     def __init__(self, args, msg_queue):
         super(DetInferNode, self).__init__(args, msg_queue)
         self.text_detector = None
@@ -10,16 +10,14 @@ class DetInferNode(ModuleBase):
     def init_self_args(self):
         self.text_detector = TextDetector(self.args)
         self.text_detector.init(preprocess=False, model=True, postprocess=False)
+        self.bs_list = (-1,) if self.text_detector.dynamic_bs else self.text_detector._bs_list
         super().init_self_args()
 
-    def process(self, input_data):
-        if input_data.skip:
-            self.send_to_next_module(input_data)
-            return
+    def get_valid_size(self, input_data):
+        return 1  # bs = 1 for det
 
-        data = input_data.data
-        pred = self.text_detector.model_infer(data)
+    def model_infer(self, net_inputs):
+        return self.text_detector.model_infer({"net_inputs": net_inputs})
 
-        input_data.data = {"pred": pred, "shape_list": data["shape_list"]}
-
-        self.send_to_next_module(input_data)
+    def set_result(self, input_data, pred):
+        input_data.data = {"pred": pred, "shape_list": input_data.data["shape_list"]}
@@ -1,27 +1,26 @@
-from ....infer import TextRecognizer
-from ...framework import ModuleBase
+from ....infer import TaskType, TextRecognizer
+from ...framework import MicroBatchModuleBase
 
 
-class RecInferNode(ModuleBase):
+class RecInferNode(MicroBatchModuleBase):
     def __init__(self, args, msg_queue):
         super(RecInferNode, self).__init__(args, msg_queue)
         self.text_recognizer = None
+        self.task_type = self.args.task_type
 
     def init_self_args(self):
         self.text_recognizer = TextRecognizer(self.args)
         self.text_recognizer.init(preprocess=False, model=True, postprocess=False)
+        self.bs_list = (-1,) if self.text_recognizer.dynamic_bs else self.text_recognizer._bs_list
 
         super().init_self_args()
 
-    def process(self, input_data):
-        if input_data.skip:
-            self.send_to_next_module(input_data)
-            return
+    def get_valid_size(self, input_data):
+        batch = len(input_data.image_path) if self.task_type == TaskType.REC else input_data.sub_image_size
+        return min(batch, input_data.data["net_inputs"][0].shape[0])
 
-        data = input_data.data
-
-        pred = self.text_recognizer.model_infer(data)
+    def model_infer(self, net_inputs):
+        return self.text_recognizer.model_infer({"net_inputs": net_inputs})
 
+    def set_result(self, input_data, pred):
         input_data.data = {"pred": pred}
-
-        self.send_to_next_module(input_data)
@@ -0,0 +1,141 @@
+"""
+Aspect-ratio bucketing for text recognition data loading.
+"""
+import io
+import logging
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+__all__ = ["RecBucketSampler", "assign_bucket_widths", "read_image_size", "pad_to_max_width"]
+_logger = logging.getLogger(__name__)
+
+
+def read_image_size(image: Union[str, bytes]) -> Tuple[int, int]:
+    """
+    Read (height, width) of an image from its path or encoded bytes. Only the image header is parsed.
+    """
+    if isinstance(image, bytes):
+        image = io.BytesIO(image)
+    with Image.open(image) as img:
+        width, height = img.size
+    return height, width
+
+
+def assign_bucket_widths(image_sizes: np.ndarray, image_height: int, bucket_widths: List[int]) -> np.ndarray:
+    """
+    Assign each sample to the narrowest width bucket that fits the sample resized to `image_height` with its aspect
+    ratio kept. Samples wider than the largest bucket are assigned to the largest bucket (and squeezed by the resize
+    transform).
+
+    Args:
+        image_sizes: array of shape [N, 2], (height, width) of each source image.
+        image_height: height of the images after resizing.
+        bucket_widths: candidate widths of the images after resizing.
+
+    Returns:
+        np.ndarray: bucket width of each sample, shape [N].
+    """
+    bucket_widths = np.array(sorted(bucket_widths))
+    image_sizes = np.asarray(image_sizes, dtype=np.float64).reshape(-1, 2)
+    resized_widths = np.ceil(image_height * image_sizes[:, 1] / np.maximum(image_sizes[:, 0], 1))
+    bucket_ids = np.minimum(np.searchsorted(bucket_widths, resized_widths), len(bucket_widths) - 1)
+    return bucket_widths[bucket_ids]
+
+
+class RecBucketSampler:
+    """
+    Sampler yielding sample indices such that every `batch_size` consecutive indices belong to the same width bucket,
+    so that a batch can be padded to the bucket width instead of the maximum width of the dataset.
+
+    Batches are formed inside each bucket and then shuffled across buckets. Incomplete batches of the buckets are
+    either dropped (`drop_remainder=True`) or gathered, ordered by width, at the end of the epoch, where they may mix
+    different widths (see `pad_to_max_width`).
+
+    Args:
+        bucket_ids: bucket (e.g. width) of each sample of the dataset, shape [N].
+        batch_size: batch size of the data loader.
+        shuffle: whether to shuffle the samples inside each bucket and the order of the batches. Default: True.
+        drop_remainder: whether to drop the incomplete batch of each bucket. Default: True.
+        num_shards: number of devices for distributed data loading. Whole batches are assigned to each shard.
+            Default: None.
+        shard_id: device id for distributed data loading. Default: None.
+        seed: random seed of the shuffling. Default: None.
+    """
+
+    def __init__(
+        self,
+        bucket_ids: np.ndarray,
+        batch_size: int,
+        shuffle: bool = True,
+        drop_remainder: bool = True,
+        num_shards: Optional[int] = None,
+        shard_id: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_remainder = drop_remainder
+        self.num_shards = num_shards or 1
+        self.shard_id = shard_id or 0
+        self._rng = np.random.default_rng(seed)
+
+        buckets, bucket_ids = np.unique(np.asarray(bucket_ids), return_inverse=True)
+        self._buckets = [np.flatnonzero(bucket_ids == i) for i in range(len(buckets))]
+
+        # sizes of the batches of an epoch: full batches first, then the (optional) remainder batches
+        batch_sizes = [batch_size] * sum(len(b) // batch_size for b in self._buckets)
+        if not drop_remainder:
+            num_remainders = sum(len(b) % batch_size for b in self._buckets)
+            batch_sizes += [min(batch_size, num_remainders - i) for i in range(0, num_remainders, batch_size)]
+        self._num_batches = len(batch_sizes) // self.num_shards
+        self._num_samples = sum(batch_sizes[: self._num_batches * self.num_shards][self.shard_id :: self.num_shards])
+
+        message = ", ".join(f"{bucket}: {len(indices)}" for bucket, indices in zip(buckets, self._buckets))
+        _logger.info(f"Number of samples per bucket: {message}")
+
+    def _get_batches(self) -> List[np.ndarray]:
+        batches, remainders = [], []
+        for indices in self._buckets:
+            if self.shuffle:
+                indices = self._rng.permutation(indices)
+            num_full = len(indices) // self.batch_size * self.batch_size
+            if num_full:
+                batches.extend(np.split(indices[:num_full], num_full // self.batch_size))
+            remainders.append(indices[num_full:])
+
+        if self.shuffle:
+            batches = [batches[i] for i in self._rng.permutation(len(batches))]
+
+        if not self.drop_remainder:
+            remainders = np.concatenate(remainders)
+            batches.extend(np.split(remainders, range(self.batch_size, len(remainders), self.batch_size)))
+
+        return batches[: self._num_batches * self.num_shards]
+
+    def __iter__(self):
+        batches = self._get_batches()[self.shard_id :: self.num_shards]
+        for batch in batches:
+            yield from batch.tolist()
+
+    def __len__(self):
+        return self._num_samples
+
+
+def pad_to_max_width(images: List[np.ndarray], *args) -> Tuple[List, ...]:
+    """
+    Batch map function padding the CHW images of a batch with zeros on the right to the largest width of the batch,
+    which is only needed when a batch mixes several width buckets. If a second column is given, it is treated as
+    `valid_ratio` and rescaled to the new width.
+    """
+    *columns, _ = args  # the last argument is the BatchInfo
+    max_width = max(image.shape[-1] for image in images)
+    if all(image.shape[-1] == max_width for image in images):
+        return (images, *columns)
+
+    widths = [image.shape[-1] for image in images]
+    images = [np.pad(image, [(0, 0)] * (image.ndim - 1) + [(0, max_width - w)]) for image, w in zip(images, widths)]
+    if columns:
+        columns[0] = [ratio * w / max_width for ratio, w in zip(columns[0], widths)]
+    return (images, *columns)
@@ -4,6 +4,7 @@ import os
 
 import mindspore as ms
 
+from .bucket_sampler import RecBucketSampler, pad_to_max_width
 from .constants import IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD
 from .det_dataset import DetDataset, SynthTextDataset
 from .kie_dataset import KieDataset
@@ -11,6 +12,7 @@ from .layout_dataset import PublayNetDataset
 from .predict_dataset import PredictDataset
 from .rec_dataset import RecDataset
 from .rec_lmdb_dataset import LMDBDataset
+from .sharded_dataset import ShardedDetDataset, ShardSampler
 from .table_pubtab_dataset import PubTabDataset
 
 __all__ = ["build_dataset"]
@@ -19,6 +21,7 @@ _logger = logging.getLogger(__name__)
 supported_dataset_types = [
     "BaseDataset",
     "DetDataset",
+    "ShardedDetDataset",
     "RecDataset",
     "LMDBDataset",
     "SynthTextDataset",
@@ -53,6 +56,9 @@ def build_dataset(
             - transform_pipeline (list[dict]): each element corresponds to a transform operation on image and/or label
             - output_columns (list[str]): list of output features for each sample.
             - net_input_column_index (list[int]): input indices for network forward func in output_columns
+            - bucketing (dict, *optional*): aspect-ratio bucketing of recognition samples (RecDataset, LMDBDataset),
+              e.g. {'image_height': 32, 'bucket_widths': [64, 128, 192, 256, 320]}. Each batch is then made of the
+              samples of one width bucket and is padded to the bucket width only.
         loader_config (dict): dataloader configuration containing keys:
             - batch_size (int): batch size for data loader
             - drop_remainder (boolean): whether to drop the data in the last batch when the total of data can not be
@@ -148,17 +154,55 @@ def build_dataset(
 
     dataset_column_names = dataset.get_output_columns()
 
+    device_id = 0 if shard_id is None else shard_id
+    is_main_device = device_id == 0
+    batch_size = loader_config["batch_size"]
+    drop_remainder = loader_config.get("drop_remainder", is_train)
+    if is_train and drop_remainder is False and is_main_device:
+        _logger.warning(
+            "`drop_remainder` should be True for training, "
+            "otherwise the last batch may lead to training fail in Graph mode"
+        )
+
+    if not is_train:
+        if drop_remainder and is_main_device:
+            _logger.warning(
+                "`drop_remainder` is forced to be False for evaluation "
+                "to include the last batch for accurate evaluation."
+            )
+            drop_remainder = loader_config.get("drop_remainder", False)
+
+    # Aspect-ratio bucketing (recognition): the sampler groups the samples of the same width bucket into batches
+    # and takes care of sharding
+    sampler = None
+    if getattr(dataset, "sample_wh_ratios", None) is not None:
+        sampler = RecBucketSampler(
+            dataset.sample_wh_ratios,
+            batch_size,
+            shuffle=loader_config["shuffle"],
+            drop_remainder=drop_remainder,
+            num_shards=num_shards,
+            shard_id=shard_id,
+        )
+    # Sharded datasets (ShardedDetDataset): the sampler reads the shards one after the other and assigns whole shards
+    # to each device
+    elif getattr(dataset, "shard_sizes", None) is not None:
+        sampler = ShardSampler(
+            dataset.shard_sizes, shuffle=loader_config["shuffle"], num_shards=num_shards, shard_id=shard_id
+        )
+
     # Generate source dataset (source w.r.t. the dataset.map pipeline)
     # based on python callable numpy dataset in parallel
     ds = ms.dataset.GeneratorDataset(
         dataset,
         column_names=dataset_column_names,
         num_parallel_workers=num_workers,
-        num_shards=num_shards,
-        shard_id=shard_id,
+        num_shards=num_shards if sampler is None else None,
+        shard_id=shard_id if sampler is None else None,
         python_multiprocessing=True,  # keep True to improve performance for heavy computation.
         max_rowsize=max_rowsize,
-        shuffle=loader_config["shuffle"],
+        shuffle=loader_config["shuffle"] if sampler is None else None,
+        sampler=sampler,
     )
 
     # 2. data mapping using minddata C lib (optional)
@@ -173,33 +217,22 @@ def build_dataset(
     # 3. create loader
     # get batch of dataset by collecting batch_size consecutive data rows and apply batch operations
     num_samples = ds.get_dataset_size()
-    batch_size = loader_config["batch_size"]
 
-    device_id = 0 if shard_id is None else shard_id
-    is_main_device = device_id == 0
     _logger.info(
         f"Creating dataloader (training={is_train}) for device {device_id}. Number of data samples: {num_samples}"
         f" per device ({num_samples * num_devices} total)."
     )
 
-    if "refine_batch_size" in kwargs:
+    # the batches of a bucketing sampler must not be re-split
+    if "refine_batch_size" in kwargs and not isinstance(sampler, RecBucketSampler):
         if kwargs["refine_batch_size"]:
             batch_size = _check_batch_size(num_samples, batch_size, refine=kwargs["refine_batch_size"])
 
-    drop_remainder = loader_config.get("drop_remainder", is_train)
-    if is_train and drop_remainder is False and is_main_device:
-        _logger.warning(
-            "`drop_remainder` should be True for training, "
-            "otherwise the last batch may lead to training fail in Graph mode"
-        )
-
-    if not is_train:
-        if drop_remainder and is_main_device:
-            _logger.warning(
-                "`drop_remainder` is forced to be False for evaluation "
-                "to include the last batch for accurate evaluation."
-            )
-            drop_remainder = loader_config.get("drop_remainder", False)
+    # pad the images of the remainder batches, which may mix several width buckets
+    per_batch_map, input_columns = None, None
+    if isinstance(sampler, RecBucketSampler) and not drop_remainder:
+        per_batch_map = pad_to_max_width
+        input_columns = [c for c in ["image", "valid_ratio"] if c in dataset_column_names]
 
     dataloader = ds.batch(
         batch_size,
@@ -207,9 +240,8 @@ def build_dataset(
         num_parallel_workers=min(
             num_workers, 2
         ),  # set small workers for lite computation. TODO: increase for batch-wise mapping
-        # input_columns=input_columns,
-        # output_columns=batch_column,
-        # per_batch_map=per_batch_map, # uncomment to use inner-batch transformation
+        input_columns=input_columns,
+        per_batch_map=per_batch_map,
     )
 
     return dataloader
@@ -7,6 +7,7 @@ import numpy as np
 from scipy.io import loadmat
 
 from .base_dataset import BaseDataset
+from .sample_cache import SampleCache
 from .transforms.transforms_factory import create_transforms, run_transforms
 
 __all__ = ["DetDataset", "SynthTextDataset"]
@@ -35,6 +36,13 @@ class DetDataset(BaseDataset):
                     if None, default transform pipeline for text detection will be taken.
         output_columns (list): required, indicates the keys in data dict that are expected to output for dataloader.
                             if None, all data keys will be used for return.
+        cache (dict): Optional, enables the persistent cache of the deterministic transforms at the beginning of
+            the pipeline (see `SampleCache`), e.g. {'cache_dir': './cache'}. Possible keys:
+            - cache_dir: root directory of the cache store.
+            - num_transforms: number of leading transforms to cache. Detected automatically if not given.
+        fuse_transforms (dict): Optional, enables the fusion of consecutive transforms of the pipeline into a
+            single-pass transform (see `fuse_transforms`), e.g. {'output_dtype': 'float16'}. Possible keys:
+            - output_dtype: data type of the fused image normalization output, "float32" (default) or "float16".
         global_config: additional info, used in data transformation, possible keys:
             - character_dict_path
 
@@ -60,6 +68,8 @@ class DetDataset(BaseDataset):
         shuffle: bool = None,
         transform_pipeline: List[dict] = None,
         output_columns: List[str] = None,
+        cache: dict = None,
+        fuse_transforms: dict = None,
         **kwargs,
     ):
         super().__init__(data_dir=data_dir, label_file=label_file, output_columns=output_columns)
@@ -76,10 +86,14 @@ class DetDataset(BaseDataset):
         # create transform
         if transform_pipeline is not None:
             global_config = dict(is_train=is_train, use_minddata=kwargs.get("use_minddata", False))
-            self.transforms = create_transforms(transform_pipeline, global_config)
+            self.transforms = create_transforms(transform_pipeline, global_config, fuse=fuse_transforms)
         else:
             raise ValueError("No transform pipeline is specified!")
 
+        self.cache = None
+        if cache is not None:
+            self.cache = SampleCache(transform_pipeline=transform_pipeline, global_config=global_config, **cache)
+
         # prefetch the data keys, to fit GeneratorDataset
         _data = self.data_list[0].copy()  # WARNING: shallow copy. Do deep copy if necessary.
         _data = run_transforms(_data, transforms=self.transforms)
@@ -103,14 +117,21 @@ class DetDataset(BaseDataset):
 
         # perform transformation on data
         try:
-            data = run_transforms(data, transforms=self.transforms)
+            if self.cache is not None:
+                data = self.cache(data, self.transforms)
+            else:
+                data = run_transforms(data, transforms=self.transforms)
             output_tuple = tuple(data[k] for k in self.output_columns)
         except Exception as e:
             _logger.warning(f"Error occurred while processing the image: {self.data_list[index]['img_path']}\n {e}")
-            return self[random.randrange(len(self.data_list))]  # return another random sample instead
+            return self[self._random_index(index)]  # return another random sample instead
 
         return output_tuple
 
+    def _random_index(self, index: int) -> int:
+        """Index of a random sample replacing the sample `index`, which failed to be processed."""
+        return random.randrange(len(self.data_list))
+
     def load_data_list(
         self, label_file: List[str], sample_ratio: List[float], shuffle: bool = False, **kwargs
     ) -> List[dict]:
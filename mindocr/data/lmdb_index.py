@@ -0,0 +1,202 @@
+"""
+Sidecar index of LMDB recognition datasets: label statistics and image sizes of all records, scanned in parallel and
+optionally stored next to `data.mdb`, so that the dataset filters and samplers run in vectorized form at startup.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing as mp
+import os
+import unicodedata
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import lmdb
+import numpy as np
+
+from .bucket_sampler import read_image_size
+
+__all__ = ["load_label_index", "load_image_sizes", "count_extra_len_if_repeated", "open_lmdb_env", "IMAGE_SIZES_KEY"]
+_logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1 << 15  # number of records scanned by a worker at once
+
+# key of the (height, width) of all images, int32 array of shape [num-samples, 2], stored by the LMDB dataset writer
+IMAGE_SIZES_KEY = b"image-sizes"
+
+# LMDB environments opened by the current process, {rootdir: (pid, env, options)}. An environment must not be opened
+# twice in a process, so the datasets reading the same directory share it (opened with the options of the first one),
+# and the ones inherited from a parent process are closed first.
+_lmdb_envs: Dict[str, Tuple[int, lmdb.Environment, dict]] = {}
+
+
+def open_lmdb_env(rootdir: str, **kwargs) -> lmdb.Environment:
+    """
+    Open an LMDB environment, or return the one already opened by the current process for the same directory, in which
+    case a warning is logged if it was opened with other options.
+    """
+    rootdir = os.path.realpath(rootdir)
+    pid, env, options = _lmdb_envs.get(rootdir, (None, None, None))
+    if pid != os.getpid():
+        if env is not None:
+            env.close()
+        env = lmdb.Environment(rootdir, **kwargs)
+        _lmdb_envs[rootdir] = (os.getpid(), env, kwargs)
+    elif kwargs != options:
+        _logger.warning(
+            f"The LMDB environment {rootdir} is already opened with the options {options}, which are used instead of "
+            f"{kwargs}. An environment cannot be opened twice in a process."
+        )
+    return env
+
+
+def _open_readonly(rootdir: str) -> lmdb.Environment:
+    # an environment already opened by the process (e.g. by a dataset) can be used for scanning, whatever its options
+    pid, env, _ = _lmdb_envs.get(os.path.realpath(rootdir), (None, None, None))
+    if pid == os.getpid():
+        return env
+    return open_lmdb_env(rootdir, max_readers=32, readonly=True, lock=False, readahead=False, meminit=False)
+
+
+def count_extra_len_if_repeated(label: str) -> int:
+    """Length of the label counting one extra character for each consecutive pair of same characters."""
+    if len(label) < 2:
+        return len(label)
+    num = 1
+    for i in range(1, len(label)):
+        if label[i] == label[i - 1]:
+            num += 2
+        else:
+            num += 1
+    return num
+
+
+def _scan_labels(args) -> Dict[str, np.ndarray]:
+    rootdir, start, end, label_standandize, character_set = args
+    keys = [b"label-%09d" % i for i in range(start, end)]
+    with _open_readonly(rootdir).begin(write=False) as txn, txn.cursor() as cursor:
+        labels = dict(cursor.getmulti(keys))
+
+    index = {
+        "length": np.zeros(end - start, dtype=np.int32),
+        "extra_length": np.zeros(end - start, dtype=np.int32),
+        "has_valid_char": np.zeros(end - start, dtype=bool),
+    }
+    for i, key in enumerate(keys):
+        label = labels.get(key)
+        if label is None:
+            raise ValueError(f"Cannot find key {key} in {rootdir}")
+        label = label.decode("utf-8")
+        if label_standandize:
+            label = unicodedata.normalize("NFKD", label)
+        index["length"][i] = len(label)
+        index["extra_length"][i] = count_extra_len_if_repeated(label)
+        index["has_valid_char"][i] = not character_set.isdisjoint(label)
+    return index
+
+
+def _scan_image_sizes(args) -> Dict[str, np.ndarray]:
+    rootdir, start, end = args
+    image_sizes = np.zeros((end - start, 2), dtype=np.int32)
+    with _open_readonly(rootdir).begin(write=False) as txn:
+        for i in range(start, end):
+            image_sizes[i - start] = read_image_size(txn.get(b"image-%09d" % i))
+    return {"image_size": image_sizes}
+
+
+def _scan(scan_fn: Callable, rootdir: str, data_size: int, num_workers: int, *args) -> Dict[str, np.ndarray]:
+    """Scan the records [1, data_size] of an LMDB dataset by chunks, in parallel processes."""
+    chunks = [
+        (rootdir, start, min(start + _CHUNK_SIZE, data_size + 1), *args)
+        for start in range(1, data_size + 1, _CHUNK_SIZE)
+    ] or [(rootdir, 1, 1, *args)]
+    if num_workers > 1 and len(chunks) > 1:
+        with mp.Pool(min(num_workers, len(chunks))) as pool:
+            results = pool.map(scan_fn, chunks)
+    else:
+        results = [scan_fn(chunk) for chunk in chunks]
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+
+
+def _load_or_build(path: Optional[str], rootdir: str, data_size: int, build: Callable) -> Dict[str, np.ndarray]:
+    """
+    Load the sidecar index at `path` if it matches the current LMDB data file, otherwise build it and save it to
+    `path`. The index is not saved if `path` is None.
+    """
+    if path is None:
+        return build()
+
+    stat = os.stat(os.path.join(rootdir, "data.mdb"))
+    signature = np.array([data_size, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    if os.path.exists(path):
+        try:
+            with np.load(path) as index:
+                if np.array_equal(index["signature"], signature):
+                    return {key: index[key] for key in index.files if key != "signature"}
+            _logger.info(f"LMDB index {path} is outdated, rebuilding it.")
+        except (OSError, ValueError, KeyError) as e:
+            _logger.warning(f"Cannot read the LMDB index {path} ({e}), rebuilding it.")
+
+    index = build()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, signature=signature, **index)
+        os.replace(tmp_path, path)  # atomic: the index may be built by several processes at the same time
+    except OSError as e:
+        _logger.warning(f"Cannot save the LMDB index to {path} ({e}). It will be built again at the next run.")
+    return index
+
+
+def load_label_index(
+    rootdir: str,
+    data_size: int,
+    character_set: Iterable[str],
+    label_standandize: bool = False,
+    num_workers: int = 8,
+    save: bool = True,
+) -> Dict[str, np.ndarray]:
+    """
+    Label statistics of all records of an LMDB dataset. The index is stored in `rootdir`, one file per combination of
+    character set and label standardization, and rebuilt when the LMDB data file changes.
+
+    Args:
+        rootdir: directory of the LMDB dataset.
+        data_size: number of records of the dataset.
+        character_set: characters considered as valid.
+        label_standandize: whether the labels are standardized (NFKD) before counting.
+        num_workers: number of processes scanning the dataset.
+        save: whether to load and save the index from/to `rootdir`.
+
+    Returns:
+        dict of arrays of shape [data_size], record `i` being at position `i - 1`: `length` (label length),
+        `extra_length` (see `count_extra_len_if_repeated`) and `has_valid_char` (whether the label contains any valid
+        character).
+    """
+    character_set = frozenset(character_set)
+    key = hashlib.sha1(json.dumps([label_standandize, sorted(character_set)]).encode("utf-8")).hexdigest()[:12]
+    path = os.path.join(rootdir, f"label_index_{key}.npz") if save else None
+    return _load_or_build(
+        path,
+        rootdir,
+        data_size,
+        lambda: _scan(_scan_labels, rootdir, data_size, num_workers, label_standandize, character_set),
+    )
+
+
+def load_image_sizes(rootdir: str, data_size: int, num_workers: int = 8, save: bool = True) -> np.ndarray:
+    """
+    (height, width) of the images of all records of an LMDB dataset, record `i` being at position `i - 1`. The sizes
+    are read from the `image-sizes` record if the dataset was created with it, otherwise from an index stored in
+    `rootdir` and rebuilt when the LMDB data file changes.
+    """
+    with _open_readonly(rootdir).begin(write=False) as txn:
+        image_sizes = txn.get(IMAGE_SIZES_KEY)
+    if image_sizes is not None:
+        image_sizes = np.frombuffer(image_sizes, dtype="<i4").reshape(-1, 2)
+        if len(image_sizes) == data_size:
+            return image_sizes.astype(np.int32)
+        _logger.warning(f"The image sizes stored in {rootdir} do not match the number of samples, ignoring them.")
+
+    path = os.path.join(rootdir, "image_size_index.npz") if save else None
+    index = _load_or_build(path, rootdir, data_size, lambda: _scan(_scan_image_sizes, rootdir, data_size, num_workers))
+    return index["image_size"]
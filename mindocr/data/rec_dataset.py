@@ -1,3 +1,8 @@
+import random
+
+import numpy as np
+
+from .bucket_sampler import assign_bucket_widths, read_image_size
 from .det_dataset import DetDataset
 
 __all__ = ["RecDataset"]
@@ -26,6 +31,10 @@ class RecDataset(DetDataset):
                     if None, default transform pipeline for text detection will be taken.
         output_columns (list): required, indicates the keys in data dict that are expected to output for dataloader.
                             if None, all data keys will be used for return.
+        bucketing (dict): Optional, enables the aspect-ratio bucketing of the samples, where each sample is resized to
+            the narrowest width bucket that fits it (see `RecBucketSampler`), e.g.
+            {'image_height': 32, 'bucket_widths': [64, 128, 192, 256, 320]}. `image_height` must match the height of
+            the resize transform (`RecResizeImg` or `SVTRRecResizeImg`) in the pipeline.
         global_config: additional info, used in data transformation, possible keys:
             - character_dict_path
 
@@ -41,3 +50,20 @@ class RecDataset(DetDataset):
             │     ├── {image_file_name}
             ├── label_file.txt
     """
+
+    def __init__(self, *args, bucketing: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.sample_wh_ratios = None
+        if bucketing is not None:
+            image_sizes = np.array([read_image_size(data["img_path"]) for data in self.data_list])
+            widths = assign_bucket_widths(image_sizes, **bucketing)
+            self.sample_wh_ratios = widths / bucketing["image_height"]
+            for data, wh_ratio in zip(self.data_list, self.sample_wh_ratios):
+                data["max_wh_ratio"] = float(wh_ratio)
+
+    def _random_index(self, index: int) -> int:
+        if self.sample_wh_ratios is None:
+            return super()._random_index(index)
+        # draw the replacement from the width bucket of the sample, all the samples of a batch are of the same width
+        return int(random.choice(np.flatnonzero(self.sample_wh_ratios == self.sample_wh_ratios[index])))
@@ -1,10 +1,10 @@
 import logging
 import os
-import random
 import re
 import unicodedata
 import warnings
-from typing import Any, List, Optional
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import lmdb
 import numpy as np
@@ -12,6 +12,8 @@ import PIL
 import six
 
 from .base_dataset import BaseDataset
+from .bucket_sampler import assign_bucket_widths
+from .lmdb_index import count_extra_len_if_repeated, load_image_sizes, load_label_index, open_lmdb_env
 from .transforms.transforms_factory import create_transforms, run_transforms
 
 __all__ = ["LMDBDataset"]
@@ -44,6 +46,23 @@ class LMDBDataset(BaseDataset):
         label_standandize (bool): Apply label standardization (NFKD). default: False.
         random_choice_if_none (bool): Random choose another data if the result returned from data transform is none.
             Default: False.
+        bucketing (dict): Optional, enables the aspect-ratio bucketing of the samples, where each sample is resized to
+            the narrowest width bucket that fits it (see `RecBucketSampler`), e.g.
+            {'image_height': 32, 'bucket_widths': [64, 128, 192, 256, 320]}. `image_height` must match the height of
+            the resize transform in the pipeline. Default: None.
+        readahead (bool): enable the OS readahead of the LMDB files. It helps on spinning disks or when the dataset is
+            read sequentially, and wastes page cache on random access. Default: False.
+        map_size (int): Optional, maximum size in bytes of the memory map of the LMDB environments. Default: None.
+        prefetch_samples (int): number of samples read at once with a single LMDB cursor when a worker requests the
+            samples at a regular stride (e.g. sequential evaluation, or round-robin dispatch of an unshuffled index to
+            the workers). Random accesses are read one sample at a time. 0 disables it. Default: 0.
+        sidecar_index (bool): store the label statistics and image sizes used by the filters and the bucketing in
+            index files next to `data.mdb` (see `load_label_index`), so that the LMDB datasets are scanned only once.
+            The dataset directories must be writable. If False, the datasets are scanned at each run. Default: False.
+        index_num_workers (int): number of processes scanning the LMDB datasets to build the index. Default: 8.
+        fuse_transforms (dict): Optional, enables the fusion of consecutive transforms of the pipeline into a
+            single-pass transform (see `fuse_transforms`), e.g. {'output_dtype': 'float16'}. Possible keys:
+            - output_dtype: data type of the fused image normalization output, "float32" (default) or "float16".
 
     Returns:
         data (tuple): Depending on the transform pipeline, __get_item__ returns a tuple for the specified data item.
@@ -59,6 +78,8 @@ class LMDBDataset(BaseDataset):
                 ├── data.mdb
                 ├── lock.mdb
             ├── ...
+        2. The LMDB environments are opened again in each worker process of the data loader, as an environment must
+           not be used across a fork.
     """
 
     def __init__(
@@ -77,6 +98,13 @@ class LMDBDataset(BaseDataset):
         label_standandize: bool = False,
         random_choice_if_none: bool = False,
         check_rec_image: bool = False,
+        bucketing: Optional[dict] = None,
+        readahead: bool = False,
+        map_size: Optional[int] = None,
+        prefetch_samples: int = 0,
+        sidecar_index: bool = False,
+        index_num_workers: int = 8,
+        fuse_transforms: Optional[dict] = None,
         **kwargs: Any,
     ):
         self.data_dir = data_dir
@@ -86,9 +114,18 @@ class LMDBDataset(BaseDataset):
         self.extra_count_if_repeat = extra_count_if_repeat
         self.random_choice_if_none = random_choice_if_none
         self.check_rec_image = check_rec_image
+        self.readahead = readahead
+        self.map_size = map_size
+        self.prefetch_samples = prefetch_samples
+        self._prefetched = {}
+        self._last_idx, self._last_stride = None, None
+        self.sidecar_index = sidecar_index
+        self.index_num_workers = index_num_workers
+        self._label_indices = {}
 
         shuffle = shuffle if shuffle is not None else is_train
 
+        self._pid = os.getpid()
         self.lmdb_sets = self.load_list_of_hierarchical_lmdb_dataset(data_dir)
         if len(self.lmdb_sets) == 0:
             raise ValueError(f"Cannot find any lmdb dataset under `{data_dir}`. Please check the data path is correct.")
@@ -98,17 +135,25 @@ class LMDBDataset(BaseDataset):
         if filter_max_len:
             if max_text_len is None:
                 raise ValueError("`max_text_len` must be provided when `filter_max_len` is True.")
-            self.data_idx_order_list = self.filter_idx_list_exceeds_max_length(self.data_idx_order_list)
+            self.data_idx_order_list = self.filter_idx_list_exceeds_max_length(
+                self.data_idx_order_list, character_dict_path
+            )
 
         # filter zero text image
         if filter_zero_text_image:
             self.data_idx_order_list = self.filter_idx_list_with_zero_text(
                 self.data_idx_order_list, character_dict_path
             )
+        self._label_indices = {}  # only used by the filters
+
+        self.sample_wh_ratios = None
+        if bucketing is not None:
+            widths = assign_bucket_widths(self.get_image_sizes(self.data_idx_order_list), **bucketing)
+            self.sample_wh_ratios = widths / bucketing["image_height"]
 
         # create transform
         if transform_pipeline is not None:
-            self.transforms = create_transforms(transform_pipeline)
+            self.transforms = create_transforms(transform_pipeline, fuse=fuse_transforms)
         else:
             raise ValueError("No transform pipeline is specified!")
 
@@ -120,7 +165,7 @@ class LMDBDataset(BaseDataset):
         lmdb_idx, file_idx = self.data_idx_order_list[0]
         lmdb_idx = int(lmdb_idx)
         file_idx = int(file_idx)
-        sample_info = self.get_lmdb_sample_info(self.lmdb_sets[lmdb_idx]["txn"], file_idx)
+        sample_info = self.get_lmdb_sample_info(self.get_txn(lmdb_idx), file_idx)
         _data = {"img_lmdb": sample_info[0], "label": sample_info[1]}
         _data = run_transforms(_data, transforms=self.transforms)
         _available_keys = list(_data.keys())
@@ -140,40 +185,10 @@ class LMDBDataset(BaseDataset):
 
     @staticmethod
     def count_extra_len_if_repeated(label: str) -> int:
-        if len(label) < 2:
-            return len(label)
-        num = 1
-        for i in range(1, len(label)):
-            if label[i] == label[i - 1]:
-                num += 2
-            else:
-                num += 1
-        return num
+        return count_extra_len_if_repeated(label)
 
-    def filter_idx_list_exceeds_max_length(self, idx_list: np.ndarray) -> np.ndarray:
-        _logger.info("Start filtering the idx list which exceeds max length...")
-        new_idx_list = list()
-        for lmdb_idx, file_idx in idx_list:
-            label = self.get_lmdb_sample_info(self.lmdb_sets[int(lmdb_idx)]["txn"], int(file_idx), label_only=True)
-            if self.extra_count_if_repeat:
-                label_length = self.count_extra_len_if_repeated(label)
-            else:
-                label_length = len(label)
-
-            if label_length > self.max_text_len:
-                _logger.warning(
-                    f"skip the label with length ({label_length}), "
-                    f"which is longer than the max length ({self.max_text_len})."
-                )
-                continue
-            new_idx_list.append((lmdb_idx, file_idx))
-        new_idx_list = np.array(new_idx_list)
-        return new_idx_list
-
-    def filter_idx_list_with_zero_text(
-        self, idx_list: np.ndarray, character_dict_path: Optional[str] = None
-    ) -> np.ndarray:
-        _logger.info("Start filtering the idx list which has zero text...")
+    @staticmethod
+    def get_character_set(character_dict_path: Optional[str] = None) -> Set[str]:
         if character_dict_path is None:
             char_list = list("0123456789abcdefghijklmnopqrstuvwxyz")
             # in case when lower=True, we don't want to filter out the original upper case characters
@@ -185,18 +200,76 @@ class LMDBDataset(BaseDataset):
                     c = line.rstrip("\n\r")
                     char_list.append(c)
 
-        char_list = set(char_list)
+        return set(char_list)
+
+    def _lookup_index(self, idx_list: np.ndarray, get_records: Callable[[int], np.ndarray]) -> np.ndarray:
+        """
+        Gather the values of the records of `idx_list` from the arrays of all records of each LMDB dataset returned by
+        `get_records(lmdb_idx)`, record `i` being at position `i - 1`.
+        """
+        values = None
+        for lmdb_idx in np.unique(idx_list[:, 0]):
+            rows = idx_list[:, 0] == lmdb_idx
+            records = get_records(int(lmdb_idx))
+            if values is None:
+                values = np.zeros((len(idx_list),) + records.shape[1:], dtype=records.dtype)
+            values[rows] = records[idx_list[rows, 1] - 1]
+        return values if values is not None else np.zeros(0)
+
+    def _get_label_index(self, lmdb_idx: int, character_set: Set[str]) -> Dict[str, np.ndarray]:
+        key = (lmdb_idx, frozenset(character_set))
+        if key not in self._label_indices:
+            lmdb_set = self.lmdb_sets[lmdb_idx]
+            self._label_indices[key] = load_label_index(
+                lmdb_set["rootdir"],
+                lmdb_set["data_size"],
+                character_set,
+                label_standandize=self.label_standandize,
+                num_workers=self.index_num_workers,
+                save=self.sidecar_index,
+            )
+        return self._label_indices[key]
 
-        new_idx_list = list()
-        for lmdb_idx, file_idx in idx_list:
-            label = self.get_lmdb_sample_info(self.lmdb_sets[int(lmdb_idx)]["txn"], int(file_idx), label_only=True)
+    def filter_idx_list_exceeds_max_length(
+        self, idx_list: np.ndarray, character_dict_path: Optional[str] = None
+    ) -> np.ndarray:
+        _logger.info("Start filtering the idx list which exceeds max length...")
+        # the character set does not matter here, the same one as the zero text filter is used to share the index
+        character_set = self.get_character_set(character_dict_path)
+        key = "extra_length" if self.extra_count_if_repeat else "length"
+        label_lengths = self._lookup_index(idx_list, lambda i: self._get_label_index(i, character_set)[key])
+
+        keep = label_lengths <= self.max_text_len
+        if not np.all(keep):
+            _logger.warning(
+                f"skip {np.count_nonzero(~keep)} labels (max length {label_lengths.max()}), "
+                f"which are longer than the max length ({self.max_text_len})."
+            )
+        return idx_list[keep]
 
-            if len(set(label).intersection(char_list)) == 0:
-                _logger.warning(f"skip the label `{label}`, " f"which does not contain any valid character.")
-                continue
-            new_idx_list.append((lmdb_idx, file_idx))
-        new_idx_list = np.array(new_idx_list)
-        return new_idx_list
+    def filter_idx_list_with_zero_text(
+        self, idx_list: np.ndarray, character_dict_path: Optional[str] = None
+    ) -> np.ndarray:
+        _logger.info("Start filtering the idx list which has zero text...")
+        character_set = self.get_character_set(character_dict_path)
+        keep = self._lookup_index(idx_list, lambda i: self._get_label_index(i, character_set)["has_valid_char"])
+
+        if not np.all(keep):
+            _logger.warning(f"skip {np.count_nonzero(~keep)} labels, which do not contain any valid character.")
+        return idx_list[keep]
+
+    def get_image_sizes(self, idx_list: np.ndarray) -> np.ndarray:
+        _logger.info("Start reading the image sizes...")
+        image_sizes = self._lookup_index(
+            idx_list,
+            lambda i: load_image_sizes(
+                self.lmdb_sets[i]["rootdir"],
+                self.lmdb_sets[i]["data_size"],
+                num_workers=self.index_num_workers,
+                save=self.sidecar_index,
+            ),
+        )
+        return image_sizes.reshape(-1, 2)
 
     def load_list_of_hierarchical_lmdb_dataset(self, data_dir):
         if isinstance(data_dir, str):
@@ -223,31 +296,57 @@ class LMDBDataset(BaseDataset):
         for rootdir, dirs, _ in os.walk(data_dir + "/"):
             if not dirs:
                 try:
-                    env = lmdb.Environment(
-                        rootdir, max_readers=32, readonly=True, lock=False, readahead=False, meminit=False
-                    )
+                    env, txn = self._open_lmdb(rootdir)
                 except lmdb.Error as e:
                     _logger.warning(str(e))
                     continue
-                txn = env.begin(write=False)
                 data_size = int(txn.get("num-samples".encode()))
                 lmdb_sets[dataset_idx] = {"rootdir": rootdir, "env": env, "txn": txn, "data_size": data_size}
                 dataset_idx += 1
         return lmdb_sets
 
+    def _open_lmdb(self, rootdir: str) -> Tuple[lmdb.Environment, lmdb.Transaction]:
+        kwargs = {} if self.map_size is None else {"map_size": self.map_size}
+        env = open_lmdb_env(
+            rootdir, max_readers=32, readonly=True, lock=False, readahead=self.readahead, meminit=False, **kwargs
+        )
+        return env, env.begin(write=False)
+
+    def _reopen_after_fork(self):
+        """Reopen the environments inherited from the parent process the first time a worker process reads data."""
+        if self._pid != os.getpid():
+            for lmdb_set in self.lmdb_sets.values():
+                lmdb_set["env"], lmdb_set["txn"] = self._open_lmdb(lmdb_set["rootdir"])
+            self._prefetched = {}
+            self._last_idx, self._last_stride = None, None
+            self._pid = os.getpid()
+
+    def get_txn(self, lmdb_idx: int) -> lmdb.Transaction:
+        """Read transaction of an LMDB dataset, opened in the current process."""
+        self._reopen_after_fork()
+        return self.lmdb_sets[lmdb_idx]["txn"]
+
+    def __getstate__(self):
+        # LMDB environments cannot be pickled (spawned workers), they are reopened by `get_txn`
+        state = self.__dict__.copy()
+        state["lmdb_sets"] = {k: {**v, "env": None, "txn": None} for k, v in self.lmdb_sets.items()}
+        state["_pid"] = None
+        state["_prefetched"] = {}
+        return state
+
     def get_dataset_idx_orders(self, sample_ratio, shuffle):
         n_lmdbs = len(self.lmdb_sets)
         total_sample_num = 0
         for idx in range(n_lmdbs):
             total_sample_num += self.lmdb_sets[idx]["data_size"]
-        data_idx_order_list = np.zeros((total_sample_num, 2))
+        # (lmdb index, file index) pairs, int32 to keep the index small for datasets with tens of millions of samples
+        data_idx_order_list = np.zeros((total_sample_num, 2), dtype=np.int32)
         beg_idx = 0
         for idx in range(n_lmdbs):
             tmp_sample_num = self.lmdb_sets[idx]["data_size"]
             end_idx = beg_idx + tmp_sample_num
             data_idx_order_list[beg_idx:end_idx, 0] = idx
-            data_idx_order_list[beg_idx:end_idx, 1] = list(range(tmp_sample_num))
-            data_idx_order_list[beg_idx:end_idx, 1] += 1
+            data_idx_order_list[beg_idx:end_idx, 1] = np.arange(1, tmp_sample_num + 1)
             beg_idx = beg_idx + tmp_sample_num
 
         if shuffle:
@@ -257,15 +356,18 @@ class LMDBDataset(BaseDataset):
 
         return data_idx_order_list
 
-    def get_lmdb_sample_info(self, txn, idx, label_only=False):
-        label_key = "label-%09d".encode() % idx
-        label = txn.get(label_key)
+    def _decode_label(self, label_key, label):
         if label is None:
             raise ValueError(f"Cannot find key {label_key}")
         label = label.decode("utf-8")
 
         if self.label_standandize:
             label = unicodedata.normalize("NFKD", label)
+        return label
+
+    def get_lmdb_sample_info(self, txn, idx, label_only=False):
+        label_key = "label-%09d".encode() % idx
+        label = self._decode_label(label_key, txn.get(label_key))
 
         if label_only:
             return label
@@ -274,17 +376,59 @@ class LMDBDataset(BaseDataset):
         imgbuf = txn.get(img_key)
         return imgbuf, label
 
-    def __getitem__(self, idx):
-        lmdb_idx, file_idx = self.data_idx_order_list[idx]
+    def get_lmdb_samples(self, indices: Iterable[int]) -> Dict[int, tuple]:
+        """
+        Read the samples at the positions `indices` of the index with one cursor per LMDB dataset, visiting the keys in
+        sorted order.
+
+        Returns:
+            dict mapping each position to the (image buffer, label) tuple of the sample.
+        """
+        indices = list(indices)
+        files = defaultdict(list)
+        for idx, (lmdb_idx, file_idx) in zip(indices, self.data_idx_order_list[indices].tolist()):
+            files[lmdb_idx].append((idx, file_idx))
+
+        samples = {}
+        for lmdb_idx, items in files.items():
+            items.sort(key=lambda item: item[1])
+            image_keys = [b"image-%09d" % file_idx for _, file_idx in items]
+            label_keys = [b"label-%09d" % file_idx for _, file_idx in items]
+            with self.get_txn(lmdb_idx).cursor() as cursor:
+                values = dict(cursor.getmulti(image_keys + label_keys))  # image keys sort before label keys
+            for (idx, _), image_key, label_key in zip(items, image_keys, label_keys):
+                samples[idx] = values.get(image_key), self._decode_label(label_key, values.get(label_key))
+        return samples
+
+    def _read_sample(self, idx):
+        if not self.prefetch_samples:
+            lmdb_idx, file_idx = self.data_idx_order_list[idx]
+            return self.get_lmdb_sample_info(self.get_txn(int(lmdb_idx)), int(file_idx))
+
+        self._reopen_after_fork()
+        stride = None if self._last_idx is None else idx - self._last_idx
+        sample_info = self._prefetched.pop(idx, None)
+        if sample_info is None:
+            if stride is not None and stride > 0 and stride == self._last_stride:
+                # the samples are requested at a regular stride, read the next ones as well
+                indices = range(idx, min(idx + stride * self.prefetch_samples, len(self)), stride)
+            else:
+                indices = [idx]
+            self._prefetched = self.get_lmdb_samples(indices)
+            sample_info = self._prefetched.pop(idx)
+        self._last_idx, self._last_stride = idx, stride
+        return sample_info
 
-        sample_info = self.get_lmdb_sample_info(self.lmdb_sets[int(lmdb_idx)]["txn"], int(file_idx))
+    def __getitem__(self, idx):
+        sample_info = self._read_sample(idx)
 
         if sample_info is None and self.random_choice_if_none:
             _logger.warning("sample_info is None, randomly choose another data.")
-            random_idx = np.random.randint(self.__len__())
-            return self.__getitem__(random_idx)
+            return self.__getitem__(self._random_index(idx))
 
         data = {"img_lmdb": sample_info[0], "label": sample_info[1]}
+        if self.sample_wh_ratios is not None:
+            data["max_wh_ratio"] = float(self.sample_wh_ratios[idx])
 
         if self.check_rec_image:
             if self._check_rec_image(data):
@@ -296,8 +440,7 @@ class LMDBDataset(BaseDataset):
         except Exception as e:
             if self.random_choice_if_none:
                 _logger.warning("data is None after transforms, randomly choose another data.")
-                random_idx = np.random.randint(self.__len__())
-                return self.__getitem__(random_idx)
+                return self.__getitem__(self._random_index(idx))
             else:
                 _logger.warning(f"Error occurred during preprocess.\n {e}")
                 raise e
@@ -309,8 +452,15 @@ class LMDBDataset(BaseDataset):
     def __len__(self):
         return self.data_idx_order_list.shape[0]
 
+    def _random_index(self, index: int) -> int:
+        """Index of a random sample replacing the sample `index`, which is invalid or failed to be processed."""
+        if self.sample_wh_ratios is None:
+            return np.random.randint(self.__len__())
+        # draw the replacement from the width bucket of the sample, all the samples of a batch are of the same width
+        return int(np.random.choice(np.flatnonzero(self.sample_wh_ratios == self.sample_wh_ratios[index])))
+
     def _next_image(self, index):
-        next_index = random.randint(0, self.data_idx_order_list.shape[0] - 1)
+        next_index = self._random_index(index)
         # print("next_index:",next_index,"len:",self.lmdb_sets[index]['num_samples'] - 1)
         return self.__getitem__(idx=next_index)
 
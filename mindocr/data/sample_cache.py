@@ -0,0 +1,193 @@
+"""
+Persistent on-disk cache for the deterministic part of a data transform pipeline.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+from typing import List, Optional
+
+import numpy as np
+
+from .transforms.transforms_factory import run_transforms
+
+__all__ = ["SampleCache"]
+_logger = logging.getLogger(__name__)
+
+# transforms whose output depends on the input data and the transform arguments only
+DETERMINISTIC_TRANSFORMS = {
+    "DecodeImage",
+    "DetLabelEncode",
+    "DetResize",
+    "ValidatePolygons",
+    "NormalizeImage",
+    "ToCHWImage",
+    "RecCTCLabelEncode",
+    "RecAttnLabelEncode",
+    "RecMasterLabelEncode",
+    "RecResizeImg",
+    "SVTRRecResizeImg",
+    "RecResizeNormForInfer",
+    "Rotate90IfVertical",
+    "ClsLabelEncode",
+}
+
+# data keys, set per sample before the transforms, which change the output of the transforms
+_SAMPLE_ARGS = ("max_wh_ratio",)
+
+_HEADER_FMT = "<Q"  # length of the pickled header placed at the beginning of each cache file
+_ALIGNMENT = 64
+
+
+class SampleCache:
+    """
+    Persistent cache that materializes the output of the deterministic prefix of a transform pipeline on disk, so that
+    only the remaining (random) transforms are run on subsequent epochs and evaluations.
+
+    Each sample is stored in a single file containing a small pickled header followed by the raw bytes of its numpy
+    arrays, which are read back through a memory map. Samples are keyed by image path, image modification time,
+    label and per-sample transform arguments (e.g. `max_wh_ratio` set by bucketing), under a directory named after the
+    hash of the cached transforms' configuration, so that modifying an image, the pipeline or the bucketing
+    invalidates the corresponding entries.
+
+    Args:
+        cache_dir: root directory of the cache store.
+        transform_pipeline: transform configuration of the dataset, as given to `create_transforms`.
+        num_transforms: number of leading transforms to cache. If None, the longest prefix of the pipeline made of
+            deterministic transforms is cached. Default: None.
+        global_config: extra arguments passed to every transform, included in the configuration hash. Default: None.
+
+    Notes:
+        1. The cached arrays are stored uncompressed. Caching after `NormalizeImage` stores float32 images, i.e. four
+           times the size of decoded images.
+        2. The cache can safely be shared by multiple data loading workers: files are written to a temporary path
+           and atomically moved into place.
+    """
+
+    def __init__(
+        self, cache_dir: str, transform_pipeline: List, num_transforms: Optional[int] = None, global_config: dict = None
+    ):
+        if num_transforms is None:
+            num_transforms = 0
+            for transform in transform_pipeline:
+                if self._transform_name(transform) not in DETERMINISTIC_TRANSFORMS:
+                    break
+                num_transforms += 1
+        self.num_transforms = num_transforms
+
+        config = [self._transform_config(transform) for transform in transform_pipeline[:num_transforms]]
+        config_str = json.dumps([config, global_config], sort_keys=True, default=str)
+        self.config_hash = hashlib.sha1(config_str.encode("utf-8")).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir, self.config_hash)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        if self.num_transforms == 0:
+            _logger.warning("No deterministic transform found at the beginning of the pipeline. Nothing is cached.")
+        else:
+            names = [self._transform_name(t) for t in transform_pipeline[:num_transforms]]
+            _logger.info(f"Caching the output of transforms {names} to {self.cache_dir}")
+
+    @staticmethod
+    def _transform_name(transform) -> str:
+        if isinstance(transform, dict):
+            return list(transform.keys())[0]
+        return type(transform).__name__
+
+    @staticmethod
+    def _transform_config(transform):
+        if isinstance(transform, dict):
+            return transform
+        return {type(transform).__name__: vars(transform)}
+
+    def _cache_path(self, data: dict) -> Optional[str]:
+        img_path = data.get("img_path")
+        if img_path is None:
+            return None
+        label = data.get("label", "")
+        key = f"{os.path.abspath(img_path)}\t{os.stat(img_path).st_mtime_ns}\t{label}"
+        # per-sample arguments of the transforms, e.g. the width bucket of RecDataset read by RecResizeImg
+        for k in _SAMPLE_ARGS:
+            if data.get(k) is not None:
+                key += f"\t{k}={data[k]}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".bin")
+
+    def _split_index(self, transforms: List) -> int:
+        """
+        Number of created transforms covering the cached prefix of the pipeline config, given that a fused transform
+        (see `fuse_transforms`) replaces several transforms of the config. A fused transform across the end of the
+        prefix is not cached.
+        """
+        num_config_transforms = 0
+        for i, transform in enumerate(transforms):
+            num_config_transforms += getattr(transform, "num_fused", 1)
+            if num_config_transforms > self.num_transforms:
+                return i
+        return len(transforms)
+
+    def __call__(self, data: dict, transforms: List) -> dict:
+        """
+        Run `transforms` on `data`, loading the output of the cached prefix from disk if available.
+        """
+        path = self._cache_path(data) if self.num_transforms else None
+        if path is None:
+            return run_transforms(data, transforms=transforms)
+
+        split_index = self._split_index(transforms)
+        cached = self.load(path)
+        if cached is None:
+            cached = run_transforms(data, transforms=transforms[:split_index])
+            self.save(path, cached)
+
+        return run_transforms(cached, transforms=transforms[split_index:])
+
+    @staticmethod
+    def save(path: str, data: dict):
+        header, arrays, offset = {}, [], 0
+        for k, v in data.items():
+            if isinstance(v, np.ndarray) and v.dtype != object:
+                v = np.ascontiguousarray(v)
+                header[k] = ("array", v.dtype.str, v.shape, offset)
+                arrays.append((offset, v))
+                offset += -(-v.nbytes // _ALIGNMENT) * _ALIGNMENT
+            else:
+                header[k] = ("object", v)
+        header = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)
+        start = -(-(struct.calcsize(_HEADER_FMT) + len(header)) // _ALIGNMENT) * _ALIGNMENT
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(struct.pack(_HEADER_FMT, len(header)))
+            f.write(header)
+            for array_offset, array in arrays:
+                f.seek(start + array_offset)
+                f.write(array.data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str) -> Optional[dict]:
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header_size = struct.calcsize(_HEADER_FMT)
+            (header_len,) = struct.unpack_from(_HEADER_FMT, buffer)
+            header = pickle.loads(buffer[header_size : header_size + header_len])
+            start = -(-(header_size + header_len) // _ALIGNMENT) * _ALIGNMENT
+
+            data = {}
+            for k, entry in header.items():
+                if entry[0] == "array":
+                    _, dtype, shape, offset = entry
+                    count = int(np.prod(shape))
+                    if count == 0:
+                        data[k] = np.empty(shape, dtype=dtype)
+                        continue
+                    # copy out of the memory map: the following transforms may modify the arrays in place
+                    data[k] = np.frombuffer(buffer, dtype, count, start + offset).reshape(shape).copy()
+                else:
+                    data[k] = entry[1]
+
+        return data
@@ -0,0 +1,271 @@
+"""
+Sharded detection dataset: images and annotations packed into large tar files (shards), read shard by shard.
+"""
+import glob
+import json
+import logging
+import os
+import random
+import tarfile
+from collections import OrderedDict
+from typing import List, Optional, Union
+
+import numpy as np
+
+from .base_dataset import BaseDataset
+from .transforms.transforms_factory import create_transforms, run_transforms
+
+__all__ = ["ShardedDetDataset", "ShardSampler", "index_tar_shard", "SHARD_INDEX_FILE"]
+_logger = logging.getLogger(__name__)
+
+SHARD_INDEX_FILE = "index.json"
+
+
+def index_tar_shard(tar_path: str) -> List[list]:
+    """
+    Read the member headers of a tar shard and group the members by sample key (file name without the extension), as
+    in the WebDataset format: an image member `{key}.{jpg,png,...}` and an annotation member `{key}.json`.
+
+    Returns:
+        list of [key, image offset, image size, annotation offset, annotation size] of the samples of the shard.
+    """
+    samples = OrderedDict()
+    with tarfile.open(tar_path, "r:") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            key, ext = os.path.splitext(member.name)
+            sample = samples.setdefault(key, [key, -1, 0, -1, 0])
+            if ext == ".json":
+                sample[3:] = member.offset_data, member.size
+            else:
+                sample[1:3] = member.offset_data, member.size
+
+    incomplete = [key for key, sample in samples.items() if sample[1] < 0 or sample[3] < 0]
+    if incomplete:
+        _logger.warning(f"Skip {len(incomplete)} samples without image or annotation in {tar_path}: {incomplete[:5]}")
+    return [sample for sample in samples.values() if sample[1] >= 0 and sample[3] >= 0]
+
+
+class ShardedDetDataset(BaseDataset):
+    """
+    Text detection dataset stored in tar shards, which replaces millions of small image files by a few large files
+    and avoids the file system metadata load of `DetDataset`. Shards are created with
+    `tools/dataset_converters/det_shards.py` from a `DetDataset` label file.
+
+    Each sample is made of an image member `{key}.{ext}` and an annotation member `{key}.json` containing the same
+    annotation as the label file of `DetDataset`. The members are read with positioned reads on shard files kept open
+    by each worker process, at offsets listed in `index.json` (rebuilt from the tar headers if missing).
+
+    When used with `build_dataset`, samples are drawn by `ShardSampler`: the shards are shuffled at each epoch,
+    assigned whole to the devices, and read one after the other.
+
+    Args:
+        is_train (bool): whether it is in training stage
+        data_dir (Union[str, List[str]]): directory (or list of directories) containing the shards and `index.json`.
+        sample_ratio (float): ratio of shards to use.
+        shuffle (bool): Optional, shuffle the shards before sampling them, if not given, shuffle = is_train
+        transform_pipeline: list of dict, key - transform class name, value - a dict of param config.
+                    e.g., [{'DecodeImage': {'img_mode': 'BGR', 'channel_first': False}}]
+        output_columns (list): required, indicates the keys in data dict that are expected to output for dataloader.
+                            if None, all data keys will be used for return.
+        max_open_shards (int): maximum number of shard files kept open by each process. Default: 16.
+        fuse_transforms (dict): Optional, enables the fusion of consecutive transforms of the pipeline into a
+            single-pass transform (see `fuse_transforms`), e.g. {'output_dtype': 'float16'}. Possible keys:
+            - output_dtype: data type of the fused image normalization output, "float32" (default) or "float16".
+
+    Returns:
+        data (tuple): Depending on the transform pipeline, __get_item__ returns a tuple for the specified data item.
+        You can specify the `output_columns` arg to order the output data for dataloader.
+
+    Notes:
+        1. The data file structure should be like
+            ├── data_dir
+            │     ├── index.json
+            │     ├── shard-000000.tar
+            │     ├── shard-000001.tar
+            │     ├── ...
+    """
+
+    def __init__(
+        self,
+        is_train: bool = True,
+        data_dir: Union[str, List[str]] = None,
+        sample_ratio: float = 1.0,
+        shuffle: bool = None,
+        transform_pipeline: List[dict] = None,
+        output_columns: List[str] = None,
+        max_open_shards: int = 16,
+        fuse_transforms: dict = None,
+        **kwargs,
+    ):
+        super().__init__(data_dir=data_dir, label_file=None, output_columns=output_columns)
+        shuffle = shuffle if shuffle is not None else is_train
+        self.max_open_shards = max_open_shards
+        self._files = OrderedDict()  # {shard id: file descriptor}, positioned reads only, so they survive a fork
+
+        shards = [shard for data_dir in self.data_dir for shard in self.load_shard_index(data_dir)]
+        if shuffle:
+            random.shuffle(shards)
+        shards = shards[: max(round(len(shards) * sample_ratio), 1)]
+        if not shards:
+            raise ValueError(f"Cannot find any shard under `{self.data_dir}`. Please check the data path is correct.")
+
+        # samples are ordered shard by shard
+        self.shard_paths = [shard["path"] for shard in shards]
+        self.shard_sizes = [len(shard["samples"]) for shard in shards]
+        self._shard_ids = np.repeat(np.arange(len(shards), dtype=np.int32), self.shard_sizes)
+        self._offsets = np.array([s[1:] for shard in shards for s in shard["samples"]], dtype=np.int64).reshape(-1, 4)
+        self._keys = [s[0] for shard in shards for s in shard["samples"]]
+        _logger.info(f"Number of shards: {len(shards)}, number of samples: {len(self._keys)}")
+
+        # create transform
+        if transform_pipeline is not None:
+            global_config = dict(is_train=is_train, use_minddata=kwargs.get("use_minddata", False))
+            self.transforms = create_transforms(transform_pipeline, global_config, fuse=fuse_transforms)
+        else:
+            raise ValueError("No transform pipeline is specified!")
+
+        # prefetch the data keys, to fit GeneratorDataset
+        _data = run_transforms(self.load_sample(0), transforms=self.transforms)
+        _available_keys = list(_data.keys())
+
+        if output_columns is None:
+            self.output_columns = _available_keys
+        else:
+            self.output_columns = []
+            for k in output_columns:
+                if k in _data:
+                    self.output_columns.append(k)
+                else:
+                    raise ValueError(
+                        f"Key '{k}' does not exist in data (available keys: {_data.keys()}). "
+                        "Please check the name or the completeness transformation pipeline."
+                    )
+
+    @staticmethod
+    def load_shard_index(data_dir: str) -> List[dict]:
+        """
+        Load the shards of `data_dir` listed in `index.json`, or index all the tar files of `data_dir` if there is no
+        index file.
+
+        Returns:
+            list of {'path': shard path, 'samples': list of [key, image offset, image size, annotation offset,
+            annotation size]}.
+        """
+        index_path = os.path.join(data_dir, SHARD_INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                shards = json.load(f)["shards"]
+        else:
+            _logger.info(f"{index_path} does not exist, indexing the tar files of {data_dir}...")
+            tar_files = sorted(glob.glob(os.path.join(data_dir, "*.tar")))
+            shards = [{"path": os.path.basename(path), "samples": index_tar_shard(path)} for path in tar_files]
+
+        for shard in shards:
+            shard["path"] = os.path.join(data_dir, shard["path"])
+        return [shard for shard in shards if shard["samples"]]
+
+    def _get_file(self, shard_id: int) -> int:
+        """File descriptor of a shard. The most recently used shards are kept open by each process."""
+        fd = self._files.pop(shard_id, None)
+        if fd is None:
+            fd = os.open(self.shard_paths[shard_id], os.O_RDONLY)
+            while len(self._files) >= self.max_open_shards:
+                os.close(self._files.popitem(last=False)[1])
+        self._files[shard_id] = fd
+        return fd
+
+    def load_sample(self, index: int) -> dict:
+        fd = self._get_file(int(self._shard_ids[index]))
+        image_offset, image_size, label_offset, label_size = self._offsets[index].tolist()
+        return {
+            "img_lmdb": os.pread(fd, image_size, image_offset),
+            "label": os.pread(fd, label_size, label_offset).decode("utf-8"),
+        }
+
+    def __getitem__(self, index):
+        # perform transformation on data
+        try:
+            data = run_transforms(self.load_sample(index), transforms=self.transforms)
+            output_tuple = tuple(data[k] for k in self.output_columns)
+        except Exception as e:
+            _logger.warning(
+                f"Error occurred while processing the sample {self._keys[index]} of "
+                f"{self.shard_paths[self._shard_ids[index]]}\n {e}"
+            )
+            return self[random.randrange(len(self))]  # return another random sample instead
+
+        return output_tuple
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_files"] = OrderedDict()  # file descriptors cannot be sent to spawned processes
+        return state
+
+
+class ShardSampler:
+    """
+    Sampler reading a sharded dataset shard by shard, so that the data loader streams through a few shard files at a
+    time instead of seeking over all of them.
+
+    At each epoch, the shards are shuffled and dealt whole to the devices, each shard going to the device with the
+    fewest samples so far, then the samples inside each shard are shuffled. The dealing is the same on all the devices
+    as long as they use the same `seed`. Every device yields the same number of samples, ceil(N / num_shards): the
+    devices with fewer samples repeat some of them, the others drop their last ones.
+
+    Args:
+        shard_sizes: number of samples of each shard of the dataset, whose samples are ordered shard by shard.
+        shuffle: whether to shuffle the shards and the samples inside each shard. Default: True.
+        num_shards: number of devices for distributed data loading. Default: None.
+        shard_id: device id for distributed data loading. Default: None.
+        seed: random seed of the shuffling, must be the same on all the devices. Default: 0.
+    """
+
+    def __init__(
+        self,
+        shard_sizes: List[int],
+        shuffle: bool = True,
+        num_shards: Optional[int] = None,
+        shard_id: Optional[int] = None,
+        seed: int = 0,
+    ):
+        self.shard_sizes = np.asarray(shard_sizes, dtype=np.int64)
+        self.shard_starts = np.cumsum(self.shard_sizes) - self.shard_sizes
+        self.shuffle = shuffle
+        self.num_shards = num_shards or 1
+        self.shard_id = shard_id or 0
+        self.seed = seed
+        self._epoch = 0
+        if len(self.shard_sizes) < self.num_shards:
+            raise ValueError(
+                f"The dataset has {len(self.shard_sizes)} shards, which is less than the number of devices "
+                f"{self.num_shards}. Please create smaller shards."
+            )
+        self._num_samples = -(-int(self.shard_sizes.sum()) // self.num_shards)
+
+    def _deal_shards(self, rng: np.random.Generator) -> List[List[int]]:
+        order = rng.permutation(len(self.shard_sizes)) if self.shuffle else np.arange(len(self.shard_sizes))
+        device_shards = [[] for _ in range(self.num_shards)]
+        device_sizes = np.zeros(self.num_shards, dtype=np.int64)
+        for shard in order.tolist():
+            device = int(np.argmin(device_sizes))
+            device_shards[device].append(shard)
+            device_sizes[device] += self.shard_sizes[shard]
+        return device_shards
+
+    def __iter__(self):
+        rng = np.random.default_rng([self.seed, self._epoch])
+        self._epoch += 1
+
+        indices = []
+        for shard in self._deal_shards(rng)[self.shard_id]:
+            shard_indices = np.arange(self.shard_starts[shard], self.shard_starts[shard] + self.shard_sizes[shard])
+            indices.append(rng.permutation(shard_indices) if self.shuffle else shard_indices)
+        yield from np.resize(np.concatenate(indices), self._num_samples).tolist()
+
+    def __len__(self):
+        return self._num_samples
@@ -1,4 +1,6 @@
-from typing import List, Union
+import io
+import logging
+from typing import List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
@@ -13,12 +15,14 @@ __all__ = [
     "DecodeImage",
     "NormalizeImage",
     "ToCHWImage",
+    "NormalizeToCHWImage",
     "PackLoaderInputs",
     "RandomScale",
     "RandomColorAdjust",
     "RandomRotate",
     "RandomHorizontalFlip",
 ]
+_logger = logging.getLogger(__name__)
 
 
 def get_value(val, name):
@@ -35,16 +39,39 @@ class DecodeImage:
     """
     img_mode (str): The channel order of the output, 'BGR' and 'RGB'. Default to 'BGR'.
     channel_first (bool): if True, image shpae is CHW. If False, HWC. Default to False
+    reduced_decode (Union[int, List[int]]): if set, JPEG images are decoded directly at 1/2, 1/4 or 1/8 of their size
+        (in the DCT domain, much faster than a full decoding) as long as the decoded image stays at least as large as
+        this size: the longer side if int, each side if [h, w]. Set it to the size of the following resize transform
+        (e.g. `limit_side_len` or `target_size` of DetResize). The scale is recorded in `shape_list`
+        ([src_h, src_w, scale_h, scale_w]) and `raw_img_shape` keeps the original size, so that the predictions are
+        rescaled to the original image. The labels in image coordinates (e.g. polygons) are not rescaled, so it is
+        meant for evaluation, inference and recognition pipelines. Default: None.
     """
 
+    _REDUCED_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
     def __init__(
-        self, img_mode="BGR", channel_first=False, to_float32=False, ignore_orientation=False, keep_ori=False, **kwargs
+        self,
+        img_mode="BGR",
+        channel_first=False,
+        to_float32=False,
+        ignore_orientation=False,
+        keep_ori=False,
+        reduced_decode=None,
+        **kwargs,
     ):
         self.img_mode = img_mode
         self.to_float32 = to_float32
         self.channel_first = channel_first
         self.flag = cv2.IMREAD_IGNORE_ORIENTATION | cv2.IMREAD_COLOR if ignore_orientation else cv2.IMREAD_COLOR
+        self.ignore_orientation = ignore_orientation
         self.keep_ori = keep_ori
+        self.reduced_decode = reduced_decode
+        if reduced_decode is not None and kwargs.get("is_train", False):
+            _logger.warning(
+                "`reduced_decode` is enabled in training. The labels in image coordinates (e.g. polygons) are not "
+                "rescaled to the reduced image."
+            )
 
         self.use_minddata = kwargs.get("use_minddata", False)
         self.decoder = None
@@ -53,6 +80,30 @@ class DecodeImage:
             self.decoder = vision.Decode()
             self.cvt_color = vision.ConvertColor(vision.ConvertMode.COLOR_BGR2RGB)
 
+    def _get_reduction(self, img: bytes) -> Tuple[int, Optional[Tuple[int, int]]]:
+        """
+        Largest reduction factor of a JPEG image keeping it at least as large as `reduced_decode`, and the size of the
+        image after the EXIF orientation. Only the image header is parsed.
+        """
+        try:
+            with Image.open(io.BytesIO(img)) as pil_img:
+                if pil_img.format != "JPEG":
+                    return 1, None
+                w, h = pil_img.size
+                if not self.ignore_orientation and pil_img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                    h, w = w, h  # rotated by 90 degrees when decoded
+        except OSError:
+            return 1, None
+
+        if isinstance(self.reduced_decode, int):
+            min_h, min_w = (self.reduced_decode, 0) if h >= w else (0, self.reduced_decode)
+        else:
+            min_h, min_w = self.reduced_decode
+        for factor in (8, 4, 2):
+            if h / factor >= min_h and w / factor >= min_w:
+                return factor, (h, w)
+        return 1, (h, w)
+
     def __call__(self, data):
         if "img_path" in data:
             with open(data["img_path"], "rb") as f:
@@ -61,6 +112,10 @@ class DecodeImage:
             img = data["img_lmdb"]
         else:
             raise ValueError('"img_path" or "img_lmdb" must be in input data')
+
+        factor, raw_shape = 1, None
+        if self.reduced_decode is not None and not self.use_minddata:
+            factor, raw_shape = self._get_reduction(img)
         img = np.frombuffer(img, dtype="uint8")
 
         if self.use_minddata:
@@ -68,10 +123,17 @@ class DecodeImage:
             if self.img_mode == "BGR":
                 img = self.cvt_color(img)
         else:
-            img = cv2.imdecode(img, self.flag)
+            flag = self.flag if factor == 1 else self._REDUCED_FLAGS[factor] | (self.flag & ~cv2.IMREAD_COLOR)
+            img = cv2.imdecode(img, flag)
             if self.img_mode == "RGB":
                 img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
+        if factor > 1:
+            # the reduced size is rounded up, so the exact scale is computed from the decoded image
+            data["shape_list"] = np.array(
+                [*raw_shape, img.shape[0] / raw_shape[0], img.shape[1] / raw_shape[1]], dtype=np.float32
+            )
+
         if self.channel_first:
             img = img.transpose((2, 0, 1))
 
@@ -79,7 +141,7 @@ class DecodeImage:
             img = img.astype("float32")
         data["image"] = img
         # data['ori_image'] = img.copy()
-        data["raw_img_shape"] = img.shape[:2]
+        data["raw_img_shape"] = raw_shape if factor > 1 else img.shape[:2]
 
         if self.keep_ori:
             data["image_ori"] = img.copy()
@@ -165,6 +227,83 @@ class ToCHWImage:
         return data
 
 
+class NormalizeToCHWImage:
+    """
+    Fused `NormalizeImage` + `ToCHWImage`: normalize an HWC image channel by channel and write the result directly to
+    a CHW output array, without allocating the intermediate full-size float arrays of the unfused transforms.
+    It is inserted by `create_transforms` in place of consecutive `NormalizeImage` and `ToCHWImage` if fusion is
+    enabled.
+
+    Args:
+        mean: mean values of the channels, in RGB order for ImageNet. Default: "imagenet".
+        std: standard deviations of the channels. Default: "imagenet".
+        bgr_to_rgb: whether to reverse the channel order. Default: False.
+        rgb_to_bgr: whether to reverse the channel order. Default: False.
+        output_dtype: data type of the output image, "float32" or "float16". Default: "float32".
+    """
+
+    num_fused = 2  # number of transforms of the pipeline config replaced by this transform
+
+    def __init__(
+        self,
+        mean: Union[List[float], str] = "imagenet",
+        std: Union[List[float], str] = "imagenet",
+        bgr_to_rgb=False,
+        rgb_to_bgr=False,
+        output_dtype="float32",
+        **kwargs,
+    ):
+        self.mean = np.array(get_value(mean, "mean"), dtype=np.float32).flatten()
+        self.std = np.array(get_value(std, "std"), dtype=np.float32).flatten()
+        self._channel_conversion = bgr_to_rgb or rgb_to_bgr
+        self.output_dtype = np.dtype(output_dtype)
+
+    @classmethod
+    def from_transforms(cls, normalize: NormalizeImage, to_chw: ToCHWImage = None, **kwargs):
+        return cls(
+            mean=normalize.mean.flatten().tolist(),
+            std=normalize.std.flatten().tolist(),
+            bgr_to_rgb=normalize._channel_conversion,
+            **kwargs,
+        )
+
+    def __call__(self, data):
+        img = data["image"]
+        if isinstance(img, Image.Image):
+            img = np.array(img)
+        if img.ndim != 3 or img.shape[2] != self.mean.size:
+            # broadcast mean and std as NormalizeImage does
+            img = (img.astype(np.float32) - self.mean) / self.std
+            data["image"] = np.ascontiguousarray(img.transpose((2, 0, 1)), dtype=self.output_dtype)
+            return data
+
+        h, w, num_channels = img.shape
+        if img.dtype in (np.uint8, np.float32):
+            # cv2.split copies each channel to a contiguous plane, which is faster to read than a strided view
+            channels = cv2.split(img)
+        else:
+            channels = [img[..., i] for i in range(num_channels)]
+        if self._channel_conversion:
+            channels = channels[::-1]
+
+        output = np.empty((num_channels, h, w), dtype=self.output_dtype)
+        plane = None if self.output_dtype == np.float32 else np.empty((h, w), dtype=np.float32)
+        for i, channel in enumerate(channels):
+            out = output[i] if plane is None else plane
+            out[...] = channel
+            out -= self.mean[i]
+            out /= self.std[i]
+            if plane is None:
+                continue
+            if hasattr(cv2, "convertFp16"):  # much faster than the numpy float32 -> float16 cast
+                cv2.convertFp16(plane, output[i].view(np.int16))
+            else:
+                output[i] = plane
+
+        data["image"] = output
+        return data
+
+
 class PackLoaderInputs:
     """
     Args:
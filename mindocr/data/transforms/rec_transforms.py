@@ -507,10 +507,20 @@ def resize_norm_img_chinese(img, image_shape):
     return padding_im, valid_ratio
 
 
+def _get_target_shape(image_shape, data):
+    """target (H, W) of recognition resizing, with the width overridden by `max_wh_ratio` if it is given in data"""
+    if "max_wh_ratio" in data:
+        return image_shape[0], int(round(image_shape[0] * data["max_wh_ratio"]))
+    return image_shape
+
+
 # TODO: remove infer_mode and character_dict_path if they are not necesary
 class RecResizeImg(object):
     """adopted from paddle
     resize, convert from hwc to chw, rescale pixel value to -1 to 1
+
+    If `max_wh_ratio` is given in the data (e.g. by width bucketing), the target width is
+    `image_shape[0] * max_wh_ratio` instead of `image_shape[1]`.
     """
 
     def __init__(self, image_shape, infer_mode=False, character_dict_path=None, padding=True, **kwargs):
@@ -521,10 +531,11 @@ class RecResizeImg(object):
 
     def __call__(self, data):
         img = data["image"]
+        image_shape = _get_target_shape(self.image_shape, data)
         if self.infer_mode and self.character_dict_path is not None:
-            norm_img, valid_ratio = resize_norm_img_chinese(img, self.image_shape)
+            norm_img, valid_ratio = resize_norm_img_chinese(img, image_shape)
         else:
-            norm_img, valid_ratio = resize_norm_img(img, self.image_shape, self.padding)
+            norm_img, valid_ratio = resize_norm_img(img, image_shape, self.padding)
         data["image"] = norm_img
         data["valid_ratio"] = valid_ratio
         # TODO: data['shape_list'] = ?
@@ -539,7 +550,7 @@ class SVTRRecResizeImg(object):
     def __call__(self, data):
         img = data["image"]
 
-        norm_img, valid_ratio = resize_norm_img(img, self.image_shape, self.padding)
+        norm_img, valid_ratio = resize_norm_img(img, _get_target_shape(self.image_shape, data), self.padding)
         data["image"] = norm_img
         data["valid_ratio"] = valid_ratio
         return data
@@ -2,7 +2,7 @@
 Create and run transformations from a config or predefined transformation pipeline
 """
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
 
@@ -16,12 +16,12 @@ from .rec_transforms import *
 from .svtr_transform import *
 from .table_transform import *
 
-__all__ = ["create_transforms", "run_transforms", "transforms_dbnet_icdar15"]
+__all__ = ["create_transforms", "fuse_transforms", "run_transforms", "transforms_dbnet_icdar15"]
 _logger = logging.getLogger(__name__)
 
 
 # TODO: use class with __call__, to perform transformation
-def create_transforms(transform_pipeline: List, global_config: Dict = None):
+def create_transforms(transform_pipeline: List, global_config: Dict = None, fuse: Optional[Dict] = None):
     """
     Create a sequence of callable transforms.
 
@@ -30,6 +30,9 @@ def create_transforms(transform_pipeline: List, global_config: Dict = None):
             and its value are the args.
             e.g. [{'DecodeImage': {'img_mode': 'BGR', 'channel_first': False}}]
                  [DecodeImage(img_mode='BGR')]
+        fuse (dict): Optional, enables the replacement of consecutive transforms by an equivalent fused transform
+            (see `fuse_transforms`), with the args of the fused transforms, e.g. {'output_dtype': 'float16'}.
+            Default: None, the transforms are not fused.
 
     Returns:
         list of data transformation functions
@@ -55,9 +58,41 @@ def create_transforms(transform_pipeline: List, global_config: Dict = None):
         else:
             raise TypeError("transform_config must be a dict or a callable instance")
 
+    if fuse is not None:
+        transforms = fuse_transforms(transforms, **fuse)
+
     return transforms
 
 
+def fuse_transforms(transforms: List, output_dtype: str = "float32") -> List:
+    """
+    Replace consecutive `NormalizeImage` (HWC) and `ToCHWImage` by `NormalizeToCHWImage`, which writes the normalized
+    image directly in CHW layout in a single pass, of data type `output_dtype`. Transforms running with MindData
+    operations are not fused.
+    """
+    fused = []
+    i = 0
+    while i < len(transforms):
+        transform = transforms[i]
+        next_transform = transforms[i + 1] if i + 1 < len(transforms) else None
+        if (
+            type(transform) is NormalizeImage
+            and type(next_transform) is ToCHWImage
+            and transform.is_hwc
+            and not transform.use_minddata
+            and not next_transform.use_minddata
+        ):
+            fused.append(NormalizeToCHWImage.from_transforms(transform, next_transform, output_dtype=output_dtype))
+            i += 2
+        else:
+            fused.append(transform)
+            i += 1
+
+    if len(fused) < len(transforms):
+        _logger.info("NormalizeImage and ToCHWImage are fused into NormalizeToCHWImage.")
+    return fused
+
+
 def run_transforms(data, transforms=None, verbose=False):
     if transforms is None:
         transforms = []
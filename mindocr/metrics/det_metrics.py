@@ -1,3 +1,5 @@
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
 import numpy as np
@@ -19,6 +21,108 @@ def _get_iou(pd, pg):
     return pd.intersection(pg).area / pd.union(pg).area
 
 
+def _get_precision(pg, pd):
+    return _get_intersect(pg, pd) / pd.area
+
+
+# values computed in closed form closer than this to a threshold are recomputed with shapely
+_EXACT_MARGIN = 1e-6
+
+
+def _convex_quads(quads: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the strictly convex quadrilaterals (which are always valid polygons) among quads of shape (N, 4, 2) and
+    returns them with a positive orientation.
+    """
+    edges = np.roll(quads, -1, axis=1) - quads
+    next_edges = np.roll(edges, -1, axis=1)
+    cross = edges[..., 0] * next_edges[..., 1] - edges[..., 1] * next_edges[..., 0]
+    negative = np.all(cross < 0, axis=1)
+    convex = np.all(cross > 0, axis=1) | negative
+    return convex, np.where(negative[:, None, None], quads[:, ::-1], quads)
+
+
+def _convex_quads_intersection(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """
+    Intersection areas of pairs of convex quadrilaterals p and q of shape (K, 4, 2) with a positive orientation.
+    The intersection polygon is made of the vertices of each quadrilateral inside the other one and of the edge
+    intersections, sorted by angle around their centroid.
+    """
+
+    def cross(a, b):
+        return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+    def inside(points, poly):  # (K, M, 2) points inside (K, 4, 2) polygons -> (K, M)
+        edges = np.roll(poly, -1, axis=1) - poly
+        return np.all(cross(edges[:, :, None], points[:, None] - poly[:, :, None]) >= 0, axis=1)
+
+    p_edges, q_edges = np.roll(p, -1, axis=1) - p, np.roll(q, -1, axis=1) - q
+    denom = cross(p_edges[:, :, None], q_edges[:, None])  # (K, 4, 4): edge i of p and edge j of q
+    diff = q[:, None] - p[:, :, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = cross(diff, q_edges[:, None]) / denom
+        u = cross(diff, p_edges[:, :, None]) / denom
+    crossing = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    crossings = p[:, :, None] + np.where(crossing, t, 0)[..., None] * p_edges[:, :, None]
+
+    points = np.concatenate([p, q, crossings.reshape(len(p), -1, 2)], axis=1)
+    mask = np.concatenate([inside(p, q), inside(q, p), crossing.reshape(len(p), -1)], axis=1)
+    count = mask.sum(axis=1)
+    center = (points * mask[..., None]).sum(axis=1) / np.maximum(count, 1)[:, None]
+    angle = np.where(mask, np.arctan2(points[..., 1] - center[:, 1:], points[..., 0] - center[:, :1]), np.inf)
+    order = np.argsort(angle, axis=1)
+    # repeat the last point in place of the masked ones: the repeated points do not change the area
+    order = np.take_along_axis(order, np.minimum(np.arange(points.shape[1]), np.maximum(count - 1, 0)[:, None]), 1)
+    points = np.take_along_axis(points, order[..., None], axis=1)
+    area = 0.5 * np.abs(cross(points, np.roll(points, -1, axis=1)).sum(axis=1))
+    return np.where(count >= 3, area, 0.0)
+
+
+class _PolygonGroup:
+    """
+    Polygons with their bounding boxes. Strictly convex quadrilaterals are kept in a positive orientation, with their
+    shoelace areas, for the closed-form intersections. Shapely polygons are created on demand.
+    """
+
+    def __init__(self, polys):
+        self.points = [np.asarray(poly, dtype=np.float64).reshape(-1, 2) for poly in polys]
+        self.bboxes = np.array(
+            [np.concatenate([pts.min(axis=0), pts.max(axis=0)]) if len(pts) else [0, 0, -1, -1] for pts in self.points]
+        ).reshape(-1, 4)
+        self.is_quad = np.zeros(len(self.points), dtype=np.bool_)
+        self.quads = np.zeros((len(self.points), 4, 2))
+        four = [i for i, pts in enumerate(self.points) if len(pts) == 4]
+        if four:
+            self.is_quad[four], self.quads[four] = _convex_quads(np.stack([self.points[i] for i in four]))
+        x, y = self.quads[..., 0], self.quads[..., 1]
+        self.areas = 0.5 * (x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y).sum(axis=1)
+        self._shapes = {}
+
+    def shape(self, i: int) -> Polygon:
+        if i not in self._shapes:
+            self._shapes[i] = Polygon(self.points[i])
+        return self._shapes[i]
+
+    def is_valid(self, i: int) -> bool:
+        return bool(self.is_quad[i]) or self.shape(i).is_valid
+
+    def area(self, i: int) -> float:
+        return float(self.areas[i]) if self.is_quad[i] else self.shape(i).area
+
+    def overlaps(self, other: "_PolygonGroup") -> np.ndarray:
+        """Matrix of the pairs of polygons whose bounding boxes overlap with a positive area."""
+        lo = np.maximum(self.bboxes[:, None, :2], other.bboxes[None, :, :2])
+        hi = np.minimum(self.bboxes[:, None, 2:], other.bboxes[None, :, 2:])
+        return np.all(hi > lo, axis=-1)
+
+
+def _exceeds(value: float, threshold: float, exact_fn) -> bool:
+    """Whether the value is above the threshold. The value is computed exactly if it is NaN or too close to it."""
+    if not np.isnan(value) and abs(value - threshold) > _EXACT_MARGIN:
+        return value > threshold
+    return exact_fn() > threshold
+
+
 class DetectionIoUEvaluator:
     """
     Converts ground truth and predicted polygon locations into binary classification labels based on
@@ -28,11 +132,15 @@ class DetectionIoUEvaluator:
         min_iou: Minimum IoU between the ground truth and prediction to be considered as a correct prediction.
         min_intersect: Minimum intersection with an ignored ground truth for the prediction to be considered as ignored
                        (and thus to be excluded from further calculations).
+        batched: only compute the intersections of the polygons whose bounding boxes overlap, all at once in closed
+                 form for convex quadrilaterals, and with shapely for the other polygons and the values too close to
+                 the thresholds. Produces the same labels as the default pairwise shapely path. Default: False.
     """
 
-    def __init__(self, min_iou: float = 0.5, min_intersect: float = 0.5):
+    def __init__(self, min_iou: float = 0.5, min_intersect: float = 0.5, batched: bool = False):
         self._min_iou = min_iou
         self._min_intersect = min_intersect
+        self._batched = batched
 
     def __call__(self, gt: List[dict], preds: List[np.ndarray]) -> Tuple[List[int], List[int]]:
         """
@@ -45,6 +153,9 @@ class DetectionIoUEvaluator:
         Returns:
             binary labels for the ground truth and predicted polygons.
         """
+        if self._batched:
+            return self._call_batched(gt, preds)
+
         # filter invalid groundtruth polygons and split them into useful and ignored
         gt_polys, gt_ignore = [], []
         for sample in gt:
@@ -94,6 +205,63 @@ class DetectionIoUEvaluator:
         gt_labels = [1] * len(gt_polys) + [0] * (len(det_labels) - len(gt_polys))
         return gt_labels, det_labels
 
+    def _call_batched(self, gt: List[dict], preds: List[np.ndarray]) -> Tuple[List[int], List[int]]:
+        gts = _PolygonGroup([sample["polys"] for sample in gt])
+        valid_gt = [i for i in range(len(gt)) if gts.is_valid(i)]
+        gt_polys = [i for i in valid_gt if not gt[i]["ignore"]]
+        gt_ignore = [i for i in valid_gt if gt[i]["ignore"]]
+
+        dets = _PolygonGroup(preds)
+        det_polys = []
+        ignore_pairs = dets.overlaps(gts)[:, gt_ignore] | (self._min_intersect < 0)
+        ignore_inter = self._intersections(dets, gts, ignore_pairs, gt_ignore)
+        for det_idx in range(len(preds)):
+            if not dets.is_valid(det_idx):
+                continue
+            poly_area = dets.area(det_idx)
+            if gt_ignore and poly_area > 0:
+                for k, ignore_idx in enumerate(gt_ignore):
+                    if not ignore_pairs[det_idx, k]:
+                        continue  # no intersection
+                    precision = ignore_inter[det_idx, k] / poly_area
+                    if _exceeds(
+                        precision,
+                        self._min_intersect,
+                        lambda: _get_precision(gts.shape(ignore_idx), dets.shape(det_idx)),
+                    ):
+                        break
+                else:
+                    det_polys.append(det_idx)
+            else:
+                det_polys.append(det_idx)
+
+        det_labels = [0] * len(gt_polys)
+        pairs = dets.overlaps(gts)[det_polys][:, gt_polys] | (self._min_iou < 0)
+        inter = self._intersections(dets, gts, pairs, gt_polys, det_polys)
+        for k, det_idx in enumerate(det_polys):
+            for gt_k in np.flatnonzero(pairs[k]):
+                gt_idx = gt_polys[gt_k]
+                iou = inter[k, gt_k] / (dets.areas[det_idx] + gts.areas[gt_idx] - inter[k, gt_k])  # NaN if not quads
+                if _exceeds(iou, self._min_iou, lambda: _get_iou(dets.shape(det_idx), gts.shape(gt_idx))):
+                    det_labels[gt_k] = 1
+                    break
+            else:
+                det_labels.append(1)
+
+        gt_labels = [1] * len(gt_polys) + [0] * (len(det_labels) - len(gt_polys))
+        return gt_labels, det_labels
+
+    @staticmethod
+    def _intersections(dets, gts, pairs, gt_indices, det_indices=None) -> np.ndarray:
+        """Closed-form intersection areas of the convex quadrilateral pairs, NaN for the other pairs."""
+        det_indices = np.arange(pairs.shape[0]) if det_indices is None else np.asarray(det_indices, dtype=np.int64)
+        gt_indices = np.asarray(gt_indices, dtype=np.int64)
+        inter = np.full(pairs.shape, np.nan)
+        rows, cols = np.nonzero(pairs & dets.is_quad[det_indices][:, None] & gts.is_quad[gt_indices][None])
+        if len(rows):
+            inter[rows, cols] = _convex_quads_intersection(dets.quads[det_indices[rows]], gts.quads[gt_indices[cols]])
+        return inter
+
 
 class DetMetric(nn.Metric):
     """
@@ -101,11 +269,21 @@ class DetMetric(nn.Metric):
 
     Args:
         device_num: number of devices used in the metric calculation.
+        batched: match the polygons with the batched engine of `DetectionIoUEvaluator`, which produces the same labels.
+            Default: False.
+        num_workers: number of threads used to match the samples of a batch concurrently. Values smaller than 2
+            disable the pool. Default: 0.
     """
 
-    def __init__(self, device_num: int = 1, **kwargs):
+    def __init__(self, device_num: int = 1, batched: bool = False, num_workers: int = 0, **kwargs):
         super().__init__()
-        self._evaluator = DetectionIoUEvaluator()
+        self._evaluator = DetectionIoUEvaluator(batched=batched)
+        self._num_workers = num_workers
+        self._pool = None
+        if num_workers > 1:
+            # reused by every update, stopped once the metric is garbage collected
+            self._pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="metric")
+            weakref.finalize(self, self._pool.shutdown, wait=False)
         self._gt_labels, self._det_labels = [], []
         self.device_num = device_num
         self.all_reduce = AllReduce(reduce="sum") if device_num > 1 else None
@@ -131,9 +309,14 @@ class DetMetric(nn.Metric):
         preds = preds["polys"]
         polys, ignore = gts[0].asnumpy().astype(np.float32), gts[1].asnumpy()
 
-        for sample_id in range(len(polys)):
-            gt = [{"polys": poly, "ignore": ig} for poly, ig in zip(polys[sample_id], ignore[sample_id])]
-            gt_label, det_label = self._evaluator(gt, preds[sample_id])
+        gts = [[{"polys": poly, "ignore": ig} for poly, ig in zip(polys[i], ignore[i])] for i in range(len(polys))]
+        if self._pool is not None and len(gts) > 1:
+            # GEOS (through ctypes) and NumPy release the GIL, so threads are enough to overlap the samples
+            labels = list(self._pool.map(self._evaluator, gts, preds[: len(gts)]))
+        else:
+            labels = [self._evaluator(gt, pred) for gt, pred in zip(gts, preds)]
+
+        for gt_label, det_label in labels:
             self._gt_labels.append(gt_label)
             self._det_labels.append(det_label)
 
@@ -2,6 +2,8 @@
 import logging
 import re
 
+import numpy as np
+from rapidfuzz import process
 from rapidfuzz.distance import Levenshtein
 
 import mindspore as ms
@@ -23,6 +25,8 @@ class RecMetric(nn.Metric):
             ground truth text. Default is True.
         lower: convert GT text to lower case. Recommend to set True if the dictionary does not contains upper letters
         ignore_symbol: Ignore the symbols in the predictions
+        num_workers: number of threads computing the edit distances of a batch. -1 to use all the CPUs. Requires
+            rapidfuzz>=3.6, the distances are computed one by one otherwise. Default: 1.
 
     Notes:
         Since the OOD characters are skipped during label encoding in data transformation by default,
@@ -39,6 +43,7 @@ class RecMetric(nn.Metric):
         ignore_symbol=False,
         print_flag=False,
         device_num=1,
+        num_workers=1,
         **kwargs,
     ):
         super().__init__()
@@ -48,6 +53,7 @@ class RecMetric(nn.Metric):
         self.lower = lower
         self.ignore_symbol = ignore_symbol
         self.print_flag = print_flag
+        self.num_workers = num_workers
 
         self.device_num = device_num
         self.all_reduce = AllReduce(reduce="sum") if device_num > 1 else None
@@ -65,11 +71,13 @@ class RecMetric(nn.Metric):
                 for line in f:
                     c = line.rstrip("\n\r")
                     self.dict.append(c)
+        self._dict_set = set(self.dict)
 
     def clear(self):
-        self._correct_num = ms.Tensor(0, dtype=ms.int32)
-        self._total_num = ms.Tensor(0, dtype=ms.float32)  # avoid int divisor
-        self._norm_edit_dis = ms.Tensor(0.0, dtype=ms.float32)
+        # accumulated on the host, reduced over the devices once in eval()
+        self._correct_num = 0
+        self._total_num = 0
+        self._norm_edit_dis = 0.0
 
     def update(self, *inputs):
         """
@@ -110,6 +118,7 @@ class RecMetric(nn.Metric):
             if isinstance(gt_texts, ms.Tensor):
                 gt_texts = gt_texts.asnumpy()
 
+        preds, labels = [], []
         for pred, label in zip(pred_texts, gt_texts):
             if self.ignore_space:
                 pred = pred.replace(" ", "")
@@ -120,7 +129,7 @@ class RecMetric(nn.Metric):
                 pred = pred.lower()
 
             if self.filter_ood:  # filter out of dictionary characters
-                label = "".join([c for c in label if c in self.dict])
+                label = "".join([c for c in label if c in self._dict_set])
 
             # remove symbols
             if self.ignore_symbol:
@@ -130,30 +139,36 @@ class RecMetric(nn.Metric):
             if self.print_flag:
                 _logger.info(f"{pred} :: {label}")
 
-            edit_distance = Levenshtein.normalized_distance(pred, label)
-            self._norm_edit_dis += edit_distance
-            if pred == label:
-                self._correct_num += 1
+            preds.append(pred)
+            labels.append(label)
 
-            self._total_num += 1
+        self._norm_edit_dis += float(np.sum(self._edit_distances(preds, labels)))
+        self._correct_num += sum(pred == label for pred, label in zip(preds, labels))
+        self._total_num += len(preds)
+
+    def _edit_distances(self, preds, labels):
+        """Normalized edit distances of the pairs of texts, computed in C++ threads by rapidfuzz if available."""
+        if not preds:
+            return np.zeros(0)
+        if hasattr(process, "cpdist"):  # rapidfuzz>=3.6
+            scorer = Levenshtein.normalized_distance
+            return process.cpdist(preds, labels, scorer=scorer, dtype=np.float64, workers=self.num_workers)
+        return np.array([Levenshtein.normalized_distance(pred, label) for pred, label in zip(preds, labels)])
 
     def eval(self):
         if self._total_num == 0:
             raise RuntimeError("Accuary can not be calculated, because the number of samples is 0.")
         _logger.info(f"correct num: {self._correct_num}, total num: {self._total_num}")
 
+        correct_num, norm_edit_dis, total_num = self._correct_num, self._norm_edit_dis, self._total_num
         if self.all_reduce:
             # sum over all devices
-            correct_num = self.all_reduce(self._correct_num)
-            norm_edit_dis = self.all_reduce(self._norm_edit_dis)
-            total_num = self.all_reduce(self._total_num)
-        else:
-            correct_num = self._correct_num
-            norm_edit_dis = self._norm_edit_dis
-            total_num = self._total_num
+            correct_num = float(self.all_reduce(ms.Tensor(correct_num, ms.float32)).asnumpy())
+            norm_edit_dis = float(self.all_reduce(ms.Tensor(norm_edit_dis, ms.float32)).asnumpy())
+            total_num = float(self.all_reduce(ms.Tensor(total_num, ms.float32)).asnumpy())
 
-        sequence_accurancy = float((correct_num / total_num).asnumpy())
-        norm_edit_distance = float((1 - norm_edit_dis / total_num).asnumpy())
+        sequence_accurancy = correct_num / total_num
+        norm_edit_distance = 1 - norm_edit_dis / total_num
 
         return {"acc": sequence_accurancy, "norm_edit_distance": norm_edit_distance}
 
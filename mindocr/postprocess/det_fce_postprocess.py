@@ -135,6 +135,81 @@ def poly_nms(polygons, threshold):
     return keep_poly
 
 
+def _polygon_areas(points):
+    """Areas of polygons shaped (n, k, 2), with the shoelace formula."""
+    x, y = points[..., 0], points[..., 1]
+    return 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+
+
+def poly_nms_indices(polygons, scores, threshold):
+    """Vectorized version of `poly_nms`, returning the same polygons.
+
+    The IoU of the kept polygon with the remaining candidates is bounded with their areas A1, A2:
+        - from above by min(I, A1, A2) / (A1 + A2 - min(I, A1, A2)), with I the intersection area of their axis-aligned
+          bounding boxes, computed for all the candidates at once. The candidates whose upper bound is below the
+          threshold are kept.
+        - from below by (A1 + A2) / H - 1, with H the area of the convex hull of both polygons, which contains their
+          union. The candidates whose lower bound is above the threshold are removed.
+    The exact polygon IoU is only computed for the candidates between the two bounds.
+    Args:
+        polygons (ndarray): Polygons shaped (n, 2k).
+        scores (ndarray): Scores of the polygons shaped (n,).
+        threshold (float): The threshold of nms.
+    Returns:
+        keep (list[int]): Indices of the kept polygons, by decreasing score.
+    """
+    order = np.argsort(scores, kind="stable")
+    points = polygons.reshape(len(polygons), -1, 2).astype(np.float64)
+    mins, maxs = points.min(axis=1), points.max(axis=1)
+    areas = _polygon_areas(points)
+    shapes = {}
+
+    def get_shape(i):
+        if i not in shapes:
+            shape = points2polygon(points[i].reshape(-1))
+            shapes[i] = (shape, shape.is_valid, shape.area)
+        return shapes[i]
+
+    def exact_iou(i, j):
+        # same as `poly_iou`, with the validity and the areas computed once per polygon
+        shape_i, valid_i, area_i = get_shape(i)
+        shape_j, valid_j, area_j = get_shape(j)
+        if not (valid_i and valid_j):
+            return 0.0
+        inter = shape_i.intersection(shape_j)
+        area_inters = 0 if inter.is_empty else inter.area
+        area_union = area_i + area_j - area_inters
+        return 0.0 if area_union == 0 else area_inters / area_union
+
+    def lower_iou(i, j):
+        if not (get_shape(i)[1] and get_shape(j)[1]):
+            return 0.0
+        hull_area = cv2.contourArea(cv2.convexHull(np.concatenate([points[i], points[j]]).astype(np.float32)))
+        return (areas[i] + areas[j]) / hull_area - 1 if hull_area > 0 else 0.0
+
+    keep = []
+    alive = np.ones(len(order), dtype=np.bool_)  # over the positions in `order`
+    for pos in range(len(order) - 1, -1, -1):
+        if not alive[pos]:
+            continue
+        i = order[pos]
+        keep.append(int(i))
+        rest = np.flatnonzero(alive[:pos])
+        if not len(rest):
+            break
+
+        j = order[rest]
+        inter_wh = np.clip(np.minimum(maxs[i], maxs[j]) - np.maximum(mins[i], mins[j]), 0, None)
+        inter = np.minimum(inter_wh[:, 0] * inter_wh[:, 1], np.minimum(areas[i], areas[j]))
+        union = areas[i] + areas[j] - inter
+        upper = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        for p in rest[upper > threshold - 1e-6]:  # margins for the rounding errors of the bounds
+            if lower_iou(i, order[p]) > threshold + 1e-6 or exact_iou(i, order[p]) > threshold:
+                alive[p] = False
+
+    return keep
+
+
 def fill_hole(input_mask):
     h, w = input_mask.shape
     canvas = np.zeros((h + 2, w + 2), np.uint8)
@@ -257,6 +332,74 @@ def fcenet_decode(
     return boundaries
 
 
+def fcenet_decode_batched(
+    preds,
+    fourier_degree,
+    num_reconstr_points,
+    scale,
+    alpha=1.0,
+    beta=2.0,
+    box_type="poly",
+    score_thr=0.3,
+    nms_thr=0.1,
+):
+    """Batched version of `fcenet_decode`, returning the same instances.
+    The contours are drawn once into a label map, the polygons of all the text pixels are reconstructed with one
+    matrix product with the Fourier basis, and the polygons are filtered with `poly_nms_indices`.
+    """
+    assert isinstance(preds, list)
+    assert len(preds) == 2
+    assert box_type in ["poly", "quad"]
+
+    cls_pred = preds[0][0]
+
+    tr_pred = cls_pred[0:2]
+    tcl_pred = cls_pred[2:]
+
+    reg_pred = preds[1][0].transpose([1, 2, 0])
+    x_pred = reg_pred[:, :, : 2 * fourier_degree + 1]
+    y_pred = reg_pred[:, :, 2 * fourier_degree + 1 :]
+
+    score_pred = (tr_pred[1] ** alpha) * (tcl_pred[1] ** beta)
+    tr_pred_mask = (score_pred) > score_thr
+    tr_mask = fill_hole(tr_pred_mask)
+
+    tr_contours, _ = cv2.findContours(tr_mask.astype(np.uint8), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)  # opencv4
+
+    label_map = np.zeros(tr_mask.shape, dtype=np.int32)
+    for i in range(len(tr_contours)):
+        cv2.drawContours(label_map, tr_contours, i, i + 1, -1)
+
+    # text pixels grouped by contour, in row-major order inside each contour
+    ys, xs = np.nonzero((label_map > 0) & (score_pred > 0))
+    pixel_labels = label_map[ys, xs]
+    order = np.argsort(pixel_labels, kind="stable")
+    ys, xs, pixel_labels = ys[order], xs[order], pixel_labels[order]
+    if not len(ys):
+        return []
+
+    c = x_pred[ys, xs] + y_pred[ys, xs] * 1j
+    c[:, fourier_degree] = c[:, fourier_degree] + (xs + ys * 1j)
+    c *= scale
+
+    # inverse Fourier transform of all the candidates: (n, 2k+1) @ (2k+1, num_reconstr_points)
+    freqs = np.arange(-fourier_degree, fourier_degree + 1)
+    basis = np.exp(2j * np.pi * np.outer(freqs, np.arange(num_reconstr_points)) / num_reconstr_points)
+    poly_complex = c.astype(np.complex128) @ basis
+    polygons = np.stack([poly_complex.real, poly_complex.imag], axis=-1).astype("int32").reshape(len(c), -1)
+    scores = score_pred[ys, xs]
+
+    # nms inside each contour, then between the contours
+    bounds = np.flatnonzero(np.diff(pixel_labels)) + 1
+    keep = []
+    for start, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(ys)]])):
+        keep.extend(start + k for k in poly_nms_indices(polygons[start:end], scores[start:end], nms_thr))
+    polygons, scores = polygons[keep], scores[keep]
+    keep = poly_nms_indices(polygons, scores, nms_thr)
+
+    return np.hstack((polygons[keep], scores[keep].reshape(-1, 1))).tolist()
+
+
 class FCEPostprocess(DetBasePostprocess):
     """
     FCEPostprocess class for post-processing the predictions of FCENet.
@@ -273,6 +416,9 @@ class FCEPostprocess(DetBasePostprocess):
         beta (float): Weight parameter for stability loss. Default is 1.0.
         box_type (str): Text representation type. Default is "poly".
         rescale_fields: name of fields to scale back to the shape of the original image.
+        batched (bool): decode all the contours of a scale at once and prefilter the nms candidates with their
+            bounding boxes (see `fcenet_decode_batched`). Produces the same boundaries as the default per-contour
+            decoding. Default is False.
 
     """
 
@@ -288,6 +434,7 @@ class FCEPostprocess(DetBasePostprocess):
         beta=1.0,
         box_type="poly",
         rescale_fields: List[str] = ["polys"],
+        batched: bool = False,
     ):
         super().__init__(rescale_fields, box_type)
 
@@ -300,6 +447,7 @@ class FCEPostprocess(DetBasePostprocess):
         self.alpha = alpha
         self.beta = beta
         self.box_type = box_type
+        self.batched = batched
 
     def _postprocess(self, pred, **kwargs):
         score_maps = []
@@ -320,7 +468,12 @@ class FCEPostprocess(DetBasePostprocess):
             boundaries = boundaries + self._get_boundary_single(score_map, scale)
 
         # nms
-        boundaries = poly_nms(boundaries, self.nms_thr)
+        if self.batched and boundaries:
+            boundaries = np.array(boundaries)
+            keep = poly_nms_indices(boundaries[:, :-1], boundaries[:, -1], self.nms_thr)
+            boundaries = boundaries[keep].tolist()
+        else:
+            boundaries = poly_nms(boundaries, self.nms_thr)
 
         boxes = []
         scores = []
@@ -336,7 +489,8 @@ class FCEPostprocess(DetBasePostprocess):
         assert len(score_map) == 2
         assert score_map[1].shape[1] == 4 * self.fourier_degree + 2
 
-        return fcenet_decode(
+        decode = fcenet_decode_batched if self.batched else fcenet_decode
+        return decode(
             preds=score_map,
             fourier_degree=self.fourier_degree,
             num_reconstr_points=self.num_reconstr_points,
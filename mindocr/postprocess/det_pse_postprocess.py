@@ -1,3 +1,6 @@
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 
@@ -51,6 +54,8 @@ class PSEPostprocess(DetBasePostprocess):
         scale (int): The scale factor for resizing the predicted output. Default is 4.
         output_score_kernels (bool): Whether to output the scores and kernels. Default is False.
         rescale_fields (list): The list of fields to be rescaled. Default is ["polys"].
+        num_workers (int): The number of threads used to process the images of a batch concurrently. Values smaller
+            than 2 disable the pool. Default is 0.
 
     Returns:
         dict: A dictionary containing the final text detection results.
@@ -65,6 +70,7 @@ class PSEPostprocess(DetBasePostprocess):
         scale=4,
         output_score_kernels=False,
         rescale_fields=["polys"],
+        num_workers=0,
     ):
         super().__init__(rescale_fields, box_type)
 
@@ -80,6 +86,11 @@ class PSEPostprocess(DetBasePostprocess):
         self._rescale_fields = rescale_fields
         self._pse = pse
         self._output_score_kernels = output_score_kernels
+        self._num_workers = num_workers
+        self._pool = None
+        if num_workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="postprocess")
+            weakref.finalize(self, self._pool.shutdown, wait=False)
 
     def _postprocess(self, pred, **kwargs):  # pred: N 7 H W
         """
@@ -98,15 +109,21 @@ class PSEPostprocess(DetBasePostprocess):
 
             pred = _resize_4d_array(pred.asnumpy(), scale_factor=4 // self._scale)
             score = _sigmoid_3d_array(pred[:, 0, :, :])
-            kernels = (pred > self._binary_thresh).astype(np.float32)
+            kernels = pred > self._binary_thresh
             text_mask = kernels[:, :1, :, :]
-            kernels = (kernels * text_mask).astype(np.uint8)
+            kernels = (kernels & text_mask).view(np.uint8)
+
+        if self._pool is not None and len(score) > 1:
+            # the PSE expansion runs without the GIL, as most of OpenCV and NumPy, so threads can overlap the images
+            outputs = list(self._pool.map(self._boxes_from_bitmap, score, kernels))
+        else:
+            outputs = [
+                self._boxes_from_bitmap(sample_score, sample_kernels)
+                for sample_score, sample_kernels in zip(score, kernels)
+            ]
 
-        poly_list, score_list = [], []
-        for batch_idx in range(score.shape[0]):
-            boxes, scores = self._boxes_from_bitmap(score[batch_idx], kernels[batch_idx])
-            poly_list.append(boxes)
-            score_list.append(scores)
+        poly_list = [boxes for boxes, _ in outputs]
+        score_list = [scores for _, scores in outputs]
 
         return {"polys": poly_list, "scores": score_list}
 
@@ -115,36 +132,54 @@ class PSEPostprocess(DetBasePostprocess):
         return self._generate_box(score, label)
 
     def _generate_box(self, score, label):
-        label_num = np.max(label) + 1
+        width = label.shape[1]
+        flat_label = label.ravel()
+        # per-label statistics in one pass over the label map
+        areas = np.bincount(flat_label, minlength=1)
+        score_means = np.bincount(flat_label, weights=score.ravel(), minlength=1) / np.maximum(areas, 1)
+        keep = (areas >= self._min_area) & (score_means >= self._box_thresh)
+        keep[0] = False
+
+        # (x, y) of the pixels of all labels grouped by label with one sort, in row-major order inside each label
+        pixels = np.flatnonzero(flat_label)
+        pixels = pixels[np.argsort(flat_label[pixels], kind="stable")]
+        ys, xs = np.divmod(pixels, width)
+        all_points = np.stack([xs, ys], axis=1).astype(np.int32)
+        num_points = areas
+        if self._box_type == "quad":
+            # only the first and last pixels of each row of a label can be vertices of its convex hull, which is all
+            # minAreaRect needs
+            pixel_labels = flat_label[pixels]
+            row_start = np.ones(len(pixels), dtype=bool)
+            row_start[1:] = (ys[1:] != ys[:-1]) | (pixel_labels[1:] != pixel_labels[:-1])
+            row_end = np.ones(len(pixels), dtype=bool)
+            row_end[:-1] = row_start[1:]
+            extremes = row_start | row_end
+            all_points = all_points[extremes]
+            num_points = np.bincount(pixel_labels[extremes], minlength=len(areas))
+        ends = np.cumsum(num_points[1:])
+
         boxes = []
         scores = []
-        for i in range(1, label_num):
-            ind = label == i
-            points = np.array(np.where(ind)).transpose((1, 0))[:, ::-1]
-            if points.shape[0] < self._min_area:
-                label[ind] = 0
-                continue
-
-            score_i = np.mean(score[ind])
-            if score_i < self._box_thresh:
-                label[ind] = 0
-                continue
+        for i in np.flatnonzero(keep).tolist():
+            points = all_points[ends[i - 1] - num_points[i] : ends[i - 1]]
 
             if self._box_type == "quad":
                 rect = cv2.minAreaRect(points)
                 bbox = cv2.boxPoints(rect)
             elif self._box_type == "poly":
-                box_height = np.max(points[:, 1]) + 10
-                box_width = np.max(points[:, 0]) + 10
-                mask = np.zeros((box_height, box_width), np.uint8)
-                mask[points[:, 1], points[:, 0]] = 255
+                # contour of the component drawn in its bounding box (with a margin), shifted back to the image
+                x_min, y_min = points.min(axis=0) - 1
+                x_max, y_max = points.max(axis=0)
+                mask = np.zeros((y_max - y_min + 2, x_max - x_min + 2), np.uint8)
+                mask[points[:, 1] - y_min, points[:, 0] - x_min] = 255
                 contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                bbox = np.squeeze(contours[0], 1)
+                bbox = np.squeeze(contours[0], 1) + np.array([x_min, y_min], dtype=np.int32)
             else:
                 raise NotImplementedError(
                     f"The value of param 'box_type' can only be 'quad', but got '{self._box_type}'."
                 )
             boxes.append(bbox)
-            scores.append(score_i)
+            scores.append(np.float32(score_means[i]))
 
         return boxes, scores
@@ -8,7 +8,15 @@ ori_path = os.getcwd()
 curr_file_dir = os.path.split(os.path.realpath(__file__))[0]  # get current file dir
 os.chdir(curr_file_dir)
 files = os.listdir()
-if "pse.cpp" not in files or "build" not in files:  # check whether pse codes have been compiled
+# compile the pse codes if they have not been compiled yet, or have been modified since. To force a recompilation,
+# remove pse.cpp or the build folder.
+built_files = [f for f in files if f.startswith("pse.") and f.endswith((".so", ".pyd"))]
+if (
+    "pse.cpp" not in files
+    or "build" not in files
+    or not built_files
+    or os.path.getmtime("pse.pyx") > min(os.path.getmtime(f) for f in built_files + ["pse.cpp"])
+):
     if subprocess.call("{} setup.py build_ext --inplace".format(python_path), shell=True) != 0:
         raise RuntimeError(
             "Cannot compile pse: {}, please check whether Cython is installed and "
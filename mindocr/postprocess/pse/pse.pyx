@@ -21,9 +21,11 @@ cdef np.ndarray[np.int32_t, ndim=2] _pse(np.ndarray[np.uint8_t, ndim=3] kernels,
     cdef np.ndarray[np.int32_t, ndim=2] pred
     pred = np.zeros((label.shape[0], label.shape[1]), dtype=np.int32)
 
-    for label_idx in range(1, label_num):
-        if np.sum(label == label_idx) < min_area:
-            label[label == label_idx] = 0
+    cdef np.uint8_t[:, :, :] kernels_view = kernels
+    cdef np.int32_t[:, :] label_view = label
+    cdef np.int32_t[:, :] pred_view = pred
+    cdef int height = label.shape[0]
+    cdef int width = label.shape[1]
 
     cdef libcpp.queue.queue[libcpp.pair.pair[np.int16_t,np.int16_t]] que = \
         queue[libcpp.pair.pair[np.int16_t,np.int16_t]]()
@@ -33,40 +35,48 @@ cdef np.ndarray[np.int32_t, ndim=2] _pse(np.ndarray[np.uint8_t, ndim=3] kernels,
     cdef np.int16_t* dy = [0, 0, -1, 1]
     cdef np.int16_t tmpx, tmpy
 
-    points = np.array(np.where(label > 0)).transpose((1, 0))
-    for point_idx in range(points.shape[0]):
-        tmpx, tmpy = points[point_idx, 0], points[point_idx, 1]
-        que.push(pair[np.int16_t,np.int16_t](tmpx, tmpy))
-        pred[tmpx, tmpy] = label[tmpx, tmpy]
-
     cdef libcpp.pair.pair[np.int16_t,np.int16_t] cur
-    cdef int cur_label
-    for kernel_idx in range(kernel_num - 1, -1, -1):
-        while not que.empty():
-            cur = que.front()
-            que.pop()
-            cur_label = pred[cur.first, cur.second]
+    cdef int cur_label, kernel_idx, i, j
+    cdef bint is_edge
+
+    # the expansion only uses C types, so the GIL is released and the images of a batch can be processed in threads
+    with nogil:
+        for i in range(height):
+            for j in range(width):
+                if label_view[i, j] > 0:
+                    que.push(pair[np.int16_t,np.int16_t](i, j))
+                    pred_view[i, j] = label_view[i, j]
+
+        for kernel_idx in range(kernel_num - 2, -1, -1):
+            while not que.empty():
+                cur = que.front()
+                que.pop()
+                cur_label = pred_view[cur.first, cur.second]
 
-            is_edge = True
-            for j in range(4):
-                tmpx = cur.first + dx[j]
-                tmpy = cur.second + dy[j]
-                if tmpx < 0 or tmpx >= label.shape[0] or tmpy < 0 or tmpy >= label.shape[1]:
-                    continue
-                if kernels[kernel_idx, tmpx, tmpy] == 0 or pred[tmpx, tmpy] > 0:
-                    continue
+                is_edge = True
+                for j in range(4):
+                    tmpx = cur.first + dx[j]
+                    tmpy = cur.second + dy[j]
+                    if tmpx < 0 or tmpx >= height or tmpy < 0 or tmpy >= width:
+                        continue
+                    if kernels_view[kernel_idx, tmpx, tmpy] == 0 or pred_view[tmpx, tmpy] > 0:
+                        continue
 
-                que.push(pair[np.int16_t,np.int16_t](tmpx, tmpy))
-                pred[tmpx, tmpy] = cur_label
-                is_edge = False
-            if is_edge:
-                nxt_que.push(cur)
+                    que.push(pair[np.int16_t,np.int16_t](tmpx, tmpy))
+                    pred_view[tmpx, tmpy] = cur_label
+                    is_edge = False
+                if is_edge:
+                    nxt_que.push(cur)
 
-        que, nxt_que = nxt_que, que
+            que.swap(nxt_que)
 
     return pred
 
 def pse(kernels, min_area):
     kernel_num = kernels.shape[0]
-    label_num, label = cv2.connectedComponents(kernels[-1], connectivity=4)
+    label_num, label, stats, _ = cv2.connectedComponentsWithStats(kernels[-1], connectivity=4)
+    # remove the kernels smaller than min_area with the areas of all components, computed in one pass
+    small = stats[:, cv2.CC_STAT_AREA] < min_area
+    small[0] = False
+    label[small[label]] = 0
     return _pse(kernels[:-1], label, kernel_num, label_num, min_area)
@@ -24,6 +24,8 @@ class EvalSaveCallback(Callback):
         network (nn.Cell): network (without loss)
         loader (Dataset): dataloader
         ema: if not None, the ema params will be loaded to the network for evaluation.
+        async_workers: number of threads postprocessing the evaluation batches while the network runs on the next
+            ones (see `Evaluator`). 0 to disable.
     """
 
     def __init__(
@@ -50,6 +52,7 @@ class EvalSaveCallback(Callback):
         ckpt_save_policy="top_k",
         ckpt_max_keep=10,
         start_epoch=0,
+        async_workers=0,
     ):
         self.rank_id = rank_id
         self.is_main_device = rank_id in [0, None]
@@ -72,6 +75,7 @@ class EvalSaveCallback(Callback):
                 input_indices=input_indices,
                 label_indices=label_indices,
                 meta_data_indices=meta_data_indices,
+                async_workers=async_workers,
             )
             self.main_indicator = main_indicator
             self.best_perf = -1e8
@@ -1,4 +1,6 @@
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from tqdm import tqdm
@@ -27,6 +29,10 @@ class Evaluator:
             If it is None, then the remaining items will be marked as label.
         meta_data_indices: The indices for the data tuples which will be marked as metadata.
             If it is None, then the item indices not in input or label indices are marked as meta data.
+        async_workers: number of threads postprocessing the batches in the background while the network runs on the
+            next batches. The metrics are updated by another thread in the order of the batches, so the results are
+            the same as the sequential evaluation. At most 2 * async_workers batches are pending. Meant for the
+            postprocessors working on NumPy arrays, as most of them do. 0 to disable. Default: 0.
     """
 
     def __init__(
@@ -44,6 +50,7 @@ class Evaluator:
         num_epochs=-1,
         visualize=False,
         verbose=False,
+        async_workers=0,
         **kwargs,
     ):
         self.net = network
@@ -60,6 +67,7 @@ class Evaluator:
         self.pred_cast_fp32 = pred_cast_fp32
         self.visualize = visualize
         self.verbose = verbose
+        self.async_workers = async_workers
         eval_loss = False
         if loss_fn is not None:
             eval_loss = True
@@ -105,58 +113,15 @@ class Evaluator:
         for m in self.metrics:
             m.clear()
 
-        for i, data in tqdm(enumerate(self.iterator), total=self.num_batches_eval):
-            if self.input_indices is not None:
-                inputs = [data[x] for x in self.input_indices]
-            else:
-                inputs = [data[0]]
+        if self.async_workers > 0:
+            self._eval_async()
+        else:
+            for i, data in tqdm(enumerate(self.iterator), total=self.num_batches_eval):
+                preds, gt, data_info = self._forward(data)
+                self._update_metrics(self._postprocess(preds, data_info), gt)
 
-            if self.label_indices is not None:
-                gt = [data[x] for x in self.label_indices]
-            else:
-                gt = data[1:]
-
-            preds = self.net(*inputs)
-
-            if self.pred_cast_fp32:
-                if isinstance(preds, ms.Tensor):
-                    preds = F.cast(preds, mstype.float32)
-                else:
-                    preds = [F.cast(p, mstype.float32) for p in preds]
-
-            data_info = {"labels": gt, "img_shape": inputs[0].shape}
-
-            if self.postprocessor is not None:
-                # additional info such as image path, original image size, pad shape, extracted in data processing
-                if self.meta_data_indices is not None:
-                    meta_info = [data[x] for x in self.meta_data_indices]
-                else:
-                    # assume the indices not in input_indices or label_indices are all meta_data_indices
-                    input_indices = set(self.input_indices) if self.input_indices is not None else {0}
-                    label_indices = (
-                        set(self.label_indices) if self.label_indices is not None else set(range(1, len(data), 1))
-                    )
-                    meta_data_indices = sorted(set(range(len(data))) - input_indices - label_indices)
-                    meta_info = [data[x] for x in meta_data_indices]
-
-                data_info["meta_info"] = meta_info
-
-                # NOTES: add more if new postprocess modules need new keys. shape_list is commonly needed by detection
-                possible_keys_for_postprocess = ["shape_list", "raw_img_shape"]
-                # TODO: remove raw_img_shape (used in tools/infer/text/parallel).
-                #  shape_list = [h, w, ratio_h, ratio_w] already contain raw image shape.
-                for k in possible_keys_for_postprocess:
-                    if k in self.loader_output_columns:
-                        data_info[k] = data[self.loader_output_columns.index(k)]
-
-                preds = self.postprocessor(preds, **data_info)
-
-            # metric internal update
-            for m in self.metrics:
-                m.update(preds, gt)
-
-            if self.verbose:
-                _logger.info(f"Data meta info: {data_info}")
+                if self.verbose:
+                    _logger.info(f"Data meta info: {data_info}")
 
         for m in self.metrics:
             res_dict = m.eval()
@@ -165,3 +130,92 @@ class Evaluator:
         self.net.set_train(True)
 
         return eval_res
+
+    def _eval_async(self):
+        max_pending = 2 * self.async_workers
+        pending = deque()
+        with ThreadPoolExecutor(self.async_workers) as postprocess_pool, ThreadPoolExecutor(1) as metric_pool:
+            for i, data in tqdm(enumerate(self.iterator), total=self.num_batches_eval):
+                preds, gt, data_info = self._forward(data)
+                # the tensors of the iterator are reused (do_copy=False) and the network outputs are fetched here,
+                # so that the device moves to the next batch while this one is postprocessed
+                preds, gt, data_info = _to_host((preds, gt, data_info))
+
+                future = postprocess_pool.submit(self._postprocess, preds, data_info)
+                # a single thread updates the metrics, in the order of the batches
+                pending.append(metric_pool.submit(lambda f, g: self._update_metrics(f.result(), g), future, gt))
+                while len(pending) > max_pending:
+                    pending.popleft().result()
+
+                if self.verbose:
+                    _logger.info(f"Data meta info: {data_info}")
+
+            while pending:
+                pending.popleft().result()
+
+    def _forward(self, data):
+        if self.input_indices is not None:
+            inputs = [data[x] for x in self.input_indices]
+        else:
+            inputs = [data[0]]
+
+        if self.label_indices is not None:
+            gt = [data[x] for x in self.label_indices]
+        else:
+            gt = data[1:]
+
+        preds = self.net(*inputs)
+
+        if self.pred_cast_fp32:
+            if isinstance(preds, ms.Tensor):
+                preds = F.cast(preds, mstype.float32)
+            else:
+                preds = [F.cast(p, mstype.float32) for p in preds]
+
+        data_info = {"labels": gt, "img_shape": inputs[0].shape}
+
+        if self.postprocessor is not None:
+            # additional info such as image path, original image size, pad shape, extracted in data processing
+            if self.meta_data_indices is not None:
+                meta_info = [data[x] for x in self.meta_data_indices]
+            else:
+                # assume the indices not in input_indices or label_indices are all meta_data_indices
+                input_indices = set(self.input_indices) if self.input_indices is not None else {0}
+                label_indices = (
+                    set(self.label_indices) if self.label_indices is not None else set(range(1, len(data), 1))
+                )
+                meta_data_indices = sorted(set(range(len(data))) - input_indices - label_indices)
+                meta_info = [data[x] for x in meta_data_indices]
+
+            data_info["meta_info"] = meta_info
+
+            # NOTES: add more if new postprocess modules need new keys. shape_list is commonly needed by detection
+            possible_keys_for_postprocess = ["shape_list", "raw_img_shape"]
+            # TODO: remove raw_img_shape (used in tools/infer/text/parallel).
+            #  shape_list = [h, w, ratio_h, ratio_w] already contain raw image shape.
+            for k in possible_keys_for_postprocess:
+                if k in self.loader_output_columns:
+                    data_info[k] = data[self.loader_output_columns.index(k)]
+
+        return preds, gt, data_info
+
+    def _postprocess(self, preds, data_info):
+        if self.postprocessor is not None:
+            preds = self.postprocessor(preds, **data_info)
+        return preds
+
+    def _update_metrics(self, preds, gt):
+        # metric internal update
+        for m in self.metrics:
+            m.update(preds, gt)
+
+
+def _to_host(data):
+    """Copy the tensors of (nested) data to new host tensors."""
+    if isinstance(data, ms.Tensor):
+        return ms.Tensor(data.asnumpy().copy())
+    if isinstance(data, (list, tuple)):
+        return type(data)(_to_host(x) for x in data)
+    if isinstance(data, dict):
+        return {k: _to_host(v) for k, v in data.items()}
+    return data
@@ -185,6 +185,10 @@ class TestConverterIC15(unittest.TestCase):
         convert("ic15", "det", self.image_dir, self.annot_dir, output_path=None, path_mode="relative")
         self._test_format_det_label()
 
+    def testIC15_ConverterParallel(self):
+        convert("ic15", "det", self.image_dir, self.annot_dir, output_path=None, path_mode="relative", workers=2)
+        self._test_format_det_label()
+
     def _test_format_det_label(self):
         # Convert labels
         output_file = os.path.join(self.test_dir, "det_gt.txt")
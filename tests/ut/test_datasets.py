@@ -4,16 +4,33 @@ from _common import gen_dummpy_data, update_config_for_CI
 
 sys.path.append(".")
 
+import json
+import logging
+import multiprocessing as mp
+import os
 import time
 
+import cv2
+import lmdb
+import numpy as np
 import pytest
 import yaml
+from PIL import Image
 
 import mindspore as ms
 
 import mindocr
 from mindocr.data import build_dataset
+from mindocr.data.bucket_sampler import RecBucketSampler, assign_bucket_widths, pad_to_max_width
+from mindocr.data.det_dataset import DetDataset
+from mindocr.data.rec_dataset import RecDataset
+from mindocr.data.rec_lmdb_dataset import LMDBDataset
+from mindocr.data.sharded_dataset import ShardedDetDataset, ShardSampler
+from mindocr.data.transforms import create_transforms, run_transforms
+from mindocr.data.transforms.det_transforms import BorderMap, ShrinkBinaryMap
 from mindocr.utils.visualize import draw_boxes, recover_image, show_img
+from tools.dataset_converters.det_shards import create_det_shards
+from tools.dataset_converters.utils.lmdb_writer import create_lmdb_dataset
 
 
 @pytest.mark.parametrize("task", ["det", "rec"])
@@ -70,6 +87,331 @@ def test_build_dataset(task, phase, verbose=False, visualize=False):
     print("Avg batch loading time: ", mean)
 
 
+def test_det_dataset_cache(tmp_path):
+    img = np.random.randint(0, 255, (120, 200, 3), dtype=np.uint8)
+    cv2.imwrite(str(tmp_path / "img_1.png"), img)
+    label = [{"transcription": "MASA", "points": [[10, 10], [100, 10], [100, 40], [10, 40]]}]
+    with open(tmp_path / "gt.txt", "w") as f:
+        f.write(f"img_1.png\t{json.dumps(label)}\n")
+
+    def create_dataset(cache=None):
+        pipeline = [
+            {"DecodeImage": {"img_mode": "RGB", "to_float32": False}},
+            {"DetLabelEncode": None},
+            {"DetResize": {"target_size": [128, 224], "keep_ratio": False}},
+            {"NormalizeImage": {"mean": "imagenet", "std": "imagenet", "is_hwc": True}},
+            {"ToCHWImage": None},
+        ]
+        return DetDataset(
+            is_train=False,
+            data_dir=str(tmp_path),
+            label_file=str(tmp_path / "gt.txt"),
+            transform_pipeline=pipeline,
+            output_columns=["image", "polys", "ignore_tags", "shape_list"],
+            cache=cache,
+        )
+
+    ref = create_dataset()[0]
+    cache = {"cache_dir": str(tmp_path / "cache")}
+    for _ in range(2):  # the first run fills the cache, the second one reads from it
+        dataset = create_dataset(cache)
+        assert dataset.cache.num_transforms == 5
+        for ref_item, item in zip(ref, dataset[0]):
+            assert np.array_equal(ref_item, item)
+    assert len(list((tmp_path / "cache").glob("*/*.bin"))) == 1
+
+
+@pytest.mark.parametrize("output_dtype", ["float32", "float16"])
+def test_fused_normalize_to_chw(output_dtype):
+    pipeline = [
+        {"NormalizeImage": {"mean": "imagenet", "std": "imagenet", "is_hwc": True, "bgr_to_rgb": True}},
+        {"ToCHWImage": None},
+    ]
+    unfused = create_transforms(pipeline)  # not fused by default
+    fused = create_transforms(pipeline, fuse={"output_dtype": output_dtype})
+    assert [type(t).__name__ for t in unfused] == ["NormalizeImage", "ToCHWImage"]
+    assert len(fused) == 1 and type(fused[0]).__name__ == "NormalizeToCHWImage"
+
+    img = np.random.randint(0, 255, (37, 53, 3), dtype=np.uint8)
+    ref = run_transforms({"image": img}, unfused)["image"]
+    res = run_transforms({"image": img}, fused)["image"]
+    assert res.dtype == output_dtype and res.flags.c_contiguous
+    np.testing.assert_allclose(res.astype(np.float32), ref, rtol=1e-3, atol=1e-6 if output_dtype == "float32" else 1e-2)
+
+
+def test_reduced_decode(tmp_path):
+    img = np.random.default_rng(0).integers(0, 255, (600, 800, 3), dtype=np.uint8)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated by 90 degrees when decoded
+    Image.fromarray(img).save(tmp_path / "img.jpg", exif=exif)
+    cv2.imwrite(str(tmp_path / "img.png"), img)
+
+    resize = {"DetResize": {"target_size": [320, 224], "keep_ratio": False}}
+    for name, reduced_shape in [("img.jpg", (400, 300)), ("img.png", (600, 800))]:
+        data = {"img_path": str(tmp_path / name)}
+        full = run_transforms(dict(data), create_transforms([{"DecodeImage": {}}, resize]))
+        transforms = create_transforms([{"DecodeImage": {"reduced_decode": [300, 150]}}])
+        reduced = run_transforms(dict(data), transforms)
+        assert reduced["image"].shape[:2] == reduced_shape
+        assert tuple(reduced["raw_img_shape"]) == full["raw_img_shape"]
+        reduced = run_transforms(reduced, create_transforms([resize]))
+        assert reduced["image"].shape == full["image"].shape
+        np.testing.assert_allclose(reduced["shape_list"], full["shape_list"], rtol=1e-6)
+
+
+def test_vectorized_det_targets():
+    polys = [
+        cv2.boxPoints(((60.0, 40.0), (90.0, 20.0), 15.0)),
+        cv2.boxPoints(((150.0, 100.0), (40.0, 12.0), -30.0)),
+        np.array([[5, 90], [40, 70], [80, 70], [110, 90], [110, 115], [80, 95], [40, 95], [5, 115]], np.float32),
+    ]
+
+    def gen_targets(vectorized):
+        data = {
+            "image": np.zeros((128, 192, 3), dtype=np.uint8),
+            "polys": [poly.copy() for poly in polys],
+            "ignore_tags": np.zeros(len(polys), dtype=bool),
+        }
+        data = ShrinkBinaryMap(vectorized=vectorized)(data)
+        return BorderMap(vectorized=vectorized)(data)
+
+    ref, res = gen_targets(False), gen_targets(True)
+    for key in ["binary_map", "mask", "thresh_mask"]:
+        assert np.array_equal(ref[key], res[key])
+    np.testing.assert_allclose(res["thresh_map"], ref["thresh_map"], atol=1e-3)
+
+
+def test_lmdb_dataset_prefetch(tmp_path):
+    num_samples = 20
+    env = lmdb.Environment(str(tmp_path / "lmdb"), map_size=1 << 24)
+    with env.begin(write=True) as txn:
+        for i in range(1, num_samples + 1):
+            img = np.full((8, 16 + i, 3), i, dtype=np.uint8)
+            txn.put(b"image-%09d" % i, cv2.imencode(".png", img)[1].tobytes())
+            txn.put(b"label-%09d" % i, f"label{i}".encode())
+        txn.put(b"num-samples", str(num_samples).encode())
+    env.close()
+
+    dataset = LMDBDataset(
+        is_train=False,
+        data_dir=str(tmp_path),
+        transform_pipeline=[{"DecodeImage": {"img_mode": "BGR", "to_float32": False}}],
+        output_columns=["image", "label"],
+        prefetch_samples=4,
+    )
+    assert dataset.data_idx_order_list.dtype == np.int32
+    # sequential, strided (round-robin dispatch to workers) and random accesses
+    for indices in [range(num_samples), range(1, num_samples, 3), np.random.permutation(num_samples)]:
+        for idx in indices:
+            img, label = dataset[idx]
+            assert label == f"label{idx + 1}" and img.shape == (8, 17 + idx, 3) and np.all(img == idx + 1)
+    assert len(dataset._prefetched) <= 4
+
+    # the environments are reopened in worker processes receiving the pickled dataset
+    with mp.get_context("fork").Pool(2) as pool:
+        assert pool.map(_get_lmdb_label, [(dataset, i) for i in range(4)]) == [f"label{i + 1}" for i in range(4)]
+
+    # and in forked worker processes, where the dataset and its environments are inherited
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=_put_lmdb_labels, args=(dataset, range(i, num_samples, 2), queue)) for i in range(2)]
+    for worker in workers:
+        worker.start()
+    results = [queue.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    assert all(reopened for reopened, _ in results)
+    assert sorted(label for _, labels in results for label in labels) == sorted(f"label{i + 1}" for i in range(20))
+    assert dataset[5][1] == "label6"  # the environments of the parent process are still usable
+
+
+def _get_lmdb_label(args):
+    dataset, idx = args
+    return dataset[idx][1]
+
+
+def _put_lmdb_labels(dataset, indices, queue):
+    parent_env = dataset.lmdb_sets[0]["env"]
+    labels = [dataset[idx][1] for idx in indices]
+    queue.put((dataset.lmdb_sets[0]["env"] is not parent_env and dataset._pid == os.getpid(), labels))
+
+
+def _create_lmdb(path, labels):
+    env = lmdb.Environment(str(path), map_size=1 << 24)
+    with env.begin(write=True) as txn:
+        for i, label in enumerate(labels, 1):
+            img = np.full((8, 16 + i, 3), i, dtype=np.uint8)
+            txn.put(b"image-%09d" % i, cv2.imencode(".png", img)[1].tobytes())
+            txn.put(b"label-%09d" % i, label.encode())
+        txn.put(b"num-samples", str(len(labels)).encode())
+    env.close()
+
+
+def test_lmdb_env_options(tmp_path, caplog):
+    _create_lmdb(tmp_path / "lmdb", ["abc"])
+    kwargs = dict(
+        is_train=False,
+        data_dir=str(tmp_path),
+        transform_pipeline=[{"DecodeImage": {"img_mode": "BGR", "to_float32": False}}],
+        output_columns=["image", "label"],
+    )
+    dataset = LMDBDataset(readahead=False, **kwargs)
+    with caplog.at_level(logging.WARNING):
+        LMDBDataset(readahead=False, **kwargs)
+        assert not caplog.records
+        other = LMDBDataset(readahead=True, **kwargs)
+    # the environment is shared, the options of the second dataset are ignored with a warning
+    assert other.lmdb_sets[0]["env"] is dataset.lmdb_sets[0]["env"]
+    assert "already opened with the options" in caplog.text
+
+
+def test_lmdb_dataset_label_index(tmp_path):
+    labels = ["abc", "aabbccdd", "!!!", "abcdefghijk", "a", "?"]
+    _create_lmdb(tmp_path / "lmdb1", labels[:3])
+    _create_lmdb(tmp_path / "lmdb2", labels[3:])
+
+    def create_dataset():
+        return LMDBDataset(
+            is_train=False,
+            data_dir=str(tmp_path),
+            transform_pipeline=[{"DecodeImage": {"img_mode": "BGR", "to_float32": False}}],
+            output_columns=["label"],
+            filter_max_len=True,
+            extra_count_if_repeat=True,
+            max_text_len=10,
+            filter_zero_text_image=True,
+            bucketing={"image_height": 8, "bucket_widths": [17, 32]},
+            sidecar_index=True,
+            index_num_workers=2,
+        )
+
+    for _ in range(2):  # the first run builds the sidecar index, the second one reads it
+        dataset = create_dataset()
+        assert sorted(dataset[i][0] for i in range(len(dataset))) == ["a", "abc"]
+        assert sorted(dataset.sample_wh_ratios * 8) == [17, 32]
+    assert len(list(tmp_path.glob("*/label_index_*.npz"))) == 2
+    assert len(list(tmp_path.glob("*/image_size_index.npz"))) == 2
+
+
+def test_lmdb_writer_image_sizes(tmp_path):
+    images = [cv2.imencode(".png", np.full((16, 64 >> i, 3), i, dtype=np.uint8))[1].tobytes() for i in range(3)]
+    create_lmdb_dataset(images, ["a", "b", "c"], str(tmp_path / "lmdb"), sort_by_aspect_ratio=True, resize_height=8)
+
+    dataset = LMDBDataset(
+        is_train=False,
+        data_dir=str(tmp_path),
+        transform_pipeline=[{"DecodeImage": {"img_mode": "BGR", "to_float32": False}}],
+        output_columns=["image", "label"],
+        bucketing={"image_height": 8, "bucket_widths": [8, 16, 32]},
+    )
+    assert [dataset[i][1] for i in range(3)] == ["c", "b", "a"]  # sorted by aspect ratio
+    assert [dataset[i][0].shape for i in range(3)] == [(8, 8, 3), (8, 16, 3), (8, 32, 3)]
+    assert dataset.get_image_sizes(dataset.data_idx_order_list).tolist() == [[8, 8], [8, 16], [8, 32]]
+    assert not list(tmp_path.glob("lmdb/image_size_index.npz"))  # read from the LMDB dataset, no scan
+
+
+def test_sharded_det_dataset(tmp_path):
+    (tmp_path / "images").mkdir()
+    with open(tmp_path / "gt.txt", "w") as f:
+        for i in range(5):
+            cv2.imwrite(str(tmp_path / "images" / f"img_{i}.png"), np.full((32, 48 + i, 3), i, dtype=np.uint8))
+            label = [{"transcription": f"text{i}", "points": [[1, 1], [20, 1], [20, 10 + i], [1, 10 + i]]}]
+            f.write(f"img_{i}.png\t{json.dumps(label)}\n")
+    create_det_shards(str(tmp_path / "images"), str(tmp_path / "gt.txt"), str(tmp_path / "shards"), samples_per_shard=2)
+
+    kwargs = dict(
+        is_train=False,
+        transform_pipeline=[{"DecodeImage": {"img_mode": "BGR", "to_float32": False}}, {"DetLabelEncode": None}],
+        output_columns=["image", "polys", "texts"],
+    )
+    ref = DetDataset(data_dir=str(tmp_path / "images"), label_file=str(tmp_path / "gt.txt"), **kwargs)
+    for with_index in [True, False]:
+        if not with_index:
+            (tmp_path / "shards" / "index.json").unlink()
+        dataset = ShardedDetDataset(data_dir=str(tmp_path / "shards"), **kwargs)
+        assert dataset.shard_sizes == [2, 2, 1]
+        for ref_item, item in zip(ref, dataset):
+            assert all(np.array_equal(ref_value, value) for ref_value, value in zip(ref_item, item))
+
+    samplers = [ShardSampler([2, 2, 1], shuffle=True, num_shards=2, shard_id=i, seed=1) for i in range(2)]
+    for _ in range(2):  # epochs
+        indices = [list(sampler) for sampler in samplers]
+        assert len(indices[0]) == len(indices[1]) == len(samplers[0]) == 3
+        assert set(indices[0] + indices[1]) == set(range(5))
+
+
+@pytest.mark.parametrize("drop_remainder", [True, False])
+def test_rec_bucket_sampler(drop_remainder):
+    image_sizes = np.stack([np.full(100, 32), np.random.randint(16, 400, 100)], axis=1)
+    widths = assign_bucket_widths(image_sizes, image_height=32, bucket_widths=[64, 128, 320])
+    assert np.all(widths[image_sizes[:, 1] <= 64] == 64)
+    assert np.all(widths[image_sizes[:, 1] > 128] == 320)
+
+    sampler = RecBucketSampler(
+        widths, batch_size=8, shuffle=True, drop_remainder=drop_remainder, num_shards=2, shard_id=1
+    )
+    indices = list(sampler)
+    assert len(indices) == len(sampler) and len(set(indices)) == len(indices)
+    full_batches = [indices[i : i + 8] for i in range(0, len(indices) - len(indices) % 8, 8)]
+    if drop_remainder:
+        assert all(len(set(widths[batch])) == 1 for batch in full_batches)
+
+    images = [np.ones((3, 32, w), dtype=np.float32) for w in (64, 128)]
+    padded, ratios = pad_to_max_width(images, [1.0, 0.5], None)
+    assert [img.shape[-1] for img in padded] == [128, 128] and ratios == [0.5, 0.5]
+
+
+def test_rec_dataset_cache_bucketing(tmp_path):
+    cv2.imwrite(str(tmp_path / "img_1.png"), np.random.randint(0, 255, (32, 90, 3), dtype=np.uint8))
+    with open(tmp_path / "gt.txt", "w") as f:
+        f.write("img_1.png\tMASA\n")
+
+    def create_dataset(bucket_widths):
+        return RecDataset(
+            is_train=False,
+            data_dir=str(tmp_path),
+            label_file=str(tmp_path / "gt.txt"),
+            transform_pipeline=[
+                {"DecodeImage": {"img_mode": "BGR", "to_float32": False}},
+                {"RecResizeImg": {"image_shape": [32, 100], "padding": True}},
+            ],
+            output_columns=["image"],
+            cache={"cache_dir": str(tmp_path / "cache")},
+            bucketing={"image_height": 32, "bucket_widths": bucket_widths},
+        )
+
+    # the cached images are resized to the width bucket of the sample, which depends on the bucket widths
+    for bucket_widths, width in [([128, 320], 128), ([96, 320], 96), ([128, 320], 128)]:
+        assert create_dataset(bucket_widths)[0][0].shape[1] == width  # HWC
+    assert len(list((tmp_path / "cache").glob("*/*.bin"))) == 2
+
+
+def test_rec_dataset_bucketing_replacement(tmp_path):
+    widths = [90, 100, 250, 300]  # resized to the width buckets 128, 128, 320, 320
+    with open(tmp_path / "gt.txt", "w") as f:
+        for i, width in enumerate(widths):
+            cv2.imwrite(str(tmp_path / f"img_{i}.png"), np.random.randint(0, 255, (32, width, 3), dtype=np.uint8))
+            f.write(f"img_{i}.png\tMASA\n")
+
+    dataset = RecDataset(
+        is_train=False,
+        data_dir=str(tmp_path),
+        label_file=str(tmp_path / "gt.txt"),
+        transform_pipeline=[
+            {"DecodeImage": {"img_mode": "BGR", "to_float32": False}},
+            {"RecResizeImg": {"image_shape": [32, 100], "padding": True}},
+        ],
+        output_columns=["image"],
+        bucketing={"image_height": 32, "bucket_widths": [128, 320]},
+    )
+    os.remove(tmp_path / "img_0.png")  # the sample fails to be decoded and is replaced by a random one
+
+    # the replacement is of the same width as the other samples of the batch
+    for _ in range(10):
+        assert dataset[0][0].shape[1] == 128  # HWC
+
+
 if __name__ == "__main__":
     # test_build_dataset(task='rec', phase='train', visualize=False)
     test_build_dataset(task="det", phase="train", visualize=False)
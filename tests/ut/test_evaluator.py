@@ -0,0 +1,88 @@
+import sys
+
+sys.path.append(".")
+
+import time
+
+import numpy as np
+import pytest
+
+import mindspore as ms
+
+from mindocr.utils.evaluator import Evaluator
+
+
+class StubLoader:
+    """Batches of (image, label), the image filled with the batch index."""
+
+    def __init__(self, num_batches):
+        self.num_batches = num_batches
+
+    def get_dataset_size(self):
+        return self.num_batches
+
+    def create_tuple_iterator(self, num_epochs=-1, output_numpy=False, do_copy=True):
+        for i in range(self.num_batches):
+            yield [ms.Tensor(np.full((2, 3), i, dtype=np.float32)), ms.Tensor(np.array([i, i]), dtype=ms.int32)]
+
+
+class StubNetwork:
+    def set_train(self, mode=True):
+        pass
+
+    def __call__(self, x):
+        return x * 2
+
+
+class StubPostprocess:
+    def __init__(self, fail_batch=None):
+        self.fail_batch = fail_batch
+
+    def __call__(self, preds, **kwargs):
+        batch = int(preds.asnumpy()[0, 0]) // 2
+        if batch == self.fail_batch:
+            raise ValueError(f"postprocessing failed on batch {batch}")
+        time.sleep(0.01 * ((batch * 7) % 3))  # the batches are postprocessed out of order by the workers
+        return {"values": preds.asnumpy().sum()}
+
+
+class StubMetric:
+    metric_names = ["sum"]
+
+    def __init__(self):
+        self.updates = []
+
+    def clear(self):
+        self.updates = []
+
+    def update(self, preds, gt):
+        self.updates.append((preds["values"], gt[0].asnumpy().tolist()))
+
+    def eval(self):
+        return {"sum": sum(values for values, _ in self.updates)}
+
+
+@pytest.mark.parametrize("async_workers", [0, 2])
+def test_evaluator_async(async_workers):
+    metric = StubMetric()
+    evaluator = Evaluator(
+        StubNetwork(), StubLoader(10), postprocessor=StubPostprocess(), metrics=[metric], async_workers=async_workers
+    )
+    res = evaluator.eval()
+
+    # same values in the same order as the sequential evaluation
+    assert metric.updates == [(12.0 * i, [i, i]) for i in range(10)]
+    assert res == {"sum": 12.0 * sum(range(10))}
+
+
+@pytest.mark.parametrize("async_workers", [0, 2])
+def test_evaluator_async_postprocess_error(async_workers):
+    evaluator = Evaluator(
+        StubNetwork(),
+        StubLoader(10),
+        postprocessor=StubPostprocess(fail_batch=3),
+        metrics=[StubMetric()],
+        async_workers=async_workers,
+    )
+    with pytest.raises(ValueError, match="batch 3"):
+        evaluator.eval()
@@ -0,0 +1,112 @@
+import queue
+import sys
+from argparse import Namespace
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+py_infer_path = "deploy/py_infer"
+sys.path.insert(0, py_infer_path)
+
+from src.infer import TaskType
+from src.infer.infer_base import InferBase
+from src.parallel.module.recognition import rec_infer_node
+from src.utils import log
+
+
+class TextRecognizer(InferBase):
+    """Recognizer stub, with a model of batch sizes `model_bs_list` (-1 for dynamic batch size) doubling its input."""
+
+    model_bs_list = (-1,)
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.infer_batches = []
+
+    def _init_preprocess(self):
+        pass
+
+    def _init_model(self):
+        self._bs_list = self.model_bs_list
+
+    def _init_postprocess(self):
+        pass
+
+    def get_params(self):
+        return {}
+
+    def __call__(self):
+        pass
+
+    def preprocess(self):
+        pass
+
+    def model_infer(self, data):
+        self.infer_batches.append(data["net_inputs"][0].shape[0])
+        return [data["net_inputs"][0] * 2]
+
+    def postprocess(self):
+        pass
+
+
+def create_rec_infer_node(monkeypatch, bs_list):
+    monkeypatch.setattr(TextRecognizer, "model_bs_list", bs_list)
+    monkeypatch.setattr(rec_infer_node, "TextRecognizer", TextRecognizer)
+    args = Namespace(
+        task_type=TaskType.DET_REC,
+        node_fetch_interval=0.1,
+        micro_batch_wait_ms=0,
+        micro_batch_max_size=32,
+        cls_batch_num=6,
+        rec_batch_num=6,
+        layout_batch_num=6,
+    )
+    log.init_logger()
+    node = rec_infer_node.RecInferNode(args, queue.Queue())
+    node.input_queue = queue.Queue()
+    node.output_queue = queue.Queue()
+    node.init_self_args()
+    return node
+
+
+def create_items(sizes):
+    # the crops of images, padded to the rec_batch_num of the preprocessing
+    return [
+        SimpleNamespace(skip=False, sub_image_size=size, data={"net_inputs": [np.full((6, 2), i, dtype=np.float32)]})
+        for i, size in enumerate(sizes)
+    ]
+
+
+@pytest.mark.parametrize(
+    "bs_list, infer_batches",
+    [
+        ((-1,), [8]),  # dynamic batch size: one batch of all the crops, without padding
+        ((1, 6), [6, 6]),  # batch size gears: padded to the gears
+    ],
+)
+def test_rec_infer_node_micro_batch(monkeypatch, bs_list, infer_batches):
+    node = create_rec_infer_node(monkeypatch, bs_list)
+    assert node.text_recognizer.dynamic_bs == (bs_list == (-1,))
+
+    sizes = [3, 5]
+    items = create_items(sizes)
+    node.process(items)
+
+    assert node.text_recognizer.infer_batches == infer_batches
+    for i, size in enumerate(sizes):
+        item = node.output_queue.get(block=False)
+        assert item is items[i]
+        np.testing.assert_array_equal(item.data["pred"][0], np.full((size, 2), 2 * i))
+
+
+def test_rec_infer_node_micro_batch_fetch(monkeypatch):
+    node = create_rec_infer_node(monkeypatch, (1, 6))
+    items = create_items([3, 2, 4, 1])
+    for item in items:
+        node.input_queue.put(item)
+
+    # the items already available are taken until the largest gear is filled, the others are left to other instances
+    assert node.fetch() == [items[:3]]
+    assert node.fetch() == [items[3:]]
+    assert node.fetch() == []
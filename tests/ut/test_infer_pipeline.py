@@ -0,0 +1,146 @@
+import gc
+import multiprocessing as mp
+import sys
+import time
+from argparse import Namespace
+from multiprocessing import resource_tracker
+
+import numpy as np
+
+py_infer_path = "deploy/py_infer"
+sys.path.insert(0, py_infer_path)
+
+from src.parallel.datatype import ModuleInitArgs, ProfilingData
+from src.parallel.framework.module_base import ModuleBase
+from src.parallel.framework.shm_queue import SharedMemoryQueue, SharedMemoryRing
+from src.utils import log
+
+
+class EchoNode(ModuleBase):
+    """Node sending its input data to the next node after a short delay."""
+
+    def init_self_args(self):
+        super().init_self_args()
+        return {f"echo_{self.instance_id}": self.instance_id}
+
+    def process(self, input_data):
+        time.sleep(0.05)
+        self.send_to_next_module(input_data)
+
+
+def test_module_start_stop_events():
+    log.init_logger()
+    ctx = mp.get_context("fork")
+    num_nodes, num_items = 2, 8
+    msg_queue, input_queue, output_queue = ctx.Queue(num_nodes), ctx.Queue(), ctx.Queue()
+    start_event, stop_event = ctx.Event(), ctx.Event()
+    module_params = ctx.Manager().dict()
+
+    nodes = []
+    for i in range(num_nodes):
+        node = EchoNode(Namespace(node_fetch_interval=0.05), msg_queue)
+        node.assign_init_args(ModuleInitArgs(pipeline_name="test", module_name="EchoNode", instance_id=i))
+        nodes.append(node)
+    processes = [
+        ctx.Process(
+            target=node.process_handler,
+            args=(start_event, stop_event, module_params, input_queue, output_queue),
+            daemon=True,
+        )
+        for node in nodes
+    ]
+    for process in processes:
+        process.start()
+
+    # each node reports its initialization once its params are available
+    for _ in range(num_nodes):
+        msg_queue.get(timeout=30)
+    assert dict(module_params) == {f"echo_{i}": i for i in range(num_nodes)}
+
+    # no item is processed before the pipeline is started
+    for i in range(num_items):
+        input_queue.put(i)
+    time.sleep(0.2)
+    assert output_queue.empty()
+
+    start_event.set()
+    assert sorted(output_queue.get(timeout=30) for _ in range(num_items)) == list(range(num_items))
+
+    # the nodes exit once the stop event is set
+    stop_event.set()
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+    # the profiling counters written by the node processes are read at shutdown, the items are spread over the nodes
+    fetch_counts = [node.fetch_count.value for node in nodes]
+    assert sum(fetch_counts) == num_items and min(fetch_counts) > 0
+    for node in nodes:
+        node.stop()
+    profiling_data = [msg_queue.get(timeout=30) for _ in range(num_nodes)]
+    assert all(isinstance(data, ProfilingData) and data.process_cost_time > 0 for data in profiling_data)
+
+
+def test_shm_ring_wrap_around():
+    ring = SharedMemoryRing(1024)
+    arrays = [np.full(80, i, dtype=np.float32) for i in range(4)]  # blocks of 64 + 320 bytes
+
+    handles = [ring.write(arrays[0]), ring.write(arrays[1])]
+    assert ring.write(arrays[2]) is None  # the end of the ring is too small, and its beginning is in use
+    ring.read(handles[0])  # the view is released once garbage collected
+    gc.collect()
+
+    # the block is written at the beginning of the ring, the end being padded
+    handles.append(ring.write(arrays[2]))
+    assert handles[2].offset == 0
+    np.testing.assert_array_equal(ring.read(handles[1]), arrays[1])
+    np.testing.assert_array_equal(ring.read(handles[2]), arrays[2])
+    ring.close()
+
+
+def test_shm_queue_ring_full():
+    queue = SharedMemoryQueue(8, slab_size=1024, min_bytes=0)
+    arrays = [np.full(80, i, dtype=np.float32) for i in range(3)]
+    for array in arrays:
+        queue.put({"image": array})
+    received = [queue.get(timeout=10)["image"] for _ in arrays]
+
+    # the arrays are views on the ring, except the one sent through the queue when the ring is full
+    assert [x.flags.owndata for x in received] == [False, False, True]
+    for x, array in zip(received, arrays):
+        np.testing.assert_array_equal(x, array)
+    queue.close()
+
+
+def test_shm_queue_release():
+    queue = SharedMemoryQueue(8, slab_size=1024, min_bytes=0)
+    array = np.arange(80, dtype=np.float32)
+    queue.put(array)
+    queue.put(array)
+    views = [queue.get(timeout=10)[1:] for _ in range(2)]  # the consumer holds views of the received arrays
+
+    # the blocks are not reused while the arrays are held
+    assert queue._ring.write(array) is None
+    del views[0]
+    gc.collect()
+    handle = queue._ring.write(array)
+    assert handle is not None and handle.offset == 0
+    np.testing.assert_array_equal(views[0], array[1:])
+
+    queue.close()  # the ring is unlinked even though arrays are still held
+
+
+def test_shm_ring_attach_untracked(monkeypatch):
+    ring = SharedMemoryRing(1024)
+    tracked = []
+    monkeypatch.setattr(resource_tracker, "register", lambda name, rtype: tracked.append(name))
+    monkeypatch.setattr(resource_tracker, "unregister", lambda name, rtype: tracked.remove(name))
+
+    # a node attaching to the ring does not track the segment, which would be unlinked when the node exits
+    attached = SharedMemoryRing.__new__(SharedMemoryRing)
+    attached.__setstate__(ring.__getstate__())
+    assert not tracked
+    attached.close()
+
+    monkeypatch.undo()
+    ring.close()
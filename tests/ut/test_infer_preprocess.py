@@ -0,0 +1,73 @@
+import sys
+
+sys.path.insert(0, "tools/infer/text")
+
+import threading
+
+import numpy as np
+import pytest
+from preprocess import PrefetchPreprocessor
+
+
+class StubPreprocess:
+    """Preprocessing returning a copy of its input scaled by `max_wh_ratio`, recording the inputs processed."""
+
+    def __init__(self, fail_value=None):
+        self.fail_value = fail_value
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, img, max_wh_ratio=1.0):
+        with self.lock:
+            self.calls.append(float(img[0]))
+        if img[0] == self.fail_value:
+            raise ValueError(f"preprocessing failed on {img[0]}")
+        return {"image": img * max_wh_ratio}
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_prefetch_preprocessor(num_workers):
+    preprocess = StubPreprocess()
+    prefetch = PrefetchPreprocessor(preprocess, num_workers=num_workers, max_prefetch=2)
+    imgs = [np.full(2, i, dtype=np.float32) for i in range(6)]
+    kwargs_list = [{"max_wh_ratio": 2.0}] * 6
+    prefetch.schedule(imgs, kwargs_list)
+
+    for img in imgs:
+        np.testing.assert_array_equal(prefetch(img, max_wh_ratio=2.0)["image"], img * 2)
+    assert sorted(preprocess.calls) == list(range(6))  # each input preprocessed once
+    prefetch.close()
+
+
+def test_prefetch_preprocessor_reused_identity():
+    prefetch = PrefetchPreprocessor(StubPreprocess(), num_workers=2)
+    prefetch.schedule([np.full(2, i, dtype=np.float32) for i in range(4)])  # never consumed, nor referenced outside
+
+    # arrays allocated after the scheduled ones are freed may reuse their identities
+    for i in range(10, 20):
+        img = np.full(2, i, dtype=np.float32)
+        np.testing.assert_array_equal(prefetch(img)["image"], img)
+    prefetch.close()
+
+
+def test_prefetch_preprocessor_error():
+    preprocess = StubPreprocess(fail_value=1)
+    prefetch = PrefetchPreprocessor(preprocess, num_workers=2, max_prefetch=2)
+    imgs = [np.full(2, i, dtype=np.float32) for i in range(6)]
+    prefetch.schedule(imgs)
+
+    try:
+        with pytest.raises(ValueError, match="failed on 1"):
+            for img in imgs:
+                prefetch(img)
+    finally:
+        prefetch.clear()
+
+    # the remaining inputs are dropped and the prefetching slots released
+    assert not prefetch._futures and not prefetch._scheduled
+    new_imgs = [np.full(2, i, dtype=np.float32) for i in range(10, 14)]
+    prefetch.schedule(new_imgs)
+    assert len(prefetch._futures) == 2
+    for img in new_imgs:
+        np.testing.assert_array_equal(prefetch(img)["image"], img)
+    prefetch.close()
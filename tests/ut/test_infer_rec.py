@@ -0,0 +1,70 @@
+import sys
+
+sys.path.insert(0, "tools/infer/text")
+
+import numpy as np
+import pytest
+from predict_rec import TextRecognizer
+from preprocess import PrefetchPreprocessor, Preprocessor
+
+
+class StubModel:
+    """Model returning its input, recording the pixel values and the shape of each batch."""
+
+    def __init__(self):
+        self.batch_values = []
+        self.batch_shapes = []
+
+    def __call__(self, x):
+        x = x.asnumpy()
+        self.batch_values.append(np.rint(x[:, 0, 0, 0] * 127 + 127).astype(int).tolist())
+        self.batch_shapes.append(x.shape)
+        return x
+
+
+class StubPostprocess:
+    """The text of an image is its pixel value, recovered from the normalized image."""
+
+    def __call__(self, pred):
+        values = np.rint(pred[:, 0, 0, 0] * 127 + 127).astype(int)
+        return {"texts": [str(v) for v in values], "confs": [1.0] * len(values)}
+
+
+def create_recognizer(num_workers=0, max_width=None):
+    recognizer = TextRecognizer.__new__(TextRecognizer)  # without building the model
+    recognizer.batch_num = 4
+    recognizer.max_width = max_width
+    recognizer._used_widths = set()
+    recognizer.cast_pred_fp32 = False
+    recognizer.preprocess = PrefetchPreprocessor(
+        Preprocessor(task="rec", algo="CRNN_CH", rec_batch_mode=True, rec_batch_num=4), num_workers=num_workers
+    )  # target height 32, target width 320, padded with the aspect ratio kept
+    recognizer.model = StubModel()
+    recognizer.postprocess = StubPostprocess()
+    return recognizer
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_text_recognizer_batchwise(num_workers):
+    widths = np.random.default_rng(0).integers(20, 600, 10)
+    imgs = [np.full((32, width, 3), 10 + i, dtype=np.uint8) for i, width in enumerate(widths)]
+    recognizer = create_recognizer(num_workers)
+    rec_res = recognizer.run_batchwise(imgs)
+
+    # the images are batched in the order of their aspect ratios, the results are returned in the input order
+    order = np.argsort(widths, kind="stable")
+    assert sum(recognizer.model.batch_values, []) == (10 + order).tolist()
+    assert [text for text, _ in rec_res] == [str(10 + i) for i in range(len(imgs))]
+
+    # each batch is padded to the multiple of the height fitting its widest image, and no narrower than the default
+    expected_widths = [max(-(-widths[order[i : i + 4]].max() // 32) * 32, 320) for i in range(0, len(imgs), 4)]
+    assert [shape[-1] for shape in recognizer.model.batch_shapes] == expected_widths
+
+
+def test_text_recognizer_width_ladder():
+    recognizer = create_recognizer(max_width=480)
+    for width in [100, 400, 900, 330]:
+        recognizer.run_batchwise([np.full((32, width, 3), 10, dtype=np.uint8)])
+
+    # the width of a batch does not depend on the widths used before, it is only capped by the maximum width
+    assert [shape[-1] for shape in recognizer.model.batch_shapes] == [320, 416, 480, 352]
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import queue
+import sys
+import threading
+from argparse import Namespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, "deploy/py_infer/example")
+
+from ocr_http_server import OCRHttpServer
+from ocr_infer_server import OCRServer
+
+from deploy.py_infer.src.infer import TaskType
+
+
+class StubPipeline:
+    """Pipeline answering the tasks once all of them are sent, in reverse order, with the sum of each image."""
+
+    def __init__(self, num_tasks):
+        self.args = Namespace(task_type=TaskType.REC)
+        self.pipeline_manager = Namespace(result_queue=queue.Queue())
+        self.num_tasks = num_tasks
+        self.tasks = []
+        self.stopped = False
+
+    def infer_for_array(self, img, task_id):
+        self.tasks.append((task_id, img))
+        if len(self.tasks) == self.num_tasks:
+            for task_id, img in reversed(self.tasks):
+                self.pipeline_manager.result_queue.put({task_id: {"0": float(np.sum(img))}})
+
+    def infer_for_images(self, img_path, task_id):
+        raise FileNotFoundError(f"no such image: {img_path}")
+
+    def stop_pipeline(self):
+        self.stopped = True
+
+
+def create_server(num_tasks, max_pending_tasks=8):
+    server = OCRServer(Namespace(server_max_pending_tasks=max_pending_tasks))
+    server.parallel_pipeline = StubPipeline(num_tasks)
+    server.dispatcher = threading.Thread(target=server._dispatch_results, daemon=True)
+    server.dispatcher.start()
+    return server
+
+
+def test_ocr_server_ordering():
+    server = create_server(num_tasks=4)
+    futures = [server.submit([np.full((2, 2), i, dtype=np.float32)]) for i in range(4)]
+
+    # results come back in reverse order, each future gets the output of its own task
+    assert [future.result(timeout=5) for future in futures] == [[4.0 * i] for i in range(4)]
+    assert not server.futures
+    server.stop()
+    assert server.parallel_pipeline.stopped
+
+
+def test_ocr_server_async_infer():
+    server = create_server(num_tasks=3)
+
+    async def run():
+        imgs = [[np.full((2, 2), i, dtype=np.float32)] for i in range(3)]
+        return await asyncio.gather(*(server.async_infer(img) for img in imgs))
+
+    assert asyncio.run(run()) == [[0.0], [4.0], [8.0]]
+    server.stop()
+
+
+def test_ocr_server_errors():
+    server = create_server(num_tasks=1, max_pending_tasks=1)
+
+    with pytest.raises(ValueError, match="unknown input data"):
+        server.submit(1)
+    # a failure when sending the images is raised to the caller and releases its slot
+    with pytest.raises(FileNotFoundError):
+        server.submit("missing.jpg")
+    assert not server.futures
+
+    # a failure when producing the output is set on the future
+    server.parallel_pipeline.args.task_type = TaskType.DET_REC
+    future = server.submit([np.ones((2, 2), dtype=np.float32)])
+    with pytest.raises(TypeError):
+        future.result(timeout=5)
+    server.stop()
+
+
+def test_ocr_server_stop():
+    server = create_server(num_tasks=2)
+    future = server.submit([np.ones((2, 2), dtype=np.float32)])  # never answered
+
+    server.stop()
+    assert not server.dispatcher.is_alive()
+    with pytest.raises(RuntimeError, match="stopped before the task was finished"):
+        future.result(timeout=5)
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        (b'{"image_path": "missing.jpg"}', 200),
+        (b'{"image_path": "missing.jpg"', 400),
+        (b'{"image": "missing.jpg"}', 400),
+        (b'["missing.jpg"]', 400),
+        (b'{"image_path": 1}', 400),
+        (b"\xff", 400),
+    ],
+)
+def test_ocr_http_server_json_body(body, status):
+    class StubServer:
+        async def async_infer(self, img):
+            return {img: []}
+
+    http_server = OCRHttpServer(StubServer(), "127.0.0.1", 0)
+    request_line = ["POST", "/ocr", "HTTP/1.1"]
+    headers = {"content-type": "application/json"}
+
+    code, payload = asyncio.run(http_server.route(request_line, headers, body))
+    assert code == status
+    assert ("result" if status == 200 else "error") in payload
+    json.dumps(payload)
@@ -0,0 +1,82 @@
+import sys
+
+sys.path.insert(0, "tools/infer/text")
+
+import numpy as np
+import pytest
+from predict_system import TextSystem
+
+
+class StubDetector:
+    """Detector returning the boxes drawn by `create_images`, found by the pixel value at their top-left corner."""
+
+    def __init__(self, boxes_per_image):
+        self.boxes_per_image = boxes_per_image
+
+    def __call__(self, img, do_visualize=False):
+        polys = np.array(self.boxes_per_image[int(img[0, 0, 0])], dtype=np.float32).reshape(-1, 4, 2)
+        return {"polys": polys}, {"image_ori": img}
+
+
+class StubRecognizer:
+    """The text of a crop is its pixel value, with a low confidence for the odd values, recording the batch sizes."""
+
+    def __init__(self, batch_num):
+        self.batch_num = batch_num
+        self.batch_sizes = []
+
+    def __call__(self, crops, do_visualize=False):
+        self.batch_sizes.append(len(crops))
+        values = [int(crop[crop.shape[0] // 2, crop.shape[1] // 2, 0]) for crop in crops]
+        return [(str(v), 0.2 if v % 2 else 0.9) for v in values]
+
+
+def create_images(num_images, rng):
+    """Images filled with their index, with text boxes of various sizes filled with distinct values."""
+    imgs, boxes_per_image = [], []
+    for i in range(num_images):
+        img = np.full((200, 400, 3), i, dtype=np.uint8)
+        boxes = []
+        for j in range(int(rng.integers(0, 6))):
+            x, width, height = int(rng.integers(10, 200)), int(rng.integers(20, 180)), 16
+            y = 10 + 30 * j
+            img[y : y + height, x : x + width] = 10 * (i + 1) + j
+            boxes.append([[x, y], [x + width, y], [x + width, y + height], [x, y + height]])
+        imgs.append(img)
+        boxes_per_image.append(boxes)
+    return imgs, boxes_per_image
+
+
+def create_text_system(boxes_per_image, batch_num):
+    text_system = TextSystem.__new__(TextSystem)  # without building the models
+    text_system.text_detect = StubDetector(boxes_per_image)
+    text_system.text_recognize = StubRecognizer(batch_num)
+    text_system.cls_algorithm = None
+    text_system.box_type = "quad"
+    text_system.drop_score = 0.5
+    text_system.save_crop_res = False
+    return text_system
+
+
+@pytest.mark.parametrize("batch_num", [1, 4, 7])
+def test_text_system_stream(batch_num):
+    imgs, boxes_per_image = create_images(12, np.random.default_rng(batch_num))
+    text_system = create_text_system(boxes_per_image, batch_num)
+
+    ref = [text_system(img, do_visualize=False) for img in imgs]
+    text_system.text_recognize.batch_sizes.clear()
+    res = list(text_system.stream(iter(imgs), do_visualize=False))
+
+    # the crops of consecutive images fill the recognition batches, only the last one may be partial
+    batch_sizes = text_system.text_recognize.batch_sizes
+    assert all(size % batch_num == 0 for size in batch_sizes[:-1])
+    assert sum(batch_sizes) == sum(len(boxes) for boxes in boxes_per_image)
+
+    # the results of each image are the same as the per-image path, in the input order
+    assert len(res) == len(imgs)
+    for img, (ref_boxes, ref_texts, _), (res_img, res_boxes, res_texts, time_profile) in zip(imgs, ref, res):
+        assert res_img is img
+        assert ref_texts == res_texts
+        assert all(np.array_equal(ref_box, res_box) for ref_box, res_box in zip(ref_boxes, res_boxes))
+        assert len(ref_boxes) == len(res_boxes)
+        assert {"det", "crop", "rec", "all"} <= time_profile.keys()
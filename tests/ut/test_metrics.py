@@ -5,6 +5,8 @@ import numpy as np
 import pytest
 import yaml
 from addict import Dict
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
 
 import mindspore as ms
 
@@ -63,6 +65,31 @@ def test_det_metric():
     assert perf["f-score"] == 0.5
 
 
+def test_det_metric_batched():
+    rng = np.random.default_rng(0)
+    gt_polys = np.zeros((2, 60, 4, 2), dtype=np.float32)
+    pred_polys = np.zeros((2, 70, 4, 2), dtype=np.float32)
+    for i in range(2):
+        for j in range(60):
+            center = rng.uniform(0, 320, 2).astype(np.float32)
+            gt_polys[i, j] = center + np.array([[-20, -6], [20, -6], [20, 6], [-20, 6]], np.float32) * rng.uniform(
+                0.5, 2
+            )
+        pred_polys[i, :60] = gt_polys[i] + rng.normal(0, 3, (60, 4, 2))
+        pred_polys[i, 60:] = rng.uniform(0, 320, (10, 4, 2))  # random, often concave or self-intersecting
+        pred_polys[i, :5] = gt_polys[i, :5]
+        pred_polys[i, :5, 2:] = (gt_polys[i, :5][:, [1, 0]] + gt_polys[i, :5][:, [2, 3]]) / 2  # IoU of exactly 0.5
+    ignore_tags = ms.Tensor(rng.uniform(size=(2, 60)) < 0.1)
+    gts = (ms.Tensor(gt_polys), ignore_tags)
+
+    ref, res = DetMetric(), DetMetric(batched=True, num_workers=2)
+    ref.update({"polys": pred_polys}, gts)
+    res.update({"polys": pred_polys}, gts)
+    assert ref._gt_labels == res._gt_labels
+    assert ref._det_labels == res._det_labels
+    assert ref.eval() == res.eval()
+
+
 def test_rec_metric():
     gt = ["ba la la!    ", "ba       "]
     gt_len = [len("ba xla la!"), len("ba")]
@@ -78,6 +105,72 @@ def test_rec_metric():
     assert (perf["norm_edit_distance"] - 0.92857) < 1e-4
 
 
+def create_rec_batches(num_batches, batch_size, rng):
+    chars = list("abcdefgh ")
+
+    def texts():
+        return ["".join(rng.choice(chars, rng.integers(0, 12))) for _ in range(batch_size)]
+
+    batches = []
+    for _ in range(num_batches):
+        gt_texts = texts()
+        pred_texts = [gt if rng.uniform() < 0.3 else pred for gt, pred in zip(gt_texts, texts())]
+        batches.append((pred_texts, gt_texts))
+    return batches
+
+
+def rec_metric_reference(batches):
+    preds = [pred.replace(" ", "") for pred_texts, _ in batches for pred in pred_texts]
+    gts = [gt.replace(" ", "") for _, gt_texts in batches for gt in gt_texts]
+    dists = [Levenshtein.normalized_distance(pred, gt) for pred, gt in zip(preds, gts)]
+    return np.mean([pred == gt for pred, gt in zip(preds, gts)]), 1 - np.mean(dists)
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+@pytest.mark.parametrize("cpdist", [True, False])
+def test_rec_metric_accumulation(num_workers, cpdist, monkeypatch):
+    if not cpdist:  # rapidfuzz<3.6
+        monkeypatch.delattr(process, "cpdist", raising=False)
+    batches = create_rec_batches(5, 16, np.random.default_rng(0))
+    acc, norm_edit_distance = rec_metric_reference(batches)
+
+    m = RecMetric(num_workers=num_workers)
+    for pred_texts, gt_texts in batches:  # accumulated on the host over the batches
+        m.update({"texts": pred_texts}, (gt_texts, [len(gt) for gt in gt_texts]))
+    perf = m.eval()
+    assert perf["acc"] == pytest.approx(acc)
+    assert perf["norm_edit_distance"] == pytest.approx(norm_edit_distance)
+
+    m.clear()
+    with pytest.raises(RuntimeError):
+        m.eval()
+
+
+def test_rec_metric_all_reduce():
+    class StubAllReduce:
+        """Sum over 2 devices evaluating the same data."""
+
+        def __init__(self):
+            self.num_calls = 0
+
+        def __call__(self, x):
+            self.num_calls += 1
+            return x * 2
+
+    batches = create_rec_batches(3, 8, np.random.default_rng(1))
+    acc, norm_edit_distance = rec_metric_reference(batches)
+
+    m = RecMetric()
+    m.all_reduce = StubAllReduce()
+    for pred_texts, gt_texts in batches:
+        m.update({"texts": pred_texts}, (gt_texts, [len(gt) for gt in gt_texts]))
+    assert m.all_reduce.num_calls == 0  # reduced once, in eval
+    perf = m.eval()
+    assert m.all_reduce.num_calls == 3
+    assert perf["acc"] == pytest.approx(acc)
+    assert perf["norm_edit_distance"] == pytest.approx(norm_edit_distance, rel=1e-6)
+
+
 if __name__ == "__main__":
     test_det_metric()
     # test_rec_metric()
@@ -1,11 +1,19 @@
 import sys
+import types
 
 sys.path.append(".")
+sys.path.insert(0, "tools/benchmarking")
+import cv2
+import numpy as np
 import pytest
 import yaml
 from addict import Dict
+from pse_postprocess_benchmark import gen_pse_pred, generate_box_per_label
 
 from mindocr.postprocess import build_postprocess
+from mindocr.postprocess.det_db_postprocess import DBPostprocess
+from mindocr.postprocess.det_fce_postprocess import fourier2poly, poly_nms, poly_nms_indices
+from mindocr.postprocess.det_pse_postprocess import PSEPostprocess
 
 
 @pytest.mark.parametrize("task", ["det", "rec"])
@@ -20,3 +28,59 @@ def test_build_postprocess(task):
     cfg = Dict(cfg)
 
     build_postprocess(cfg.postprocess)
+
+
+@pytest.mark.parametrize("box_type", ["quad", "poly"])
+def test_db_postprocess_batched(box_type):
+    rng = np.random.default_rng(0)
+    pred = np.zeros((2, 1, 320, 320), dtype=np.float32)
+    for prob_map in pred:
+        for _ in range(40):
+            center = (float(rng.uniform(0, 320)), float(rng.uniform(0, 320)))
+            size = (float(rng.uniform(10, 80)), float(rng.uniform(4, 20)))
+            box = cv2.boxPoints((center, size, float(rng.uniform(-30, 30)))).astype(np.int32)
+            cv2.fillPoly(prob_map[0], [box], float(rng.uniform(0.5, 1.0)))
+
+    ref = DBPostprocess(box_type=box_type, rescale_fields=None)(pred)
+    postprocess = DBPostprocess(box_type=box_type, rescale_fields=None, batched=True, num_workers=2)
+    pool = postprocess._pool
+    postprocess(pred)
+    res = postprocess(pred)
+    assert postprocess._pool is pool and not pool._shutdown  # the threads are reused by the batches
+
+    for ref_polys, res_polys, ref_scores, res_scores in zip(ref["polys"], res["polys"], ref["scores"], res["scores"]):
+        assert len(ref_polys) == len(res_polys) > 0
+        for ref_poly, res_poly in zip(ref_polys, res_polys):
+            assert np.allclose(np.asarray(ref_poly, np.float64), np.asarray(res_poly, np.float64))
+        assert np.allclose(ref_scores, res_scores)
+
+
+def test_fce_poly_nms_indices():
+    rng = np.random.default_rng(0)
+    coeff = np.zeros((60, 11), dtype=np.complex128)
+    coeff[:, 5] = rng.uniform(0, 100, 60) + rng.uniform(0, 100, 60) * 1j  # centers
+    coeff[:, 6] = rng.uniform(10, 40, 60) + rng.uniform(2, 10, 60) * 1j
+    coeff[:, 4] = rng.uniform(-5, 5, 60)  # curvature
+    polygons = fourier2poly(coeff, 50)
+    scores = rng.choice([0.5, 0.7, 0.9], 60)  # with ties
+
+    ref = poly_nms(np.hstack((polygons, scores.reshape(-1, 1))).tolist(), 0.1)
+    keep = poly_nms_indices(polygons, scores, 0.1)
+    assert 1 < len(keep) < 60
+    assert np.array_equal(np.array(ref), np.hstack((polygons[keep], scores[keep].reshape(-1, 1))))
+
+
+def test_pse_generate_box(monkeypatch):
+    # the box generation does not need the compiled PSE expansion
+    monkeypatch.setitem(sys.modules, "mindocr.postprocess.pse", types.SimpleNamespace(pse=None))
+    postprocess = PSEPostprocess(binary_thresh=0, box_thresh=0.85, min_area=16, box_type="quad", scale=1)
+    pred = gen_pse_pred(2, 320, 320, 40, np.random.default_rng(0))
+
+    for sample in pred:
+        score = 1 / (1 + np.exp(-sample[0]))
+        _, label = cv2.connectedComponents((sample[0] > 0).astype(np.uint8), connectivity=4)
+        ref_boxes, ref_scores = generate_box_per_label(postprocess, score, label)
+        boxes, scores = postprocess._generate_box(score, label)
+        assert len(ref_boxes) == len(boxes) > 0
+        assert all(np.array_equal(ref_box, box) for ref_box, box in zip(ref_boxes, boxes))
+        np.testing.assert_allclose(ref_scores, scores, rtol=1e-5)
@@ -0,0 +1,96 @@
+"""A script to benchmark the batched engine of DBPostprocess against the default per-contour path.
+
+Synthetic dense-text probability maps are generated, so no dataset or checkpoint is needed. The script checks that
+both paths return the same boxes and scores (box for box) and reports the average latency per batch.
+
+USAGE:
+    ```
+        python tools/benchmarking/db_postprocess_benchmark.py --batch_size 8 --num_boxes 600 --num_workers 8
+    ```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import cv2
+import numpy as np
+
+from mindocr.postprocess.det_db_postprocess import DBPostprocess
+
+
+def gen_dense_text_maps(batch_size, height, width, num_boxes, seed=0):
+    """Generate DBNet-like probability maps of shape (N, 1, H, W) with many small, randomly rotated text regions."""
+    rng = np.random.default_rng(seed)
+    maps = np.zeros((batch_size, 1, height, width), dtype=np.float32)
+    for prob_map in maps:
+        for _ in range(num_boxes):
+            center = (float(rng.uniform(0, width)), float(rng.uniform(0, height)))
+            size = (float(rng.uniform(10, 120)), float(rng.uniform(4, 24)))
+            angle = float(rng.uniform(-30, 30))
+            box = cv2.boxPoints((center, size, angle)).astype(np.int32)
+            cv2.fillPoly(prob_map[0], [box], float(rng.uniform(0.5, 1.0)))
+        prob_map[0] = cv2.GaussianBlur(prob_map[0], (5, 5), 0)
+    return maps
+
+
+def check_parity(ref, res):
+    for ref_polys, res_polys, ref_scores, res_scores in zip(ref["polys"], res["polys"], ref["scores"], res["scores"]):
+        assert len(ref_polys) == len(res_polys), f"Number of boxes differs: {len(ref_polys)} vs {len(res_polys)}"
+        for ref_poly, res_poly in zip(ref_polys, res_polys):
+            np.testing.assert_allclose(np.asarray(ref_poly, np.float64), np.asarray(res_poly, np.float64), atol=1e-3)
+        np.testing.assert_allclose(np.asarray(ref_scores), np.asarray(res_scores), rtol=1e-5)
+
+
+def timeit(postprocess, pred, shape_list, repeats):
+    result = postprocess(pred, shape_list=shape_list)  # warmup
+    start = time.perf_counter()
+    for _ in range(repeats):
+        postprocess(pred, shape_list=shape_list)
+    return result, (time.perf_counter() - start) / repeats
+
+
+def main(args):
+    pred = gen_dense_text_maps(args.batch_size, args.height, args.width, args.num_boxes, seed=args.seed)
+    shape_list = np.array([[args.height, args.width, 1.0, 1.0]] * args.batch_size, dtype=np.float32)
+    common = dict(box_type=args.box_type)
+    engines = {
+        "default": DBPostprocess(**common),
+        "batched": DBPostprocess(batched=True, **common),
+        f"batched + {args.num_workers} workers": DBPostprocess(batched=True, num_workers=args.num_workers, **common),
+    }
+
+    ref, ref_time = None, None
+    for name, postprocess in engines.items():
+        result, latency = timeit(postprocess, pred, shape_list, args.repeats)
+        if ref is None:
+            ref, ref_time = result, latency
+        else:
+            check_parity(ref, result)
+        num_boxes = sum(len(polys) for polys in result["polys"])
+        print(
+            f"{name:>24}: {latency * 1000:9.2f} ms/batch, speedup {ref_time / latency:5.2f}x, "
+            f"{num_boxes} boxes in total"
+        )
+    print("Parity check passed: all engines return identical boxes and scores.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DBPostprocess benchmark", add_help=True)
+    parser.add_argument("--batch_size", type=int, default=8, help="Number of images per batch.")
+    parser.add_argument("--height", type=int, default=1152, help="Height of the probability maps.")
+    parser.add_argument("--width", type=int, default=896, help="Width of the probability maps.")
+    parser.add_argument("--num_boxes", type=int, default=600, help="Number of text regions drawn per image.")
+    parser.add_argument("--box_type", type=str, default="quad", choices=["quad", "poly"], help="Output box type.")
+    parser.add_argument("--num_workers", type=int, default=8, help="Number of threads of the batched engine.")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of timed runs per engine.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data generator.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,91 @@
+"""A script to benchmark the batched matching engine of DetMetric against the default pairwise shapely path.
+
+Synthetic dense-text samples are generated, so no dataset or model is needed: rotated ground truth boxes (some of them
+ignored), and detections made of jittered ground truth boxes, false positives, concave, self-intersecting and 8-point
+polygons. The script checks that both engines return the same labels and reports the latency per sample.
+
+USAGE:
+    ```
+        python tools/benchmarking/det_metric_benchmark.py --num_samples 16 --num_boxes 300
+    ```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import cv2
+import numpy as np
+
+from mindocr.metrics.det_metrics import DetectionIoUEvaluator
+
+
+def gen_sample(num_boxes, height, width, rng):
+    """Generate the ground truth (list of dict) and the detections (list of polygons) of a dense-text image."""
+    boxes = []
+    for _ in range(num_boxes):
+        center = (float(rng.uniform(0, width)), float(rng.uniform(0, height)))
+        size = (float(rng.uniform(10, 120)), float(rng.uniform(6, 24)))
+        boxes.append(cv2.boxPoints((center, size, float(rng.choice([0, rng.uniform(-30, 30)])))))
+    gt = [{"polys": box, "ignore": bool(rng.uniform() < 0.1)} for box in boxes]
+
+    preds = []
+    for box in boxes:
+        kind = rng.uniform()
+        if kind < 0.7:  # true positive candidate
+            preds.append(box + rng.normal(0, 2, box.shape).astype(np.float32))
+        elif kind < 0.75:  # half of the box: IoU of 0.5, exactly for the axis-aligned boxes
+            half = box.copy()
+            half[2:] = (box[[1, 0]] + box[[2, 3]]) / 2
+            preds.append(half)
+        elif kind < 0.8:  # concave
+            preds.append(np.array([box[0], box[1], box.mean(axis=0), box[2], box[3]]))
+        elif kind < 0.85:  # self-intersecting (invalid)
+            preds.append(box[[0, 2, 1, 3]])
+        elif kind < 0.9:  # 8-point polygon, with the middles of the edges
+            preds.append(np.stack([box, (box + np.roll(box, -1, axis=0)) / 2], axis=1).reshape(-1, 2))
+    for _ in range(num_boxes // 5):  # false positives
+        center = (float(rng.uniform(0, width)), float(rng.uniform(0, height)))
+        preds.append(cv2.boxPoints((center, (float(rng.uniform(10, 60)), 10.0), float(rng.uniform(-30, 30)))))
+    order = rng.permutation(len(preds))
+    return gt, [preds[i] for i in order]
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    samples = [gen_sample(args.num_boxes, args.height, args.width, rng) for _ in range(args.num_samples)]
+    pairwise = DetectionIoUEvaluator()
+    batched = DetectionIoUEvaluator(batched=True)
+
+    start = time.perf_counter()
+    ref = [pairwise(gt, preds) for gt, preds in samples]
+    ref_time = (time.perf_counter() - start) / args.num_samples
+    start = time.perf_counter()
+    res = [batched(gt, preds) for gt, preds in samples]
+    res_time = (time.perf_counter() - start) / args.num_samples
+    assert ref == res, "the labels of the batched engine differ from the pairwise ones"
+
+    print(
+        f"pairwise {ref_time * 1000:8.2f} ms/sample, batched {res_time * 1000:8.2f} ms/sample, "
+        f"speedup {ref_time / res_time:5.2f}x"
+    )
+    num_gt = sum(len(gt_labels) for gt_labels, _ in res)
+    print(f"Parity check passed: {num_gt} labels in {args.num_samples} samples.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DetMetric matching benchmark", add_help=True)
+    parser.add_argument("--num_samples", type=int, default=16, help="Number of synthetic samples.")
+    parser.add_argument("--height", type=int, default=1280, help="Height of the images.")
+    parser.add_argument("--width", type=int, default=960, help="Width of the images.")
+    parser.add_argument("--num_boxes", type=int, default=300, help="Number of ground truth boxes per sample.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data generator.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,109 @@
+"""A script to benchmark the DBNet target generation (ShrinkBinaryMap and BorderMap) engines.
+
+Synthetic dense-text samples (many small rotated boxes and a few curved polygons) are generated, so no dataset is
+needed. The script checks that the vectorized engine returns the same maps as the default one and reports the
+average latency per sample of each engine. The experimental `fast` BorderMap is timed as well, its maximum deviation
+from the default maps is reported but not checked.
+
+USAGE:
+    ```
+        python tools/benchmarking/det_targets_benchmark.py --num_samples 10 --num_boxes 300
+    ```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import cv2
+import numpy as np
+
+from mindocr.data.transforms.det_transforms import BorderMap, ShrinkBinaryMap
+
+
+def gen_dense_text_sample(height, width, num_boxes, num_curved, rng):
+    """Generate a detection sample with `num_boxes` rotated quadrilaterals and `num_curved` 14-vertex polygons."""
+    polys = []
+    for _ in range(num_boxes):
+        center = (float(rng.uniform(0, width)), float(rng.uniform(0, height)))
+        size = (float(rng.uniform(12, 160)), float(rng.uniform(8, 40)))
+        polys.append(cv2.boxPoints((center, size, float(rng.uniform(-30, 30)))))
+    for _ in range(num_curved):
+        x0, y0 = rng.uniform(0, width * 0.7), rng.uniform(0, height * 0.8)
+        length, thickness, bend = rng.uniform(100, width * 0.3), rng.uniform(15, 40), rng.uniform(-40, 40)
+        xs = x0 + np.linspace(0, length, 7)
+        ys = y0 + bend * np.sin(np.linspace(0, np.pi, 7))
+        polys.append(np.concatenate([np.stack([xs, ys], 1), np.stack([xs, ys + thickness], 1)[::-1]]))
+
+    return {
+        "image": np.zeros((height, width, 3), dtype=np.uint8),
+        "polys": [poly.astype(np.float32) for poly in polys],
+        "ignore_tags": np.zeros(len(polys), dtype=bool),
+    }
+
+
+def run(transforms, samples):
+    results, elapsed = [], 0.0
+    for sample in samples:
+        data = {k: v.copy() if isinstance(v, np.ndarray) else list(v) for k, v in sample.items()}
+        start = time.perf_counter()
+        for transform in transforms:
+            data = transform(data)
+        elapsed += time.perf_counter() - start
+        results.append(data)
+    return results, elapsed / len(samples)
+
+
+def max_diff(ref, res, key):
+    return max(np.abs(ref_data[key] - res_data[key]).max() for ref_data, res_data in zip(ref, res))
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    samples = [
+        gen_dense_text_sample(args.height, args.width, args.num_boxes, args.num_curved, rng)
+        for _ in range(args.num_samples)
+    ]
+    engines = {
+        "default": [ShrinkBinaryMap(), BorderMap()],
+        "vectorized": [ShrinkBinaryMap(vectorized=True), BorderMap(vectorized=True)],
+        "fast (experimental)": [ShrinkBinaryMap(vectorized=True), BorderMap(fast=True)],
+    }
+
+    ref, ref_time = None, None
+    for name, transforms in engines.items():
+        result, latency = run(transforms, samples)
+        if ref is None:
+            ref, ref_time = result, latency
+            deviation = ""
+        else:
+            for key in ["binary_map", "mask", "thresh_mask"]:
+                assert max_diff(ref, result, key) == 0, f"{key} differs from the default engine"
+            thresh_diff = max_diff(ref, result, "thresh_map")
+            if name == "vectorized":
+                assert thresh_diff <= args.atol, f"thresh_map differs from the default engine by {thresh_diff}"
+            deviation = f", max thresh_map deviation {thresh_diff:.2e}"
+        print(f"{name:>20}: {latency * 1000:9.2f} ms/sample, speedup {ref_time / latency:5.2f}x{deviation}")
+    print("Parity check passed: the vectorized engine returns the same maps as the default one.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DBNet target generation benchmark", add_help=True)
+    parser.add_argument("--num_samples", type=int, default=10, help="Number of synthetic samples.")
+    parser.add_argument("--height", type=int, default=640, help="Height of the samples.")
+    parser.add_argument("--width", type=int, default=640, help="Width of the samples.")
+    parser.add_argument("--num_boxes", type=int, default=300, help="Number of rotated boxes per sample.")
+    parser.add_argument("--num_curved", type=int, default=10, help="Number of curved polygons per sample.")
+    parser.add_argument(
+        "--atol", type=float, default=1e-2, help="Tolerance of the threshold map deviation of the vectorized engine."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data generator.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
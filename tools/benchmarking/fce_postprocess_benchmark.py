@@ -0,0 +1,118 @@
+"""A script to benchmark the batched FCENet decoding against the per-contour one.
+
+Synthetic FCENet predictions (curved text regions of 3 scales with their Fourier coefficients) are generated, so no
+model or dataset is needed. The script reports, per image, the latency of:
+    - the polygon nms of the candidates of the largest text region, with `poly_nms` and `poly_nms_indices`,
+    - the whole postprocessing, with `FCEPostprocess(batched=False)` and `FCEPostprocess(batched=True)`.
+It checks that both decodings return the same polygons and scores.
+
+USAGE:
+    ```
+        python tools/benchmarking/fce_postprocess_benchmark.py --num_images 4 --num_boxes 30
+    ```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import cv2
+import numpy as np
+
+from mindocr.postprocess.det_fce_postprocess import FCEPostprocess, fourier2poly, poly_nms, poly_nms_indices
+
+
+def gen_fce_pred(height, width, scale, num_boxes, fourier_degree, rng):
+    """Generate the FCENet output of one scale, shaped [1, 4 + 2 * (2k + 1), height / scale, width / scale]."""
+    h, w = height // scale, width // scale
+    cls_pred = np.zeros((4, h, w), dtype=np.float32)
+    reg_pred = rng.normal(0, 0.05, (2, 2 * fourier_degree + 1, h, w)).astype(np.float32)
+    for _ in range(num_boxes):
+        # an elliptic arc of text, in the coordinates of the feature map
+        center = rng.uniform(0, [w, h])
+        radius = rng.uniform(20, 120, size=2) / scale
+        coeff = np.zeros((1, 2 * fourier_degree + 1), dtype=np.complex128)
+        coeff[0, fourier_degree] = center[0] + center[1] * 1j
+        coeff[0, fourier_degree + 1] = radius[0] + 0.2 * radius[1] * 1j
+        coeff[0, fourier_degree - 1] = rng.uniform(-0.3, 0.3) * radius[0]
+        contour = fourier2poly(coeff, 50).reshape(-1, 1, 2)
+        region = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillPoly(region, [contour], 1)
+        ys, xs = np.nonzero(region)
+        cls_pred[1, ys, xs] = rng.uniform(0.6, 1.0, len(ys))
+        cls_pred[3, ys, xs] = rng.uniform(0.6, 1.0, len(ys))
+        offsets = coeff[0] - (xs + ys * 1j)[:, None] * (np.arange(2 * fourier_degree + 1) == fourier_degree)
+        reg_pred[0, :, ys, xs] += offsets.real
+        reg_pred[1, :, ys, xs] += offsets.imag
+    cls_pred[0], cls_pred[2] = 1 - cls_pred[1], 1 - cls_pred[3]
+    return np.concatenate([cls_pred, reg_pred.reshape(-1, h, w)])[None]
+
+
+def timeit(func, *args, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    scales = [8, 16, 32]
+    preds = [
+        [gen_fce_pred(args.height, args.width, scale, args.num_boxes, 5, rng) for scale in scales]
+        for _ in range(args.num_images)
+    ]
+    postprocess = FCEPostprocess(scales, alpha=1.2, beta=1.0, box_type="poly")
+    batched = FCEPostprocess(scales, alpha=1.2, beta=1.0, box_type="poly", batched=True)
+    shape_list = np.array([[args.height, args.width, 1.0, 1.0]], dtype=np.float32)
+
+    nms_times, times, num_polys = [0.0, 0.0], [0.0, 0.0], 0
+    for pred in preds:
+        # candidates of the largest text region of the first scale, as decoded before the nms
+        score = pred[0][0, 1] ** 1.2 * pred[0][0, 3]
+        num_labels, labels = cv2.connectedComponents((score > 0.3).astype(np.uint8))
+        ys, xs = np.nonzero(labels == np.argmax(np.bincount(labels.ravel())[1:]) + 1)
+        reg = pred[0][0, 4:].transpose(1, 2, 0)[ys, xs]
+        c = reg[:, :11] + reg[:, 11:] * 1j
+        c[:, 5] += xs + ys * 1j
+        polygons, scores = fourier2poly(c * scales[0], 50), score[ys, xs]
+        ref, ref_time = timeit(poly_nms, np.hstack((polygons, scores.reshape(-1, 1))).tolist(), 0.1)
+        res, res_time = timeit(poly_nms_indices, polygons, scores, 0.1)
+        assert np.array_equal(np.array(ref)[:, :-1], polygons[res]), "the nms differs from poly_nms"
+        nms_times[0] += ref_time
+        nms_times[1] += res_time
+
+        ref, ref_time = timeit(postprocess, pred, shape_list)
+        res, res_time = timeit(batched, pred, shape_list)
+        assert len(ref["polys"][0]) == len(res["polys"][0]), "the number of polygons differs"
+        assert all(np.array_equal(r, b) for r, b in zip(ref["polys"][0], res["polys"][0])), "the polygons differ"
+        assert ref["scores"][0] == res["scores"][0], "the scores differ"
+        times[0] += ref_time
+        times[1] += res_time
+        num_polys += len(res["polys"][0])
+
+    for name, (ref_time, res_time) in {"region nms": nms_times, "postprocessing": times}.items():
+        ref_time, res_time = ref_time / args.num_images, res_time / args.num_images
+        print(
+            f"{name:>14}: per-contour {ref_time * 1000:9.2f} ms/image, batched {res_time * 1000:9.2f} ms/image, "
+            f"speedup {ref_time / res_time:6.2f}x"
+        )
+    print(f"Parity check passed: {num_polys} polygons in {args.num_images} images.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="FCENet postprocessing benchmark", add_help=True)
+    parser.add_argument("--num_images", type=int, default=4, help="Number of synthetic images.")
+    parser.add_argument("--height", type=int, default=736, help="Height of the images.")
+    parser.add_argument("--width", type=int, default=1280, help="Width of the images.")
+    parser.add_argument("--num_boxes", type=int, default=30, help="Number of text regions per scale and image.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data generator.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
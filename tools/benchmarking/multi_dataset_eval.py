@@ -33,16 +33,40 @@ YAML CONFIGURATION:
 USAGE:
     Please run the following command:
     ```
-        python tools/benchmarking/multi_dataset_eval.py --config configs/rec/crnn/crnn_resnet34.yaml
+        python tools/benchmarking/multi_dataset_eval.py --config configs/rec/crnn/crnn_resnet34.yaml \
+            --num_parallel 4 --report_dir ./benchmark_results
     ```
 
     You can then get the performance of each individual dataset as well as the average score under evaluation/.
+
+    The datasets are evaluated `--num_parallel` at a time, each with its own data loader and metric. They share the
+    loaded network, which runs one batch at a time, so that the loading, postprocessing and metric computation of a
+    dataset overlap with the network of the others.
+
+REPORT:
+    Besides the metrics, the following measures are recorded for each dataset and written to
+    `{report_dir}/{model_name}.json` and `{report_dir}/{model_name}.csv` (one row per dataset and a row for the
+    average), to track the performance from one release to the next:
+        - throughput: number of images evaluated per second.
+        - latency_p50_ms, latency_p95_ms: median and 95th percentile of the time of a batch (loading, network,
+          postprocessing and metric).
+        - device_time_s: time spent in the network until its outputs are computed.
+        - network_wait_s: time spent waiting for the network used by the other datasets.
+        - host_time_s: the rest of the evaluation time (data loading, postprocessing and metric).
+    The waiting time depends on the datasets evaluated at the same time, so it is not averaged, nor is the host time.
+    The peak resident memory of the process, `peak_rss_mb`, is shared by all the datasets and only reported in the
+    total.
 """
 
 import copy
+import csv
+import json
 import logging
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 __dir__ = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
@@ -51,8 +75,20 @@ import argparse
 
 from tools.arg_parser import parse_args_and_config
 
-args, config = parse_args_and_config()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-dataset benchmark", add_help=False)
+    parser.add_argument("--num_parallel", type=int, default=1, help="Number of datasets evaluated at the same time.")
+    parser.add_argument(
+        "--report_dir", type=str, default="./benchmark_results", help="Directory of the JSON and CSV reports."
+    )
+    return parser.parse_known_args()
+
+
+bench_args, remaining_args = parse_args()
+args, config = parse_args_and_config(remaining_args)
+
+import numpy as np
 from addict import Dict
 
 import mindspore as ms
@@ -68,6 +104,53 @@ from mindocr.utils.logger import set_logger
 logger = logging.getLogger("mindocr")
 
 
+class TimedNetwork:
+    """
+    Wrapper of a network shared by several evaluators: the network runs one batch at a time, and the time until its
+    outputs are computed, as well as the time spent waiting for the other evaluators, is recorded for each batch.
+    """
+
+    def __init__(self, network, lock):
+        self.network = network
+        self.lock = lock
+        self.device_times = []
+        self.wait_times = []
+
+    def set_train(self, mode=True):
+        pass  # the shared network stays in evaluation mode, whatever the evaluators of the other datasets do
+
+    def __call__(self, *inputs):
+        wait_start = time.perf_counter()
+        with self.lock:
+            start = time.perf_counter()
+            self.wait_times.append(start - wait_start)
+            preds = self.network(*inputs)
+            for pred in preds if isinstance(preds, (list, tuple)) else [preds]:
+                if isinstance(pred, ms.Tensor):
+                    pred.asnumpy()  # wait for the outputs
+            self.device_times.append(time.perf_counter() - start)
+        return preds
+
+
+def timed_iterator(iterator, step_times, num_images, input_index=0):
+    """Records the time of each batch, from its loading to the request of the next batch, and the number of images."""
+    last = time.perf_counter()
+    for data in iterator:
+        num_images.append(data[input_index].shape[0])
+        yield data
+        now = time.perf_counter()
+        step_times.append(now - last)
+        last = now
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
 def main(cfg):
     # env init
     ms.set_context(mode=cfg.system.mode)
@@ -116,19 +199,16 @@ def main(cfg):
     if not cfg.system.amp_level_infer and cfg.system.amp_level != "O0":
         logger.info("Evaluation will run in full-precision(fp32)")
 
-    # postprocess, metric
+    # postprocess, shared by the datasets
     postprocessor = build_postprocess(cfg.postprocess)
-    # postprocess network prediction
-    metric = build_metric(cfg.metric)
 
     if cfg.eval.dataset["dataset_root"]:
         data_dir_root = os.path.join(cfg.eval.dataset["dataset_root"], cfg.eval.dataset["data_dir"])
     else:
         data_dir_root = cfg.eval.dataset["data_dir"]
-
-    results = []
-    acc_summary = {}
-    reload_data = False
+    data_dirs = [dirpath for dirpath, dirnames, _ in os.walk(os.path.abspath(data_dir_root)) if not dirnames]
+    if len(data_dirs) == 0:
+        raise ValueError(f"Cannot find any dataset under `{data_dir_root}`. Please check the data path is correct.")
 
     info_seg = "=" * 40
     model_name = (
@@ -143,14 +223,21 @@ def main(cfg):
         f"Total number of parameters: {num_params}\n"
         f"Total number of trainable parameters: {num_trainable_params}\n"
         f"AMP level: {amp_level}\n"
+        f"Number of datasets: {len(data_dirs)}, evaluated {bench_args.num_parallel} at a time\n"
         f"{info_seg}\n"
         f"\nStart evaluating..."
     )
 
-    for dirpath, dirnames, _ in os.walk(os.path.abspath(data_dir_root)):
-        if not dirnames:
-            dataset_config = copy.deepcopy(cfg.eval.dataset)
-            dataset_config["data_dir"] = os.path.abspath(dirpath)
+    network_lock = threading.Lock()
+    # MindSpore releases the dataset iterators created while the size of a dataset is computed, including the ones of
+    # the other threads, so the loaders and their iterators are created one at a time
+    setup_lock = threading.Lock()
+
+    def eval_dataset(dirpath):
+        dataset_config = copy.deepcopy(cfg.eval.dataset)
+        dataset_config["data_dir"] = os.path.abspath(dirpath)
+        timed_network = TimedNetwork(network, network_lock)
+        with setup_lock:
             # dataloader
             # load dataset
             loader_eval = build_dataset(
@@ -161,73 +248,91 @@ def main(cfg):
                 is_train=False,
                 refine_batch_size=cfg.system.get("refine_batch_size", True),
             )
-
             num_batches = loader_eval.get_dataset_size()
 
-            if not reload_data:
-                net_evaluator = Evaluator(
-                    network,
-                    loader_eval,
-                    loss_func=None,
-                    postprocessor=postprocessor,
-                    metrics=[metric],
-                    input_indices=dataset_config.get("net_input_column_index", None),
-                    label_indices=dataset_config.get("label_column_index", None),
-                    meta_data_indices=dataset_config.get("meta_data_column_index", None),
-                    num_epochs=1,
-                )
-                reload_data = True
-
-            else:
-                net_evaluator.reload(
-                    loader_eval,
-                    input_indices=dataset_config.get("net_input_column_index", None),
-                    label_indices=dataset_config.get("label_column_index", None),
-                    meta_data_indices=dataset_config.get("meta_data_column_index", None),
-                    num_epochs=1,
-                )
-
-            # log
-            logger.info("=" * 40)
-            logger.info(f"Num batches: {num_batches}")
-            if "name" in cfg.model:
-                logger.info(f"Model: {cfg.model.name}")
-            else:
-                logger.info(f"Model: {cfg.model.backbone.name}-{cfg.model.neck.name}-{cfg.model.head.name}")
-            logger.info("=" * 40)
-
-            measures = net_evaluator.eval()
-            if is_main_device:
-                logger.info(f"Performance: {measures}")
-
-            results.append(measures)
-            acc_summary[dirpath] = measures
-
-    if len(results) == 0:
-        raise ValueError(f"Cannot find any dataset under `{data_dir_root}`. Please check the data path is correct.")
+            net_evaluator = Evaluator(
+                timed_network,
+                loader_eval,
+                loss_func=None,
+                postprocessor=postprocessor,
+                metrics=[build_metric(copy.deepcopy(cfg.metric))],
+                input_indices=dataset_config.get("net_input_column_index", None),
+                label_indices=dataset_config.get("label_column_index", None),
+                meta_data_indices=dataset_config.get("meta_data_column_index", None),
+                num_epochs=1,
+                async_workers=cfg.eval.get("async_workers", 0),
+            )
+        step_times, num_images = [], []
+        input_index = (dataset_config.get("net_input_column_index", None) or [0])[0]
+        net_evaluator.iterator = timed_iterator(net_evaluator.iterator, step_times, num_images, input_index)
+
+        logger.info(f"Dataset: {dirpath}, num batches: {num_batches}")
+        start = time.perf_counter()
+        measures = net_evaluator.eval()
+        wall_time = time.perf_counter() - start
+        if is_main_device:
+            logger.info(f"Dataset: {dirpath}, performance: {measures}")
+
+        device_time = sum(timed_network.device_times)
+        wait_time = sum(timed_network.wait_times)
+        p50, p95 = np.percentile(step_times, [50, 95]) * 1000 if step_times else (0.0, 0.0)
+        perf = {
+            "num_images": sum(num_images),
+            "num_batches": len(step_times),
+            "throughput": sum(num_images) / wall_time,
+            "latency_p50_ms": float(p50),
+            "latency_p95_ms": float(p95),
+            "wall_time_s": wall_time,
+            "device_time_s": device_time,
+            "network_wait_s": wait_time,
+            "host_time_s": wall_time - device_time - wait_time,
+        }
+        return {"dataset": dirpath, **{k: float(v) for k, v in measures.items()}, **perf}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(bench_args.num_parallel, 1)) as executor:
+        results = list(executor.map(eval_dataset, data_dirs))
+    total_time = time.perf_counter() - start
+    network.set_train(True)
 
     # average
-    metric_keys = results[0].keys()
-    avg_dict = {}
-    for metric_k in metric_keys:
-        score = [res[metric_k] for res in results]
-        avgscore = sum(score) / len(score)
-        avg_dict[metric_k] = avgscore
+    not_averaged = ("dataset", "num_images", "num_batches", "network_wait_s", "host_time_s")
+    avg_keys = [k for k in results[0].keys() if k not in not_averaged]
+    avg_dict = {k: sum(res[k] for res in results) / len(results) for k in avg_keys}
+    total_images = sum(res["num_images"] for res in results)
 
+    acc_summary = {res["dataset"]: res for res in results}
     acc_summary["Average"] = avg_dict
-
-    logger.info(f"Average score: {avg_dict}")
+    logger.info(f"Average: {avg_dict}")
     logger.info(f"Summary: {acc_summary}")
-
-
-def parse_args():
-    parser = argparse.ArgumentParser(description="Evaluation Config", add_help=False)
-    parser.add_argument(
-        "-c", "--config", required=True, help="YAML config file specifying default arguments (default=" ")"
-    )
-    args = parser.parse_args()
-
-    return args
+    logger.info(f"Total: {total_images} images in {total_time:.2f} s, {total_images / total_time:.2f} img/s")
+
+    if is_main_device:
+        report = {
+            "model": model_name,
+            "config": args.config,
+            "amp_level": amp_level,
+            "device_target": ms.get_context("device_target"),
+            "num_parallel": bench_args.num_parallel,
+            "datasets": results,
+            "average": avg_dict,
+            "total": {
+                "num_images": total_images,
+                "wall_time_s": total_time,
+                "throughput": total_images / total_time,
+                "peak_rss_mb": peak_rss_mb(),
+            },
+        }
+        os.makedirs(bench_args.report_dir, exist_ok=True)
+        report_path = os.path.join(bench_args.report_dir, model_name)
+        with open(f"{report_path}.json", "w") as f:
+            json.dump(report, f, indent=4)
+        with open(f"{report_path}.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+            writer.writerow({"dataset": "Average", **avg_dict})
+        logger.info(f"Benchmark report saved to {report_path}.json and {report_path}.csv")
 
 
 if __name__ == "__main__":
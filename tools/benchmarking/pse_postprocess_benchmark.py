@@ -0,0 +1,149 @@
+"""A script to benchmark the PSENet postprocessing against the previous per-label implementation.
+
+Synthetic PSENet predictions (7 kernels of many rotated text boxes) are generated, so no model or dataset is needed.
+The script reports, per image, the latency of:
+    - the removal of the small kernels, with one full-image mask per label (previous) and with the component
+      statistics (current),
+    - the box generation, with one full-image mask per label (previous) and with the per-label statistics and one sort
+      of the label map (current),
+    - the whole postprocessing of a batch, sequentially and with `--num_workers` threads.
+It checks that the current implementation returns the same boxes and scores as the previous one.
+
+USAGE:
+    ```
+        python tools/benchmarking/pse_postprocess_benchmark.py --batch_size 8 --num_boxes 200 --num_workers 4
+    ```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import cv2
+import numpy as np
+
+from mindocr.postprocess.det_pse_postprocess import PSEPostprocess
+
+
+def gen_pse_pred(batch_size, height, width, num_boxes, rng, num_kernels=7, min_kernel_ratio=0.4):
+    """Generate PSENet logits of shape [batch_size, num_kernels, height / 4, width / 4], kernel 0 being the text."""
+    pred = np.full((batch_size, num_kernels, height // 4, width // 4), -5.0, dtype=np.float32)
+    for sample in pred:
+        for _ in range(num_boxes):
+            center = (float(rng.uniform(0, width // 4)), float(rng.uniform(0, height // 4)))
+            size = np.array([rng.uniform(4, 40), rng.uniform(2, 10)])
+            angle = float(rng.uniform(-30, 30))
+            for k, ratio in enumerate(np.linspace(1.0, min_kernel_ratio, num_kernels)):
+                box = cv2.boxPoints((center, tuple(size * ratio), angle))
+                cv2.fillPoly(sample[k], [np.round(box).astype(np.int32)], float(rng.uniform(1, 5)))
+    return pred + rng.normal(0, 0.5, pred.shape).astype(np.float32)
+
+
+def remove_small_kernels_per_label(kernel, min_area):
+    """Previous implementation: one full-image mask per label."""
+    label_num, label = cv2.connectedComponents(kernel, connectivity=4)
+    for label_idx in range(1, label_num):
+        if np.sum(label == label_idx) < min_area:
+            label[label == label_idx] = 0
+    return label
+
+
+def remove_small_kernels(kernel, min_area):
+    """Current implementation: areas of all components from connectedComponentsWithStats."""
+    _, label, stats, _ = cv2.connectedComponentsWithStats(kernel, connectivity=4)
+    small = stats[:, cv2.CC_STAT_AREA] < min_area
+    small[0] = False
+    label[small[label]] = 0
+    return label
+
+
+def generate_box_per_label(postprocess, score, label):
+    """Previous implementation of `PSEPostprocess._generate_box` (quad boxes)."""
+    boxes, scores = [], []
+    for i in range(1, np.max(label) + 1):
+        ind = label == i
+        points = np.array(np.where(ind)).transpose((1, 0))[:, ::-1]
+        if points.shape[0] < postprocess._min_area:
+            continue
+        score_i = np.mean(score[ind])
+        if score_i < postprocess._box_thresh:
+            continue
+        boxes.append(cv2.boxPoints(cv2.minAreaRect(points.astype(np.int32))))
+        scores.append(score_i)
+    return boxes, scores
+
+
+def timeit(func, *args, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    pred = gen_pse_pred(args.batch_size, args.height, args.width, args.num_boxes, rng)
+    postprocess = PSEPostprocess(binary_thresh=0, box_thresh=0.85, min_area=16, box_type="quad", scale=1)
+    parallel = PSEPostprocess(
+        binary_thresh=0, box_thresh=0.85, min_area=16, box_type="quad", scale=1, num_workers=args.num_workers
+    )
+
+    # inputs of the stages, as computed by the postprocessing
+    resized = np.stack([cv2.resize(p.transpose(1, 2, 0), (args.width, args.height)) for p in pred]).transpose(
+        0, 3, 1, 2
+    )
+    scores = 1 / (1 + np.exp(-resized[:, 0]))
+    kernels = (resized > 0).astype(np.uint8) * (resized[:, :1] > 0).astype(np.uint8)
+    labels = [postprocess._pse(k, postprocess._min_area) for k in kernels]
+
+    stages = {"small kernels removal": [0.0, 0.0], "box generation": [0.0, 0.0]}
+    for kernel, score, label in zip(kernels, scores, labels):
+        ref, ref_time = timeit(remove_small_kernels_per_label, kernel[-1], postprocess._min_area)
+        res, res_time = timeit(remove_small_kernels, kernel[-1], postprocess._min_area)
+        assert np.array_equal(ref, res), "the small kernels removal differs from the previous implementation"
+        stages["small kernels removal"][0] += ref_time
+        stages["small kernels removal"][1] += res_time
+
+        ref, ref_time = timeit(generate_box_per_label, postprocess, score, label)
+        res, res_time = timeit(postprocess._generate_box, score, label.copy())
+        assert len(ref[0]) == len(res[0]), "the number of boxes differs from the previous implementation"
+        assert all(np.array_equal(r, b) for r, b in zip(ref[0], res[0])), "the boxes differ"
+        np.testing.assert_allclose(ref[1], res[1], rtol=1e-5, err_msg="the scores differ")
+        stages["box generation"][0] += ref_time
+        stages["box generation"][1] += res_time
+
+    for name, (ref_time, res_time) in stages.items():
+        ref_time, res_time = ref_time / args.batch_size, res_time / args.batch_size
+        print(
+            f"{name:>22}: previous {ref_time * 1000:8.2f} ms/image, current {res_time * 1000:8.2f} ms/image, "
+            f"speedup {ref_time / res_time:5.2f}x"
+        )
+
+    shape_list = np.tile(np.array([args.height, args.width, 1.0, 1.0], dtype=np.float32), (args.batch_size, 1))
+    ref, ref_time = timeit(postprocess, pred, shape_list)
+    res, res_time = timeit(parallel, pred, shape_list)
+    assert all(np.array_equal(r, b) for rs, bs in zip(ref["polys"], res["polys"]) for r, b in zip(rs, bs))
+    print(
+        f"{'batch postprocessing':>22}: 1 thread {ref_time * 1000:8.2f} ms/batch, {args.num_workers} threads "
+        f"{res_time * 1000:8.2f} ms/batch, speedup {ref_time / res_time:5.2f}x"
+    )
+    print(f"Parity check passed: {sum(len(p) for p in res['polys'])} boxes in {args.batch_size} images.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PSENet postprocessing benchmark", add_help=True)
+    parser.add_argument("--batch_size", type=int, default=8, help="Number of synthetic images.")
+    parser.add_argument("--height", type=int, default=736, help="Height of the images.")
+    parser.add_argument("--width", type=int, default=1280, help="Width of the images.")
+    parser.add_argument("--num_boxes", type=int, default=200, help="Number of text boxes per image.")
+    parser.add_argument("--num_workers", type=int, default=4, help="Number of threads of the batch postprocessing.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data generator.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
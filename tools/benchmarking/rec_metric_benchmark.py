@@ -0,0 +1,117 @@
+"""A script to benchmark RecMetric against its previous per-sample implementation.
+
+Synthetic recognition results are generated from a character dictionary (by default the 6623 characters of
+`ch_dict.txt`), with typos and out-of-dictionary characters, so no dataset or model is needed. The previous
+implementation filtered the characters with a list lookup, computed the edit distances one by one and accumulated them
+into MindSpore tensors one sample at a time. The script checks that both return the same metrics and reports the
+throughput.
+
+USAGE:
+    ```
+        python tools/benchmarking/rec_metric_benchmark.py --num_samples 100000 --batch_size 256 --num_workers 4
+    ```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+
+import mindspore as ms
+
+from mindocr.metrics.rec_metrics import RecMetric
+
+
+def gen_texts(num_samples, chars, rng, ood_chars="$#@!《》"):
+    """Generate (predictions, ground truth texts) with ~60% of exact predictions."""
+    preds, labels = [], []
+    for _ in range(num_samples):
+        label = "".join(rng.choice(chars, rng.integers(1, 25)))
+        pred = label
+        if rng.uniform() < 0.4:  # typos
+            pred = list(pred)
+            for pos in rng.integers(0, len(pred), rng.integers(1, 4)):
+                pred[pos] = rng.choice(chars)
+            pred = "".join(pred)
+        if rng.uniform() < 0.1:  # out-of-dictionary characters in the ground truth
+            label = label + rng.choice(list(ood_chars)) + " "
+        preds.append(pred)
+        labels.append(label)
+    return preds, labels
+
+
+def previous_update(metric, preds, labels, state):
+    """Previous implementation of `RecMetric.update`, with the accumulators in `state`."""
+    for pred, label in zip(preds, labels):
+        pred = pred.replace(" ", "").lower()
+        label = label.replace(" ", "").lower()
+        label = "".join([c for c in label if c in metric.dict])
+        state["norm_edit_dis"] += Levenshtein.normalized_distance(pred, label)
+        if pred == label:
+            state["correct_num"] += 1
+        state["total_num"] += 1
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    metric = RecMetric(character_dict_path=args.character_dict_path, num_workers=args.num_workers)
+    preds, labels = gen_texts(args.num_samples, np.array(metric.dict), rng)
+    batches = [
+        (preds[i : i + args.batch_size], labels[i : i + args.batch_size])
+        for i in range(0, args.num_samples, args.batch_size)
+    ]
+
+    state = {
+        "correct_num": ms.Tensor(0, dtype=ms.int32),
+        "total_num": ms.Tensor(0, dtype=ms.float32),
+        "norm_edit_dis": ms.Tensor(0.0, dtype=ms.float32),
+    }
+    start = time.perf_counter()
+    for batch_preds, batch_labels in batches:
+        previous_update(metric, batch_preds, batch_labels, state)
+    ref = {
+        "acc": float((state["correct_num"] / state["total_num"]).asnumpy()),
+        "norm_edit_distance": float((1 - state["norm_edit_dis"] / state["total_num"]).asnumpy()),
+    }
+    ref_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for batch_preds, batch_labels in batches:
+        metric.update({"texts": batch_preds}, (batch_labels, [len(label) for label in batch_labels]))
+    res = metric.eval()
+    res_time = time.perf_counter() - start
+
+    assert int(state["correct_num"].asnumpy()) == metric._correct_num, "the number of correct samples differs"
+    # the previous implementation accumulated and divided in float32
+    assert abs(ref["acc"] - res["acc"]) < 1e-6, "the accuracy differs from the previous implementation"
+    assert abs(ref["norm_edit_distance"] - res["norm_edit_distance"]) < 1e-4, "the edit distance differs"
+    print(f"previous: {ref}, current: {res}")
+    print(
+        f"previous {args.num_samples / ref_time:10.0f} samples/s, current {args.num_samples / res_time:10.0f} "
+        f"samples/s ({args.num_workers} workers), speedup {ref_time / res_time:6.2f}x"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="RecMetric benchmark", add_help=True)
+    parser.add_argument("--num_samples", type=int, default=100000, help="Number of synthetic samples.")
+    parser.add_argument("--batch_size", type=int, default=256, help="Number of samples per metric update.")
+    parser.add_argument(
+        "--character_dict_path",
+        type=str,
+        default=os.path.join(__dir__, "../../mindocr/utils/dict/ch_dict.txt"),
+        help="Character dictionary of the texts.",
+    )
+    parser.add_argument("--num_workers", type=int, default=1, help="Number of threads of the edit distances.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data generator.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,78 @@
+"""A script to benchmark the fused NormalizeToCHWImage transform against NormalizeImage followed by ToCHWImage.
+
+Synthetic uint8 images of detection and recognition input sizes are generated, so no dataset is needed. For each size,
+the script checks that the fused and unfused paths return the same image and reports the average latency per sample
+of every transform of both paths.
+
+USAGE:
+    ```
+        python tools/benchmarking/transforms_benchmark.py --repeats 50 --output_dtype float32
+    ```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import numpy as np
+
+from mindocr.data.transforms import create_transforms
+
+PIPELINE = [
+    {"NormalizeImage": {"bgr_to_rgb": True, "is_hwc": True, "mean": "imagenet", "std": "imagenet"}},
+    {"ToCHWImage": None},
+]
+SIZES = {"det": (736, 1280), "det_large": (1280, 1280), "rec": (48, 320), "rec_small": (32, 100)}
+
+
+def timeit(transform, img, repeats):
+    result = transform({"image": img.copy()})["image"]  # warmup
+    elapsed = 0.0
+    for _ in range(repeats):
+        data = {"image": img.copy()}
+        start = time.perf_counter()
+        transform(data)
+        elapsed += time.perf_counter() - start
+    return result, elapsed / repeats
+
+
+def main(args):
+    unfused = create_transforms(PIPELINE)
+    fused = create_transforms(PIPELINE, fuse={"output_dtype": args.output_dtype})
+    rng = np.random.default_rng(args.seed)
+
+    for name, (height, width) in SIZES.items():
+        img = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        ref, ref_time = img, 0.0
+        timings = []
+        for transform in unfused:
+            ref, latency = timeit(transform, ref, args.repeats)
+            ref_time += latency
+            timings.append(f"{type(transform).__name__} {latency * 1000:.3f} ms")
+        res, res_time = timeit(fused[0], img, args.repeats)
+
+        atol = 1e-5 if args.output_dtype == "float32" else 1e-2
+        np.testing.assert_allclose(res.astype(np.float32), ref, rtol=1e-3, atol=atol)
+        print(
+            f"{name:>10} {height}x{width}: unfused {ref_time * 1000:8.3f} ms ({', '.join(timings)}), "
+            f"fused {res_time * 1000:8.3f} ms, speedup {ref_time / res_time:5.2f}x"
+        )
+    print("Parity check passed: fused and unfused transforms return the same image.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fused transforms benchmark", add_help=True)
+    parser.add_argument(
+        "--output_dtype", type=str, default="float32", choices=["float32", "float16"], help="Output dtype of fused op."
+    )
+    parser.add_argument("--repeats", type=int, default=50, help="Number of timed runs per transform.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data generator.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
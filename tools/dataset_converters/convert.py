@@ -138,6 +138,25 @@ if __name__ == "__main__":
         help="If abs, the image path in the output annotation file will be an absolute path. If relative, "
         "it will be a relative path related to the image dir ",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of processes converting the annotations (and reading the images) in parallel. Supported by the "
+        "ic15, mtwi2018, textocr, pubtabnet, synthtext (default: 8) and synthadd converters. Default: 1.",
+    )
+    parser.add_argument(
+        "--sort_by_aspect_ratio",
+        action="store_true",
+        help="For the rec_lmdb task, write the samples by increasing aspect ratio (width / height).",
+    )
+    parser.add_argument(
+        "--resize_height",
+        type=int,
+        default=None,
+        help="For the rec_lmdb task, store the images resized to this height (the input height of the recognition "
+        "model) with their aspect ratio kept, instead of the original images.",
+    )
     parser.add_argument(
         "--split",
         type=str,
@@ -0,0 +1,84 @@
+"""
+Script to pack a text detection dataset (images and a converted `det_gt.txt` label file) into tar shards, which are
+read by `ShardedDetDataset`.
+
+Each sample is stored as two members named after the image file: the image `{name}.{ext}` and its annotation
+`{name}.json`. The offsets of the members are listed in `index.json`, next to the shards.
+
+Example:
+>>> python tools/dataset_converters/det_shards.py \
+        --image_dir /path/to/ic15/det/train/ch4_training_images \
+        --label_file /path/to/ic15/det/train/det_gt.txt \
+        --output_dir /path/to/ic15/det/train_shards \
+        --samples_per_shard 1000
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tarfile
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+from tqdm import tqdm
+
+from mindocr.data.sharded_dataset import SHARD_INDEX_FILE, index_tar_shard
+
+
+def _add_member(tar: tarfile.TarFile, name: str, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _read_label_file(label_file):
+    with open(label_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            img_name, annot_str = line.split("\t") if "\t" in line else line.split(" ", 1)
+            yield img_name, annot_str
+
+
+def create_det_shards(image_dir, label_file, output_dir, samples_per_shard=1000, shard_prefix="shard"):
+    """Pack the images of `image_dir` and their annotations in `label_file` into tar shards in `output_dir`."""
+    os.makedirs(output_dir, exist_ok=True)
+    samples = list(_read_label_file(label_file))
+    keys = [os.path.splitext(img_name)[0] for img_name, _ in samples]
+    if len(set(keys)) != len(keys):
+        raise ValueError(f"Image names without extension must be unique in {label_file}.")
+
+    shards = []
+    for shard_id, start in enumerate(tqdm(range(0, len(samples), samples_per_shard), desc="Creating shards")):
+        shard_name = f"{shard_prefix}-{shard_id:06d}.tar"
+        shard_path = os.path.join(output_dir, shard_name)
+        with tarfile.open(shard_path + ".tmp", "w", format=tarfile.PAX_FORMAT) as tar:
+            for (img_name, annot_str), key in zip(samples[start : start + samples_per_shard], keys[start:]):
+                with open(os.path.join(image_dir, img_name), "rb") as f:
+                    _add_member(tar, img_name, f.read())
+                _add_member(tar, key + ".json", annot_str.encode("utf-8"))
+        os.replace(shard_path + ".tmp", shard_path)
+        shards.append({"path": shard_name, "samples": index_tar_shard(shard_path)})
+
+    with open(os.path.join(output_dir, SHARD_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump({"shards": shards}, f)
+    print(f"Created {len(shards)} shards with {len(samples)} samples in {output_dir}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack a text detection dataset into tar shards")
+    parser.add_argument("-i", "--image_dir", type=str, required=True, help="Directory of the images of the dataset.")
+    parser.add_argument(
+        "-l", "--label_file", type=str, required=True, help="Converted label file of the dataset (e.g. det_gt.txt)."
+    )
+    parser.add_argument("-o", "--output_dir", type=str, required=True, help="Directory to save the shards.")
+    parser.add_argument("--samples_per_shard", type=int, default=1000, help="Number of samples in each shard.")
+    parser.add_argument("--shard_prefix", type=str, default="shard", help="Prefix of the shard file names.")
+
+    args = parser.parse_args()
+    create_det_shards(**vars(args))
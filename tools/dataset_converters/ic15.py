@@ -5,6 +5,7 @@ import os
 from shapely.geometry import Polygon
 
 from mindocr.data.utils.polygon_utils import sort_clockwise
+from tools.dataset_converters.utils.parallel import parallel_map, write_lines
 
 
 class IC15_Converter(object):
@@ -24,6 +25,8 @@ class IC15_Converter(object):
 
     def __init__(self, path_mode="relative", **kwargs):
         self.path_mode = path_mode
+        self._image_dir = None
+        self._workers = kwargs.get("workers") or 1
 
     def convert(self, task="det", image_dir=None, label_path=None, output_path=None):
         self.label_path = label_path
@@ -36,31 +39,34 @@ class IC15_Converter(object):
 
     def _format_det_label(self, image_dir, label_dir, output_path):
         label_paths = sorted(glob.glob(os.path.join(label_dir, "*.txt")))
+        self._image_dir = image_dir
         with open(output_path, "w", encoding="utf-8") as out_file:
-            for label_fp in label_paths:
-                label_file_name = os.path.basename(label_fp)
-                img_path = os.path.join(image_dir, label_file_name[3:-4] + ".jpg")
-                assert os.path.exists(
-                    img_path
-                ), f"{img_path} not exist! Please check the input image_dir {image_dir} and names in {label_fp}"
+            write_lines(out_file, parallel_map(self._format_det_line, label_paths, workers=self._workers))
 
-                label = []
-                if self.path_mode == "relative":
-                    img_path = os.path.basename(img_path)
-                with open(label_fp, "r", encoding="utf-8-sig") as f:
-                    for line in f.readlines():
-                        line = line.strip("\n\r").replace("\xef\xbb\xbf", "").split(",", 8)
+    def _format_det_line(self, label_fp):
+        label_file_name = os.path.basename(label_fp)
+        img_path = os.path.join(self._image_dir, label_file_name[3:-4] + ".jpg")
+        assert os.path.exists(
+            img_path
+        ), f"{img_path} not exist! Please check the input image_dir {self._image_dir} and names in {label_fp}"
 
-                        points = [[int(line[i]), int(line[i + 1])] for i in range(0, 8, 2)]  # reshape points (4, 2)
-                        # sort points and validate
-                        points = sort_clockwise(points).tolist()
-                        if not Polygon(points).is_valid:
-                            print(f"Warning {img_path.name}: skipping invalid polygon {points}")
-                            continue
+        label = []
+        if self.path_mode == "relative":
+            img_path = os.path.basename(img_path)
+        with open(label_fp, "r", encoding="utf-8-sig") as f:
+            for line in f.readlines():
+                line = line.strip("\n\r").replace("\xef\xbb\xbf", "").split(",", 8)
 
-                        label.append({"transcription": line[8], "points": points})
+                points = [[int(line[i]), int(line[i + 1])] for i in range(0, 8, 2)]  # reshape points (4, 2)
+                # sort points and validate
+                points = sort_clockwise(points).tolist()
+                if not Polygon(points).is_valid:
+                    print(f"Warning {img_path.name}: skipping invalid polygon {points}")
+                    continue
 
-                out_file.write(img_path + "\t" + json.dumps(label, ensure_ascii=False) + "\n")
+                label.append({"transcription": line[8], "points": points})
+
+        return img_path + "\t" + json.dumps(label, ensure_ascii=False) + "\n"
 
     def _format_rec_label(self, label_path, output_path):
         with open(output_path, "w") as outf:
@@ -3,9 +3,9 @@ import json
 import os
 
 import cv2
-from tqdm import tqdm
 
 from mindocr.data.utils.polygon_utils import sort_clockwise
+from tools.dataset_converters.utils.parallel import parallel_map, write_lines
 
 
 class MTWI2018_Converter(object):
@@ -25,6 +25,8 @@ class MTWI2018_Converter(object):
 
     def __init__(self, path_mode="relative", **kwargs):
         self.path_mode = path_mode
+        self._image_dir = None
+        self._workers = kwargs.get("workers") or 1
 
     def convert(self, task="det", image_dir=None, label_path=None, output_path=None):
         self.label_path = label_path
@@ -37,29 +39,32 @@ class MTWI2018_Converter(object):
 
     def _format_det_label(self, image_dir, label_dir, output_path):
         label_paths = sorted(glob.glob(os.path.join(label_dir, "*.txt")))
+        self._image_dir = image_dir
 
         with open(output_path, "w") as out_file:
-            for label_fp in tqdm(label_paths):
-                label_file_name = os.path.basename(label_fp)
-                img_path = os.path.join(image_dir, label_file_name.split(".txt")[0] + ".jpg")
-                assert os.path.exists(
-                    img_path
-                ), f"{img_path} not exist! Please check the input image_dir {image_dir} and names in {label_fp}"
+            write_lines(out_file, parallel_map(self._format_det_line, label_paths, workers=self._workers))
 
-                if cv2.imread(img_path) is None:
-                    print(f"Failed to open {os.path.basename(img_path)} - skipping.")
-                    continue
+    def _format_det_line(self, label_fp):
+        label_file_name = os.path.basename(label_fp)
+        img_path = os.path.join(self._image_dir, label_file_name.split(".txt")[0] + ".jpg")
+        assert os.path.exists(
+            img_path
+        ), f"{img_path} not exist! Please check the input image_dir {self._image_dir} and names in {label_fp}"
 
-                label = []
-                if self.path_mode == "relative":
-                    img_path = os.path.basename(img_path)
-                with open(label_fp, "r", encoding="utf-8-sig") as f:
-                    for line in f.readlines():
-                        tmp = line.strip("\n\r").split(",", 8)
+        if cv2.imread(img_path) is None:
+            print(f"Failed to open {os.path.basename(img_path)} - skipping.")
+            return None
 
-                        points = [[float(tmp[i]), float(tmp[i + 1])] for i in range(0, 8, 2)]
-                        points = sort_clockwise(points).tolist()
+        label = []
+        if self.path_mode == "relative":
+            img_path = os.path.basename(img_path)
+        with open(label_fp, "r", encoding="utf-8-sig") as f:
+            for line in f.readlines():
+                tmp = line.strip("\n\r").split(",", 8)
 
-                        label.append({"transcription": tmp[8], "points": points})
+                points = [[float(tmp[i]), float(tmp[i + 1])] for i in range(0, 8, 2)]
+                points = sort_clockwise(points).tolist()
 
-                out_file.write(img_path + "\t" + json.dumps(label, ensure_ascii=False) + "\n")
+                label.append({"transcription": tmp[8], "points": points})
+
+        return img_path + "\t" + json.dumps(label, ensure_ascii=False) + "\n"
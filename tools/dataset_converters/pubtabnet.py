@@ -1,5 +1,8 @@
 import json
 from pathlib import Path
+from typing import Optional
+
+from tools.dataset_converters.utils.parallel import parallel_map, write_lines
 
 
 class PUBTABNET_Converter:
@@ -13,6 +16,8 @@ class PUBTABNET_Converter:
         if "split" not in kwargs:
             raise ValueError("It is required to specify the `split` argument for the pubtabnet dataset converter.")
         self._split = kwargs["split"]
+        self._image_dir = None
+        self._workers = kwargs.get("workers") or 1
 
     def convert(self, task="table", image_dir=None, label_path=None, output_path=None):
         label_path = Path(label_path)
@@ -24,20 +29,21 @@ class PUBTABNET_Converter:
             raise NotImplementedError(f"PUBTABNET does not support task {task}.")
 
     def _format_table_label(self, image_dir: Path, label_path: Path, output_path: str):
-        processed = 0
+        self._image_dir = image_dir
         with open(output_path, "w", encoding="utf-8") as out_file:
             with open(label_path, "r") as json_file:
-                for line in json_file:
-                    line = json.loads(line)
-                    if line["split"] != self._split:
-                        continue
+                lines = parallel_map(self._format_table_line, json_file, workers=self._workers, chunksize=256)
+                processed = write_lines(out_file, lines)
 
-                    img_path = image_dir / line["filename"]
-                    assert img_path.exists(), f"Image {img_path} not found."
+        print(f"{processed} labels for {self._split} set are processed.")
 
-                    line["filename"] = img_path.name if self._relative else str(img_path)
+    def _format_table_line(self, line: str) -> Optional[str]:
+        line = json.loads(line)
+        if line["split"] != self._split:
+            return None
 
-                    out_file.write(json.dumps(line, ensure_ascii=False) + "\n")
-                    processed = processed + 1
+        img_path = self._image_dir / line["filename"]
+        assert img_path.exists(), f"Image {img_path} not found."
 
-        print(f"{processed} labels for {self._split} set are processed.")
+        line["filename"] = img_path.name if self._relative else str(img_path)
+        return json.dumps(line, ensure_ascii=False) + "\n"
@@ -7,6 +7,11 @@ from tools.dataset_converters.utils.lmdb_writer import create_lmdb_dataset
 class SYNTHADD_Converter:
     def __init__(self, *args, **kwargs):
         self._image_dir = None
+        self._workers = kwargs.get("workers") or 1
+        self._lmdb_options = {
+            "sort_by_aspect_ratio": kwargs.get("sort_by_aspect_ratio", False),
+            "resize_height": kwargs.get("resize_height"),
+        }
 
     def convert(self, task="rec_lmdb", image_dir=None, label_path=None, output_path=None):
         if task == "rec_lmdb":
@@ -33,4 +38,4 @@ class SYNTHADD_Converter:
                     images.append(image_path)
                     labels.append(label)
 
-        create_lmdb_dataset(images, labels, output_path)
+        create_lmdb_dataset(images, labels, output_path, workers=self._workers, **self._lmdb_options)
@@ -1,7 +1,6 @@
 import itertools
 import os
 from collections import defaultdict
-from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Dict, Tuple
 
 import cv2
@@ -9,10 +8,10 @@ import numpy as np
 from PIL import Image
 from scipy.io import loadmat, savemat
 from shapely.geometry import Polygon, box
-from tqdm import tqdm
 
 from mindocr.data.utils.polygon_utils import sort_clockwise
 from tools.dataset_converters.utils.lmdb_writer import create_lmdb_dataset
+from tools.dataset_converters.utils.parallel import parallel_map
 from tools.infer.text.utils import crop_text_region
 
 
@@ -27,6 +26,11 @@ class SYNTHTEXT_Converter:
 
     def __init__(self, *args, **kwargs):
         self._image_dir = None
+        self._workers = kwargs.get("workers") or 8
+        self._lmdb_options = {
+            "sort_by_aspect_ratio": kwargs.get("sort_by_aspect_ratio", False),
+            "resize_height": kwargs.get("resize_height"),
+        }
 
     def _sort_and_validate(self, sample: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, ...]:
         """
@@ -73,15 +77,15 @@ class SYNTHTEXT_Converter:
         mat = loadmat(label_path)
 
         # use multiprocessing to process the dataset faster
-        with ProcessPoolExecutor(max_workers=8) as pool:
-            data_list = list(
-                tqdm(
-                    pool.map(self._sort_and_validate, zip(mat["imnames"][0], mat["wordBB"][0], mat["txt"][0])),
-                    total=len(mat["imnames"][0]),
-                    desc="Processing data",
-                    miniters=10000,
-                )
+        data_list = list(
+            parallel_map(
+                self._sort_and_validate,
+                zip(mat["imnames"][0], mat["wordBB"][0], mat["txt"][0]),
+                workers=self._workers,
+                desc="Processing data",
+                total=len(mat["imnames"][0]),
             )
+        )
 
         wordBB, txt = zip(*data_list)
         for i in range(len(mat["wordBB"][0])):  # how to stack wordBB?
@@ -131,14 +135,15 @@ class SYNTHTEXT_Converter:
         mat = loadmat(label_path)
 
         # use multiprocessing to process the dataset faster
-        with ProcessPoolExecutor(max_workers=8) as pool:
-            data_list = list(
-                tqdm(
-                    pool.map(self._sort_and_validate, zip(mat["imnames"][0], mat["wordBB"][0], mat["txt"][0])),
-                    total=len(mat["imnames"][0]),
-                    desc="Processing data",
-                )
+        data_list = list(
+            parallel_map(
+                self._sort_and_validate,
+                zip(mat["imnames"][0], mat["wordBB"][0], mat["txt"][0]),
+                workers=self._workers,
+                desc="Processing data",
+                total=len(mat["imnames"][0]),
             )
+        )
 
         wordBB, txt = zip(*data_list)
         for i in range(len(mat["wordBB"][0])):
@@ -158,18 +163,19 @@ class SYNTHTEXT_Converter:
                     }
                 )
 
-        with ProcessPoolExecutor(max_workers=8) as pool:
-            data_list = list(
-                tqdm(
-                    pool.map(self._crop_with_single_text, zip(data_list.keys(), data_list.values())),
-                    total=len(data_list),
-                    desc="Cropping data",
-                )
+        data_list = list(
+            parallel_map(
+                self._crop_with_single_text,
+                zip(data_list.keys(), data_list.values()),
+                workers=self._workers,
+                desc="Cropping data",
+                total=len(data_list),
             )
+        )
 
         images, labels = zip(*data_list)
         images = iter(itertools.chain(*images))
         labels = iter(itertools.chain(*labels))
 
         print("Creating the LMDB dataset.")
-        create_lmdb_dataset(images, labels, output_path=output_path)
+        create_lmdb_dataset(images, labels, output_path=output_path, **self._lmdb_options)
@@ -4,11 +4,12 @@ https://textvqa.org/textocr/
 """
 import json
 from pathlib import Path
+from typing import List, Tuple
 
 from shapely.geometry import Polygon
-from tqdm import tqdm
 
 from mindocr.data.utils.polygon_utils import sort_clockwise
+from tools.dataset_converters.utils.parallel import parallel_map, write_lines
 
 
 class TEXTOCR_Converter:
@@ -39,6 +40,8 @@ class TEXTOCR_Converter:
 
     def __init__(self, path_mode="relative", **kwargs):
         self._relative = path_mode == "relative"
+        self._image_dir = None
+        self._workers = kwargs.get("workers") or 1
 
     def convert(self, task="det", image_dir=None, label_path=None, output_path=None):
         label_path = Path(label_path)
@@ -53,37 +56,44 @@ class TEXTOCR_Converter:
         with open(label_path, "r") as json_file:
             data = json.load(json_file)
 
+        self._image_dir = image_dir
+        # send each image with its own annotations only to the workers
+        samples = [
+            (image_info, [data["anns"][anno_id] for anno_id in data["imgToAnns"][image_info["id"]]])
+            for image_info in data["imgs"].values()
+        ]
         with open(output_path, "w", encoding="utf-8") as out_file:
-            for image_info in tqdm(data["imgs"].values(), total=len(data["imgs"])):
-                img_path = image_dir / Path(image_info["file_name"]).name
-                assert img_path.exists(), f"Image {img_path} not found."
+            write_lines(out_file, parallel_map(self._format_det_line, samples, workers=self._workers))
 
-                label = []
-                annotations = data["imgToAnns"][image_info["id"]]
-                for anno_id in annotations:
-                    anno = data["anns"][anno_id]
-                    points = [
-                        [int(anno["points"][i]), int(anno["points"][i + 1])] for i in range(0, len(anno["points"]), 2)
-                    ]  # reshape points (N, 2)
+    def _format_det_line(self, sample: Tuple[dict, List[dict]]) -> str:
+        image_info, annotations = sample
+        img_path = self._image_dir / Path(image_info["file_name"]).name
+        assert img_path.exists(), f"Image {img_path} not found."
 
-                    poly = Polygon(points)
-                    if not poly.is_valid:  # fix broken polygons
-                        if len(points) == 4:  # if it's a quadrilateral - fix the polygon
-                            points = sort_clockwise(points).tolist()
-                        else:  # else take the bounding box as the label
-                            x, y, w, h = anno["bbox"]
-                            points = [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+        label = []
+        for anno in annotations:
+            points = [
+                [int(anno["points"][i]), int(anno["points"][i + 1])] for i in range(0, len(anno["points"]), 2)
+            ]  # reshape points (N, 2)
 
-                    elif not poly.exterior.is_ccw:  # sort vertices in polygons in clockwise order
-                        points = points[::-1]
+            poly = Polygon(points)
+            if not poly.is_valid:  # fix broken polygons
+                if len(points) == 4:  # if it's a quadrilateral - fix the polygon
+                    points = sort_clockwise(points).tolist()
+                else:  # else take the bounding box as the label
+                    x, y, w, h = anno["bbox"]
+                    points = [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
 
-                    # a single dot sign is an ignore tag in TextOCR
-                    label.append(
-                        {
-                            "transcription": anno["utf8_string"] if anno["utf8_string"] != "." else "###",
-                            "points": points,
-                        }
-                    )
+            elif not poly.exterior.is_ccw:  # sort vertices in polygons in clockwise order
+                points = points[::-1]
 
-                img_path = img_path.name if self._relative else str(img_path)
-                out_file.write(img_path + "\t" + json.dumps(label, ensure_ascii=False) + "\n")
+            # a single dot sign is an ignore tag in TextOCR
+            label.append(
+                {
+                    "transcription": anno["utf8_string"] if anno["utf8_string"] != "." else "###",
+                    "points": points,
+                }
+            )
+
+        img_path = img_path.name if self._relative else str(img_path)
+        return img_path + "\t" + json.dumps(label, ensure_ascii=False) + "\n"
@@ -1,46 +1,98 @@
 import os
-from typing import Any, Dict, Iterable, Union
+from functools import partial
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
 
+import cv2
 import lmdb
 import numpy as np
-from tqdm import tqdm
+
+from mindocr.data.bucket_sampler import read_image_size
+from mindocr.data.lmdb_index import IMAGE_SIZES_KEY
+from tools.dataset_converters.utils.parallel import parallel_map
 
 
 def write_cache(env: lmdb.Environment, cache: Dict[str, Any]):
     with env.begin(write=True) as txn:
-        for k, v in cache.items():
-            txn.put(k, v)
+        txn.cursor().putmulti(cache.items())
+
+
+def _read_image(
+    image: Union[str, np.ndarray, bytes], resize_height: Optional[int] = None, encode_ext: str = ".jpg"
+) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Read an image and its (height, width). If `resize_height` is given, the image is resized to this height with its
+    aspect ratio kept and encoded again in the `encode_ext` format.
+    """
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            image = f.read()
+    elif not isinstance(image, (np.ndarray, bytes)):
+        raise ValueError(f"Unsupported data type {type(image)}")
+
+    if resize_height is None:
+        if isinstance(image, np.ndarray):
+            return image.tobytes(), image.shape[:2]
+        try:
+            return image, read_image_size(image)
+        except OSError:  # not an image that can be decoded, stored as it is
+            return image, (0, 0)
+
+    if isinstance(image, bytes):
+        image = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    height, width = image.shape[:2]
+    width = max(round(width * resize_height / height), 1)
+    image = cv2.resize(image, (width, resize_height), interpolation=cv2.INTER_AREA)
+    return cv2.imencode(encode_ext, image)[1].tobytes(), (resize_height, width)
 
 
 def create_lmdb_dataset(
-    images: Iterable[Union[str, np.ndarray, bytes]], labels: Iterable[str], output_path: str = "./lmdb_out"
+    images: Iterable[Union[str, np.ndarray, bytes]],
+    labels: Iterable[str],
+    output_path: str = "./lmdb_out",
+    batch_size: int = 1000,
+    workers: int = 1,
+    sort_by_aspect_ratio: bool = False,
+    resize_height: Optional[int] = None,
+    encode_ext: str = ".jpg",
 ):
-    """Create the LMDB dataset with the given img_paths and labels"""
+    """
+    Create the LMDB dataset with the given img_paths and labels. The samples are written `batch_size` at a time, in
+    one transaction per batch. If `workers` > 1, the image files are read in parallel processes.
+
+    The (height, width) of all images are stored in the `image-sizes` record, so that `LMDBDataset` can bucket the
+    samples by aspect ratio without decoding the images.
+
+    Args:
+        sort_by_aspect_ratio: write the samples by increasing aspect ratio (width / height), so that the samples of a
+            bucket are stored next to each other. All the samples are kept in memory before writing.
+        resize_height: if given, store the images resized to this height (the input height of the recognition model)
+            with their aspect ratio kept, instead of the original images. It shrinks the dataset and the decoding cost
+            of each sample during training.
+        encode_ext: image format of the resized images.
+    """
     os.makedirs(output_path, exist_ok=True)
     env = lmdb.Environment(output_path, map_size=1099511627776)
-    cache = {}
-
-    for i, (image, label) in tqdm(enumerate(zip(images, labels)), total=len(images), desc="Creating LMDB"):
-        imageKey = "image-%09d".encode() % (i + 1)
-        labelKey = "label-%09d".encode() % (i + 1)
-
-        if isinstance(image, str):
-            with open(image, "rb") as f:
-                image = f.read()
-        elif isinstance(image, np.ndarray):
-            image = image.tobytes()
-        elif isinstance(image, bytes):
-            pass
-        else:
-            raise ValueError(f"Unsupported data type {type(image)}")
-
-        cache[imageKey] = image
-        cache[labelKey] = label.encode()
-        if i % 1000 == 0:
+    total = len(images) if hasattr(images, "__len__") else None
+    read_fn = partial(_read_image, resize_height=resize_height, encode_ext=encode_ext)
+    images = parallel_map(read_fn, images, workers=workers, desc="Creating LMDB", total=total)
+
+    if sort_by_aspect_ratio:
+        images, labels = list(images), list(labels)
+        order = np.argsort([width / max(height, 1) for _, (height, width) in images], kind="stable")
+        images, labels = [images[i] for i in order], [labels[i] for i in order]
+
+    cache, image_sizes = {}, []
+    for (image, image_size), label in zip(images, labels):
+        image_sizes.append(image_size)
+        cache["image-%09d".encode() % len(image_sizes)] = image
+        cache["label-%09d".encode() % len(image_sizes)] = label.encode()
+        if len(cache) >= 2 * batch_size:
             write_cache(env, cache)
             cache = {}
 
-    num_samples = len(images)
+    num_samples = len(image_sizes)
     cache["num-samples".encode()] = str(num_samples).encode()
+    cache[IMAGE_SIZES_KEY] = np.array(image_sizes, dtype="<i4").reshape(-1, 2).tobytes()
     write_cache(env, cache)
+    env.close()
     print(f"Created dataset with {num_samples} samples.")
@@ -0,0 +1,70 @@
+import multiprocessing as mp
+import time
+from typing import Callable, Iterable, Iterator, Optional, TextIO, TypeVar
+
+from tqdm import tqdm
+
+T = TypeVar("T")
+
+
+def parallel_map(
+    func: Callable[..., T],
+    items: Iterable,
+    workers: int = 1,
+    desc: str = "Processing",
+    chunksize: Optional[int] = None,
+    total: Optional[int] = None,
+) -> Iterator[T]:
+    """
+    Apply `func` to `items` in a pool of `workers` processes and yield the results in the order of `items`, with a
+    progress bar and a throughput summary. `func` must be picklable (a module-level function or a method of a
+    picklable converter), and so must the items and the results. Runs in the current process if `workers` <= 1.
+
+    Args:
+        func: function applied to each item.
+        items: items to process.
+        workers: number of processes.
+        desc: description shown by the progress bar and the summary.
+        chunksize: number of items sent to a worker at once. By default, the items are split into about 4 chunks per
+            worker, of at most 256 items.
+        total: number of items, if `items` has no length.
+    """
+    if total is None and hasattr(items, "__len__"):
+        total = len(items)
+    if chunksize is None:
+        chunksize = min(max(total // (workers * 4), 1), 256) if total else 64
+
+    start, count = time.perf_counter(), 0
+    pool = mp.Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap(func, items, chunksize) if pool is not None else map(func, items)
+        for result in tqdm(results, total=total, desc=desc, mininterval=1.0):
+            count += 1
+            yield result
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    elapsed = time.perf_counter() - start
+    print(f"{desc}: {count} items in {elapsed:.1f}s ({count / max(elapsed, 1e-6):.1f} items/s, {workers} workers)")
+
+
+def write_lines(out_file: TextIO, lines: Iterable[Optional[str]], chunk_size: int = 1000) -> int:
+    """
+    Write the lines to the label file in their order, `chunk_size` lines at a time. `None` lines (skipped samples) are
+    not written.
+
+    Returns:
+        number of lines written.
+    """
+    chunk, num_lines = [], 0
+    for line in lines:
+        if line is None:
+            continue
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            out_file.writelines(chunk)
+            num_lines += len(chunk)
+            chunk = []
+    out_file.writelines(chunk)
+    return num_lines + len(chunk)
@@ -99,6 +99,7 @@ def main(cfg):
         label_indices=cfg.eval.dataset.pop("label_column_index", None),
         meta_data_indices=cfg.eval.dataset.pop("meta_data_column_index", None),
         num_epochs=1,
+        async_workers=cfg.eval.get("async_workers", 0),
     )
 
     # log
@@ -0,0 +1,259 @@
+"""
+Benchmark of end-to-end text detection and recognition inference on synthetic images
+
+Example:
+    $ python tools/infer/text/predict_system.py --benchmark True --det_algorithm DB++ --rec_algorithm CRNN \
+      --benchmark_batch_sizes 1 4 --benchmark_image_sizes 720x1280 1080x1920 \
+      --benchmark_det_limit_side_lens 736 960 --benchmark_rec_batch_nums 8 16
+"""
+
+import copy
+import gc
+import json
+import logging
+import os
+import platform
+import string
+import subprocess
+from collections import defaultdict
+from time import time
+
+import cv2
+import numpy as np
+
+import mindspore as ms
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger("mindocr")
+
+# stages timed per image, from the time profile of `TextSystem`
+_SYSTEM_STAGES = ["det", "crop", "cls", "rec", "all"]
+
+
+class StageTimer(object):
+    """
+    Wrapper of a pipeline component (preprocessor, network or postprocessor) recording the duration of each call in
+    `times[name]`. If `sync` is True, the duration includes the computation of the output tensors, which run
+    asynchronously on the device otherwise.
+    """
+
+    def __init__(self, func, times, name, sync=False):
+        self.func = func
+        self.times = times
+        self.name = name
+        self.sync = sync
+
+    def __call__(self, *args, **kwargs):
+        start = time()
+        output = self.func(*args, **kwargs)
+        if self.sync:
+            for out in output if isinstance(output, (list, tuple)) else [output]:
+                if isinstance(out, ms.Tensor):
+                    out.asnumpy()
+        self.times[self.name].append(time() - start)
+        return output
+
+    def __getattr__(self, name):
+        # expose the attributes of the wrapped component, e.g. `schedule` of the preprocessor
+        if name == "func":
+            raise AttributeError(name)
+        return getattr(self.func, name)
+
+
+def gen_text_images(num_images, height, width, seed=0):
+    """Generate RGB images of random words in lines of random sizes and colors, on a light noisy background."""
+    rng = np.random.default_rng(seed)
+    chars = list(string.ascii_letters + string.digits)
+    images = []
+    for _ in range(num_images):
+        image = np.clip(rng.normal(235, 10, (height, width, 3)), 0, 255).astype(np.uint8)
+        y = 0
+        while True:
+            scale = float(rng.uniform(0.5, 1.5)) * max(height, width) / 1280
+            thickness = max(int(round(2 * scale)), 1)
+            text_height = cv2.getTextSize("A", cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)[0][1]
+            y += int(text_height * rng.uniform(1.5, 3.0))
+            if y >= height - text_height:
+                break
+            x = int(rng.integers(0, width // 4))
+            while True:
+                word = "".join(rng.choice(chars, rng.integers(3, 12)))
+                text_width = cv2.getTextSize(word, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)[0][0]
+                if x + text_width >= width:
+                    break
+                color = tuple(int(c) for c in rng.integers(0, 80, 3))
+                cv2.putText(image, word, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness, cv2.LINE_AA)
+                x += text_width + int(text_height * rng.uniform(1, 4))
+        images.append(image)
+    return images
+
+
+def percentiles(values):
+    """mean, p50, p90 and p99 of durations in seconds, in milliseconds"""
+    if not values:
+        return {"count": 0}
+    values = np.array(values) * 1000
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"count": len(values), "mean_ms": values.mean(), "p50_ms": p50, "p90_ms": p90, "p99_ms": p99}
+
+
+def memory_high_water():
+    """Peak resident memory of the process and peak device memory allocated by MindSpore (since the last reset)."""
+    memory = {}
+    try:
+        import resource
+
+        memory["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    except ImportError:  # not available on Windows
+        memory["peak_rss_mb"] = None
+    try:
+        memory["device_peak_mb"] = ms.runtime.max_memory_allocated() / 2**20
+    except (AttributeError, RuntimeError):  # not supported by the MindSpore version or the device
+        memory["device_peak_mb"] = None
+    return memory
+
+
+def reset_device_memory_high_water():
+    try:
+        ms.runtime.reset_max_memory_allocated()
+    except (AttributeError, RuntimeError):
+        pass
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=__dir__, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_timed_system(args, text_system_cls, times):
+    """Build the text system and wrap the components of the detector and the recognizer with stage timers."""
+    start = time()
+    text_system = text_system_cls(args)
+    init_time = time() - start
+
+    text_detect, text_recognize = text_system.text_detect, text_system.text_recognize
+    text_detect.preprocess = StageTimer(text_detect.preprocess, times, "det_preprocess")
+    text_detect.model = StageTimer(text_detect.model, times, "det_forward", sync=True)
+    text_detect.postprocess = StageTimer(text_detect.postprocess, times, "det_postprocess")
+    text_recognize.model = StageTimer(text_recognize.model, times, "rec_forward", sync=True)
+    return text_system, init_time
+
+
+def run_iteration(text_system, images, cross_image_batch, times):
+    """Detect and recognize texts in a batch of images, and record the time profile of each image."""
+    text_system.text_detect.preprocess.schedule(images)
+    try:
+        if cross_image_batch:
+            results = list(text_system.stream(images, do_visualize=False))
+        else:
+            results = [(image, *text_system(image, do_visualize=False)) for image in images]
+    finally:
+        text_system.text_detect.preprocess.clear()
+    num_boxes = 0
+    for _, boxes, _, time_profile in results:
+        num_boxes += len(boxes)
+        for stage in _SYSTEM_STAGES:
+            if stage in time_profile:
+                times[stage].append(time_profile[stage])
+    return num_boxes
+
+
+def run_benchmark(args, text_system_cls):
+    """
+    Benchmark `text_system_cls` (TextSystem) on synthetic images for every combination of the `benchmark_*` settings,
+    and save the report in JSON.
+
+    For each det_limit_side_len and rec_batch_num, the text system is built again (model loading time reported as
+    `model_init_s`). For each image size and batch size, `benchmark_warmup_iters` iterations are run before the
+    `benchmark_num_iters` measured ones: the extra time of the first one over the median iteration is reported as
+    `compile_s`, mostly the graph compilation for the new input shapes. The report contains, for each setting:
+        - throughput (images/s) and latency percentiles of the iterations,
+        - latency percentiles of the stages: det_preprocess (waiting for the prefetched preprocessing),
+          det_forward, det_postprocess and rec_forward per call of the component, det (whole detection),
+          crop, cls, rec (shared among the images of a batch of crops in cross-image batching) and all per image,
+        - memory high-water marks: peak resident memory of the process since the start (it never decreases) and peak
+          device memory allocated by MindSpore for this setting, if supported.
+    """
+    args = copy.copy(args)
+    args.save_crop_res = False
+    args.save_cls_result = False
+    det_limit_side_lens = args.benchmark_det_limit_side_lens or [args.det_limit_side_len]
+    rec_batch_nums = args.benchmark_rec_batch_nums or [args.rec_batch_num]
+    image_sizes = [tuple(int(x) for x in size.lower().split("x")) for size in args.benchmark_image_sizes]
+    num_images = max(args.benchmark_batch_sizes) * max(min(args.benchmark_num_iters, 4), 1)
+    images = {size: gen_text_images(num_images, *size) for size in image_sizes}
+
+    results = []
+    for det_limit_side_len in det_limit_side_lens:
+        for rec_batch_num in rec_batch_nums:
+            args.det_limit_side_len = det_limit_side_len
+            args.rec_batch_num = rec_batch_num
+            times = defaultdict(list)
+            text_system, init_time = build_timed_system(args, text_system_cls, times)
+
+            for size in image_sizes:
+                for batch_size in args.benchmark_batch_sizes:
+                    reset_device_memory_high_water()
+                    iter_times, num_boxes = [], 0
+                    for i in range(args.benchmark_warmup_iters + args.benchmark_num_iters):
+                        if i == args.benchmark_warmup_iters:
+                            times.clear()
+                            num_boxes = 0
+                        batch = [images[size][(i * batch_size + j) % num_images] for j in range(batch_size)]
+                        start = time()
+                        num_boxes += run_iteration(text_system, batch, args.rec_cross_image_batch, times)
+                        iter_times.append(time() - start)
+
+                    measured = iter_times[args.benchmark_warmup_iters :]
+                    compile_time = iter_times[0] - np.median(measured) if args.benchmark_warmup_iters else None
+                    result = {
+                        "batch_size": batch_size,
+                        "image_size": f"{size[0]}x{size[1]}",
+                        "det_limit_side_len": det_limit_side_len,
+                        "rec_batch_num": rec_batch_num,
+                        "model_init_s": init_time,
+                        "compile_s": max(compile_time, 0.0) if compile_time is not None else None,
+                        "throughput": batch_size * len(measured) / sum(measured),
+                        "boxes_per_image": num_boxes / (batch_size * len(measured)),
+                        "iteration": percentiles(measured),
+                        "stages": {stage: percentiles(stage_times) for stage, stage_times in times.items()},
+                        **memory_high_water(),
+                    }
+                    results.append(result)
+                    logger.info(
+                        f"Benchmark det_limit_side_len={det_limit_side_len}, rec_batch_num={rec_batch_num}, "
+                        f"image_size={result['image_size']}, batch_size={batch_size}: "
+                        f"{result['throughput']:.2f} img/s, iteration p50 {result['iteration']['p50_ms']:.1f} ms, "
+                        f"p90 {result['iteration']['p90_ms']:.1f} ms"
+                        + (f", compile {result['compile_s']:.2f} s" if result["compile_s"] is not None else "")
+                    )
+
+            del text_system
+            gc.collect()
+
+    report = {
+        "commit": get_commit(),
+        "mindspore": ms.__version__,
+        "device_target": ms.get_context("device_target"),
+        "mode": args.mode,
+        "platform": platform.platform(),
+        "det_algorithm": args.det_algorithm,
+        "rec_algorithm": args.rec_algorithm,
+        "cls_algorithm": args.cls_algorithm,
+        "rec_cross_image_batch": args.rec_cross_image_batch,
+        "num_iters": args.benchmark_num_iters,
+        "warmup_iters": args.benchmark_warmup_iters,
+        "results": results,
+    }
+    save_path = args.benchmark_output or os.path.join(args.draw_img_save_dir, "benchmark.json")
+    os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+    with open(save_path, "w") as f:
+        json.dump(report, f, indent=4, default=float)
+    logger.info(f"Done! Benchmark report saved in {save_path}")
+
+    return report
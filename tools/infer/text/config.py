@@ -21,9 +21,18 @@ def create_parser():
     parser = argparse.ArgumentParser(description="Inference Config Args")
     # params for prediction engine
     parser.add_argument("--mode", type=int, default=0, help="0 for graph mode, 1 for pynative mode ")  # added
+    parser.add_argument(
+        "--num_preprocess_workers",
+        type=int,
+        default=4,
+        help="Number of threads preprocessing the next images or crops while the model runs on the current ones. "
+        "If 0, images are preprocessed serially.",
+    )
 
     # params for text detector
-    parser.add_argument("--image_dir", type=str, required=True, help="image path or image directory")
+    parser.add_argument(
+        "--image_dir", type=str, default=None, help="image path or image directory. Not needed with --benchmark."
+    )
     # parser.add_argument("--page_num", type=int, default=0)
     parser.add_argument(
         "--det_algorithm",
@@ -110,6 +119,22 @@ def create_parser():
         "due to padding or resizing to the same shape.",
     )  # added
     parser.add_argument("--rec_batch_num", type=int, default=8)
+    parser.add_argument(
+        "--rec_max_width",
+        type=int,
+        default=None,
+        help="Maximum input width in batch-mode recognition, where the padded width of each batch follows its widest "
+        "image, rounded up to a multiple of the input height. Bounds the number of distinct input widths, hence of "
+        "graph compilations. Wider batches are squeezed to it. If None, the width is not limited.",
+    )
+    parser.add_argument(
+        "--rec_cross_image_batch",
+        type=str2bool,
+        default=False,
+        help="Whether to gather the text crops of consecutive images into full recognition batches of `rec_batch_num` "
+        "crops in end-to-end inference (predict_system.py), which raises the recognition batch utilization for images "
+        "with few texts.",
+    )
     parser.add_argument("--max_text_length", type=int, default=25)
     parser.add_argument(
         "--rec_char_dict_path",
@@ -145,6 +170,52 @@ def create_parser():
     )
 
     parser.add_argument("--warmup", type=str2bool, default=False)
+
+    # params for benchmark of end-to-end inference (predict_system.py)
+    parser.add_argument(
+        "--benchmark",
+        type=str2bool,
+        default=False,
+        help="Whether to benchmark the end-to-end inference on synthetic text images instead of predicting on "
+        "`image_dir`, sweeping the `benchmark_*` settings below, and save the report in `benchmark_output`.",
+    )
+    parser.add_argument(
+        "--benchmark_batch_sizes", type=int, nargs="+", default=[1], help="Numbers of images per measured iteration."
+    )
+    parser.add_argument(
+        "--benchmark_image_sizes",
+        type=str,
+        nargs="+",
+        default=["720x1280"],
+        help="Resolutions of the synthetic images, as HEIGHTxWIDTH.",
+    )
+    parser.add_argument(
+        "--benchmark_det_limit_side_lens",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Values of `det_limit_side_len` to sweep. If None, `det_limit_side_len` is used.",
+    )
+    parser.add_argument(
+        "--benchmark_rec_batch_nums",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Values of `rec_batch_num` to sweep. If None, `rec_batch_num` is used.",
+    )
+    parser.add_argument("--benchmark_num_iters", type=int, default=10, help="Number of measured iterations.")
+    parser.add_argument(
+        "--benchmark_warmup_iters",
+        type=int,
+        default=2,
+        help="Number of iterations run before the measured ones, including the graph compilation.",
+    )
+    parser.add_argument(
+        "--benchmark_output",
+        type=str,
+        default=None,
+        help="Path of the JSON report. If None, it is saved as benchmark.json in `draw_img_save_dir`.",
+    )
     parser.add_argument("--ocr_result_dir", type=str, default=None, help="path or directory of ocr results")
     parser.add_argument(
         "--ser_algorithm",
@@ -268,4 +339,6 @@ def create_parser():
 def parse_args():
     parser = create_parser()
     args = parser.parse_args()
+    if args.image_dir is None and not args.benchmark:
+        parser.error("the following arguments are required: --image_dir")
     return args
@@ -14,7 +14,7 @@ from typing import List
 import numpy as np
 from config import parse_args
 from postprocess import Postprocessor
-from preprocess import Preprocessor
+from preprocess import PrefetchPreprocessor, Preprocessor
 from shapely.geometry import Polygon
 from utils import get_ckpt_file, get_image_paths
 
@@ -77,11 +77,14 @@ class TextDetector(object):
         )
 
         # build preprocess and postprocess
-        self.preprocess = Preprocessor(
-            task="det",
-            algo=args.det_algorithm,
-            det_limit_side_len=args.det_limit_side_len,
-            det_limit_type=args.det_limit_type,
+        self.preprocess = PrefetchPreprocessor(
+            Preprocessor(
+                task="det",
+                algo=args.det_algorithm,
+                det_limit_side_len=args.det_limit_side_len,
+                det_limit_type=args.det_limit_type,
+            ),
+            num_workers=args.num_preprocess_workers,
         )
 
         self.postprocess = Postprocessor(task="det", algo=args.det_algorithm, box_type=args.det_box_type)
@@ -252,13 +255,17 @@ if __name__ == "__main__":
     # init detector
     text_detect = TextDetector(args)
 
-    # run for each image
+    # run for each image, preprocessing the next images in the background
+    text_detect.preprocess.schedule(img_paths)
     det_res_all = []
-    for i, img_path in enumerate(img_paths):
-        logger.info(f"\nInfering [{i+1}/{len(img_paths)}]: {img_path}")
-        det_res, _ = text_detect(img_path, do_visualize=True)
-        det_res_all.append(det_res)
-        logger.info(f"Num detected text boxes: {len(det_res['polys'])}")
+    try:
+        for i, img_path in enumerate(img_paths):
+            logger.info(f"\nInfering [{i+1}/{len(img_paths)}]: {img_path}")
+            det_res, _ = text_detect(img_path, do_visualize=True)
+            det_res_all.append(det_res)
+            logger.info(f"Num detected text boxes: {len(det_res['polys'])}")
+    finally:
+        text_detect.preprocess.clear()
 
     # save all results in a txt file
     save_det_res(det_res_all, img_paths, save_path=os.path.join(save_dir, "det_results.txt"))
@@ -14,7 +14,7 @@ import numpy as np
 import yaml
 from addict import Dict
 from postprocess import Postprocessor
-from preprocess import Preprocessor
+from preprocess import PrefetchPreprocessor, Preprocessor
 from utils import get_ckpt_file, get_image_paths
 
 import mindspore as ms
@@ -73,6 +73,8 @@ class LayoutAnalyzer(object):
 
         self.preprocess = Preprocessor(task="layout", algo=args.layout_algorithm)
         self.postprocess = Postprocessor(task="layout", algo=args.layout_algorithm)
+        # load and preprocess the scheduled images in the background
+        self.load_and_preprocess = PrefetchPreprocessor(self._load_and_preprocess, args.num_preprocess_workers)
 
     def __call__(self, img_path: str, do_visualize: bool = False) -> List:
         """
@@ -86,9 +88,8 @@ class LayoutAnalyzer(object):
                         - bbox (list): bounding box of the layout element
                         - score (float): confidence score of the layout element
         """
-        data = self._load_image(img_path)
-        # preprocess
-        data = self.preprocess(data)
+        # load and preprocess
+        data = self.load_and_preprocess(img_path)
         self.hw_ori = data["hw_ori"]
         self.hw_scale = data["hw_scale"]
         self.pad = data["pad"]
@@ -119,6 +120,9 @@ class LayoutAnalyzer(object):
 
         return results
 
+    def _load_and_preprocess(self, img_path: str):
+        return self.preprocess(self._load_image(img_path))
+
     def _load_image(self, img_path: str):
         """
         Load image from path
@@ -229,13 +233,17 @@ if __name__ == "__main__":
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
     # run for each image
-    for i, img_path in enumerate(img_paths):
-        logger.info(f"Infering [{i+1}/{len(img_paths)}]: {img_path}")
-
-        layout_res = layout_analyzer(img_path, do_visualize=args.visualize_output)
-        logger.info(f"Num analyze layout boxes: {len(layout_res)}")
-
-        # save all results in a txt file
-        save_layout_res(layout_res, img_path, save_dir=os.path.join(save_dir))
+    layout_analyzer.load_and_preprocess.schedule(img_paths)
+    try:
+        for i, img_path in enumerate(img_paths):
+            logger.info(f"Infering [{i+1}/{len(img_paths)}]: {img_path}")
+
+            layout_res = layout_analyzer(img_path, do_visualize=args.visualize_output)
+            logger.info(f"Num analyze layout boxes: {len(layout_res)}")
+
+            # save all results in a txt file
+            save_layout_res(layout_res, img_path, save_dir=os.path.join(save_dir))
+    finally:
+        layout_analyzer.load_and_preprocess.clear()
 
     logger.info(f"Done! layout analyze result saved in {save_dir}")
@@ -6,14 +6,16 @@ Example:
     $ python tools/infer/text/predict_rec.py  --image_dir {path_to_img} --rec_algorithm CRNN_CH
 """
 import logging
+import math
 import os
 import sys
 from time import time
 
 import numpy as np
 from config import parse_args
+from PIL import Image
 from postprocess import Postprocessor
-from preprocess import Preprocessor
+from preprocess import PrefetchPreprocessor, Preprocessor
 from utils import get_ckpt_file, get_image_paths
 
 import mindspore as ms
@@ -24,6 +26,7 @@ __dir__ = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../../../")))
 
 from mindocr import build_model
+from mindocr.data.transforms.rec_transforms import RecResizeNormForInfer
 from mindocr.utils.logger import set_logger
 from mindocr.utils.visualize import show_imgs
 
@@ -44,6 +47,8 @@ class TextRecognizer(object):
     def __init__(self, args):
         self.batch_num = args.rec_batch_num
         self.batch_mode = args.rec_batch_mode
+        self.max_width = args.rec_max_width
+        self._used_widths = set()
         # self.batch_mode = args.rec_batch_mode and (self.batch_num > 1)
         logger.info(
             "recognize in {} mode {}".format(
@@ -92,12 +97,16 @@ class TextRecognizer(object):
 
         # build preprocess and postprocess
         # NOTE: most process hyper-params should be set optimally for the pick algo.
-        self.preprocess = Preprocessor(
-            task="rec",
-            algo=args.rec_algorithm,
-            rec_image_shape=args.rec_image_shape,
-            rec_batch_mode=self.batch_mode,
-            rec_batch_num=self.batch_num,
+        self.preprocess = PrefetchPreprocessor(
+            Preprocessor(
+                task="rec",
+                algo=args.rec_algorithm,
+                rec_image_shape=args.rec_image_shape,
+                rec_batch_mode=self.batch_mode,
+                rec_batch_num=self.batch_num,
+            ),
+            num_workers=args.num_preprocess_workers,
+            max_prefetch=2 * self.batch_num,
         )
 
         # TODO: try GeneratorDataset to wrap preprocess transform on batch for possible speed-up.
@@ -149,53 +158,105 @@ class TextRecognizer(object):
                 in order.
                     where text is the predicted text string, score is its confidence score.
                     e.g. [('apple', 0.9), ('bike', 1.0)]
+
+        Notes:
+            Images are sorted by aspect ratio before batching, so that each batch holds images of similar widths.
+            If the preprocessing keeps the aspect ratio and pads the images, the padded width of a batch is computed
+            from the widest image of the batch, rounded up to a multiple of the target height, so that long texts are
+            not squeezed (up to `rec_max_width`). Batches are never narrower than the default width, so short texts
+            are padded to it as in the fixed-width preprocessing. Results are returned in the input order.
         """
-        rec_res = []
         num_imgs = len(img_or_path_list)
+        rec_res = [None] * num_imgs
+
+        wh_ratios = np.array([get_wh_ratio(img_or_path) for img_or_path in img_or_path_list])
+        order = np.argsort(wh_ratios, kind="stable")
+        resize_op = next((t for t in self.preprocess.transforms if isinstance(t, RecResizeNormForInfer)), None)
+        dynamic_width = resize_op is not None and resize_op.keep_ratio and resize_op.padding
+        valid_pixels, padded_pixels = 0, 0
 
+        # plan the batches, then preprocess the next batches in the background while the model runs
+        batches = []
         for idx in range(0, num_imgs, self.batch_num):  # batch begin index i
-            batch_begin = idx
-            batch_end = min(idx + self.batch_num, num_imgs)
-            logger.info(f"Rec img idx range: [{batch_begin}, {batch_end})")
-            # TODO: set max_wh_ratio to the maximum wh ratio of images in the batch. and update it for resize,
-            #  which may improve recognition accuracy in batch-mode
-            # especially for long text image. max_wh_ratio=max(max_wh_ratio, img_w / img_h).
-            # The short ones should be scaled with a.r. unchanged and padded to max width in batch.
-
-            # preprocess
-            # TODO: run in parallel with multiprocessing
-            img_batch = []
-            for j in range(batch_begin, batch_end):  # image index j
-                data = self.preprocess(img_or_path_list[j])
-                img_batch.append(data["image"])
-                if do_visualize:
-                    fn = os.path.basename(data.get("img_path", f"crop_{j}.png")).rsplit(".", 1)[0]
-                    show_imgs(
-                        [data["image"]],
-                        title=fn + "_rec_preprocessed",
-                        mean_rgb=[127.0, 127.0, 127.0],
-                        std_rgb=[127.0, 127.0, 127.0],
-                        is_chw=True,
-                        show=False,
-                        save_path=os.path.join(self.vis_dir, fn + "_rec_preproc.png"),
-                    )
-
-            img_batch = np.stack(img_batch) if len(img_batch) > 1 else np.expand_dims(img_batch[0], axis=0)
-
-            # infer
-            net_pred = self.model(ms.Tensor(img_batch))
-            if self.cast_pred_fp32:
-                if isinstance(net_pred, list) or isinstance(net_pred, tuple):
-                    net_pred = [self.cast(p, mstype.float32) for p in net_pred]
-                else:
-                    net_pred = self.cast(net_pred, mstype.float32)
+            batch_indices = order[idx : idx + self.batch_num]
+            extra_data = {}
+            if dynamic_width:
+                extra_data["max_wh_ratio"] = self._get_batch_wh_ratio(wh_ratios[batch_indices].max(), resize_op)
+            batches.append((idx, batch_indices, extra_data))
+        self.preprocess.schedule(
+            [img_or_path_list[j] for _, batch_indices, _ in batches for j in batch_indices],
+            [extra_data for _, batch_indices, extra_data in batches for _ in batch_indices],
+        )
 
-            # postprocess
-            batch_res = self.postprocess(net_pred)
-            rec_res.extend(list(zip(batch_res["texts"], batch_res["confs"])))
+        try:
+            for idx, batch_indices, extra_data in batches:
+                logger.info(f"Rec img idx range: [{idx}, {idx + len(batch_indices)}) of the aspect-ratio sorted images")
+
+                # preprocess
+                img_batch = []
+                for j in batch_indices:  # image index j
+                    data = self.preprocess(img_or_path_list[j], **extra_data)
+                    img_batch.append(data["image"])
+                    if do_visualize:
+                        fn = os.path.basename(data.get("img_path", f"crop_{j}.png")).rsplit(".", 1)[0]
+                        show_imgs(
+                            [data["image"]],
+                            title=fn + "_rec_preprocessed",
+                            mean_rgb=[127.0, 127.0, 127.0],
+                            std_rgb=[127.0, 127.0, 127.0],
+                            is_chw=True,
+                            show=False,
+                            save_path=os.path.join(self.vis_dir, fn + "_rec_preproc.png"),
+                        )
+
+                img_batch = np.stack(img_batch) if len(img_batch) > 1 else np.expand_dims(img_batch[0], axis=0)
+
+                # padding statistics: width of each image before padding vs. width of the batch
+                batch_height, batch_width = img_batch.shape[-2:]
+                if dynamic_width:
+                    valid_widths = np.minimum(np.ceil(batch_height * wh_ratios[batch_indices]), batch_width)
+                else:
+                    valid_widths = np.full(len(batch_indices), batch_width)
+                valid_pixels += valid_widths.sum() * batch_height
+                padded_pixels += batch_width * batch_height * len(batch_indices)
+
+                # infer
+                net_pred = self.model(ms.Tensor(img_batch))
+                if self.cast_pred_fp32:
+                    if isinstance(net_pred, list) or isinstance(net_pred, tuple):
+                        net_pred = [self.cast(p, mstype.float32) for p in net_pred]
+                    else:
+                        net_pred = self.cast(net_pred, mstype.float32)
+
+                # postprocess
+                batch_res = self.postprocess(net_pred)
+                for j, res in zip(batch_indices, zip(batch_res["texts"], batch_res["confs"])):
+                    rec_res[j] = res
+        finally:
+            self.preprocess.clear()  # drop the remaining inputs if a batch failed
+
+        if padded_pixels > 0:
+            logger.info(
+                f"Rec padding waste: {1 - valid_pixels / padded_pixels:.2%} of the input pixels are padding. "
+                f"Distinct input widths used so far: {sorted(self._used_widths) or 'fixed'}"
+            )
 
         return rec_res
 
+    def _get_batch_wh_ratio(self, max_wh_ratio: float, resize_op) -> float:
+        """
+        Compute the `max_wh_ratio` of a batch for resizing, i.e. the padded width of the batch over the target height.
+        The width is taken from a fixed ladder, the multiples of the target height from the default target width up to
+        `rec_max_width`, so that the widths used (hence the graph compilations) do not depend on the order of the
+        images.
+        """
+        width = max(int(math.ceil(max_wh_ratio)) * resize_op.tar_h, resize_op.tar_w)
+        if self.max_width:
+            width = min(width, max(self.max_width, resize_op.tar_w))
+        self._used_widths.add(width)
+
+        return (width + 0.5) / resize_op.tar_h  # +0.5 protects the int() cast in resizing from round-off errors
+
     def run_single(self, img_or_path, crop_idx=0, do_visualize=True):
         """
         Text recognition inference on a single image
@@ -250,6 +311,16 @@ class TextRecognizer(object):
         return rec_res
 
 
+def get_wh_ratio(img_or_path) -> float:
+    """width / height of an image given as a path (only the image header is read) or as a numpy array"""
+    if isinstance(img_or_path, str):
+        with Image.open(img_or_path) as img:
+            w, h = img.size
+    else:
+        h, w = img_or_path.shape[:2]
+    return w / max(h, 1)
+
+
 def save_rec_res(rec_res_all, img_paths, include_score=False, save_path="./rec_results.txt"):
     lines = []
     for i, rec_res in enumerate(rec_res_all):
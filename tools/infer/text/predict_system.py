@@ -6,6 +6,8 @@ Example:
       --rec_algorithm CRNN
     $ python tools/infer/text/predict_system.py --image_dir {path_to_img_dir} --det_algorithm DB++ \
       --rec_algorithm CRNN_CH
+    $ python tools/infer/text/predict_system.py --benchmark True --det_algorithm DB++ --rec_algorithm CRNN \
+      --benchmark_image_sizes 720x1280 1080x1920 --benchmark_rec_batch_nums 8 16
 """
 
 import json
@@ -13,15 +15,16 @@ import logging
 import os
 import sys
 from time import time
-from typing import List, Union
+from typing import Iterable, List, Union
 
 import cv2
 import numpy as np
+from benchmark import run_benchmark
 from config import parse_args
 from postprocess import Postprocessor
 from predict_det import TextDetector
 from predict_rec import TextRecognizer
-from preprocess import Preprocessor
+from preprocess import PrefetchPreprocessor, Preprocessor
 from utils import crop_text_region, get_image_paths, img_rotate
 
 import mindspore as ms
@@ -87,9 +90,13 @@ class TextClassifier(object):
         )
 
         # build preprocess
-        self.preprocess = Preprocessor(
-            task="cls",
-            algo=args.cls_algorithm,
+        self.preprocess = PrefetchPreprocessor(
+            Preprocessor(
+                task="cls",
+                algo=args.cls_algorithm,
+            ),
+            num_workers=args.num_preprocess_workers,
+            max_prefetch=2 * self.batch_num,
         )
 
         # build postprocess
@@ -137,31 +144,35 @@ class TextClassifier(object):
 
         cls_res = []
         num_imgs = len(img_or_path_list)
-
-        for idx in range(0, num_imgs, self.batch_num):
-            batch_begin = idx
-            batch_end = min(idx + self.batch_num, num_imgs)
-            logger.info(f"CLS img idx range: [{batch_begin}, {batch_end})")
-            img_batch = []
-
-            # preprocess
-            for j in range(batch_begin, batch_end):
-                data = self.preprocess(img_or_path_list[j])
-                img_batch.append(data["image"])
-
-            # infer
-            img_batch = np.stack(img_batch) if len(img_batch) > 1 else np.expand_dims(img_batch[0], axis=0)
-
-            net_pred = self.model(ms.Tensor(img_batch))
-            if self.cast_pred_fp32:
-                if isinstance(net_pred, (list, tuple)):
-                    net_pred = [self.cast(p, ms.float32) for p in net_pred]
-                else:
-                    net_pred = self.cast(net_pred, ms.float32)
-
-            # postprocess
-            batch_res = self.postprocess(net_pred)
-            cls_res.extend(list(zip(batch_res["angles"], batch_res["scores"])))
+        self.preprocess.schedule(img_or_path_list)
+
+        try:
+            for idx in range(0, num_imgs, self.batch_num):
+                batch_begin = idx
+                batch_end = min(idx + self.batch_num, num_imgs)
+                logger.info(f"CLS img idx range: [{batch_begin}, {batch_end})")
+                img_batch = []
+
+                # preprocess
+                for j in range(batch_begin, batch_end):
+                    data = self.preprocess(img_or_path_list[j])
+                    img_batch.append(data["image"])
+
+                # infer
+                img_batch = np.stack(img_batch) if len(img_batch) > 1 else np.expand_dims(img_batch[0], axis=0)
+
+                net_pred = self.model(ms.Tensor(img_batch))
+                if self.cast_pred_fp32:
+                    if isinstance(net_pred, (list, tuple)):
+                        net_pred = [self.cast(p, ms.float32) for p in net_pred]
+                    else:
+                        net_pred = self.cast(net_pred, ms.float32)
+
+                # postprocess
+                batch_res = self.postprocess(net_pred)
+                cls_res.extend(list(zip(batch_res["angles"], batch_res["scores"])))
+        finally:
+            self.preprocess.clear()  # drop the remaining inputs if a batch failed
 
         return cls_res
 
@@ -266,6 +277,99 @@ class TextSystem(object):
                 and score is the confidence score.
             time_profile (dict): record the time cost for each sub-task.
         """
+        start = time()
+        fn, det_res, data, crops, time_profile = self._detect_and_crop(img_or_path)
+
+        # recognize cropped images
+        rs = time()
+        rec_res_all_crops = self.text_recognize(crops, do_visualize=False)
+        time_profile["rec"] = time() - rs
+
+        logger.info(
+            "Recognized texts: \n"
+            + "\n".join([f"{text}\t{score}" for text, score in rec_res_all_crops])
+            + f"\nRec time: {time_profile['rec']}"
+        )
+
+        boxes, text_scores = self._merge_results(det_res, rec_res_all_crops)
+        time_profile["all"] = time() - start
+
+        # visualize the overall result
+        if do_visualize:
+            vst = time()
+            self._visualize(fn, data, boxes, text_scores)
+            time_profile["vis"] = time() - vst
+        return boxes, text_scores, time_profile
+
+    def stream(self, img_or_paths: Iterable[Union[str, np.ndarray]], do_visualize=True):
+        """
+        Detect and recognize texts in a stream of images, gathering the text crops of consecutive images into full
+        recognition batches of `rec_batch_num` crops. Crops are sorted by aspect ratio before being batched to reduce
+        padding, and results are re-associated to their source image and box.
+
+        Args:
+            img_or_paths (Iterable[Union[str, np.ndarray]]): iterable of paths to images or image rgb values
+
+        Yields:
+            tuple (img_or_path, boxes, texts, time_profile) for each input image, in the input order, with the same
+                meaning as the output of `__call__`. The recognition time of a batch is shared among its crops.
+        """
+        batch_num = self.text_recognize.batch_num
+        pending = []  # images detected but not fully recognized yet, in input order
+        crop_queue = []  # (image index in `pending`, crop index in the image) of the crops waiting for recognition
+
+        for img_or_path in img_or_paths:
+            start = time()
+            fn, det_res, data, crops, time_profile = self._detect_and_crop(img_or_path)
+            time_profile["rec"] = 0.0
+            time_profile["all"] = time() - start
+            rec_res = [None] * len(crops)
+            pending.append([img_or_path, fn, det_res, data, crops, rec_res, time_profile])
+            crop_queue.extend((len(pending) - 1, i) for i in range(len(crops)))
+
+            # recognize as many full batches as possible, taking the oldest crops first
+            num_crops = len(crop_queue) // batch_num * batch_num
+            if num_crops:
+                self._recognize_queued(pending, crop_queue[:num_crops])
+                crop_queue = crop_queue[num_crops:]
+
+            # yield the leading images whose crops are all recognized
+            while pending and all(res is not None for res in pending[0][5]):
+                yield self._finish_streamed(pending.pop(0), do_visualize)
+                crop_queue = [(img_idx - 1, crop_idx) for img_idx, crop_idx in crop_queue]
+
+        if crop_queue:
+            self._recognize_queued(pending, crop_queue)
+        for item in pending:
+            yield self._finish_streamed(item, do_visualize)
+
+    def _recognize_queued(self, pending, crop_queue):
+        crops = [pending[img_idx][4][crop_idx] for img_idx, crop_idx in crop_queue]
+        order = sorted(range(len(crops)), key=lambda i: crops[i].shape[1] / max(crops[i].shape[0], 1))
+
+        rs = time()
+        rec_res = self.text_recognize([crops[i] for i in order], do_visualize=False)
+        rec_time = time() - rs
+
+        for i, res in zip(order, rec_res):
+            img_idx, crop_idx = crop_queue[i]
+            pending[img_idx][5][crop_idx] = res
+            pending[img_idx][6]["rec"] += rec_time / len(crops)
+            pending[img_idx][6]["all"] += rec_time / len(crops)
+
+    def _finish_streamed(self, item, do_visualize):
+        img_or_path, fn, det_res, data, _, rec_res, time_profile = item
+        boxes, text_scores = self._merge_results(det_res, rec_res)
+        if do_visualize:
+            vst = time()
+            self._visualize(fn, data, boxes, text_scores)
+            time_profile["vis"] = time() - vst
+        return img_or_path, boxes, text_scores, time_profile
+
+    def _detect_and_crop(self, img_or_path: Union[str, np.ndarray]):
+        """
+        Detect text regions on an image, crop them and correct their orientation (if a classifier is set).
+        """
         assert isinstance(img_or_path, str) or isinstance(
             img_or_path, np.ndarray
         ), "Input must be string of path to the image or numpy array of the image rgb values."
@@ -281,6 +385,7 @@ class TextSystem(object):
         logger.info(f"Num detected text boxes: {len(polys)}\nDet time: {time_profile['det']}")
 
         # crop text regions
+        cst = time()
         crops = []
         for i in range(len(polys)):
             poly = polys[i].astype(np.float32)
@@ -290,11 +395,11 @@ class TextSystem(object):
             if self.save_crop_res:
                 cv2.imwrite(os.path.join(self.crop_res_save_dir, f"{fn}_crop_{i}.jpg"), cropped_img)
         # show_imgs(crops, is_bgr_img=False)
+        time_profile["crop"] = time() - cst
 
-        if self.cls_algorithm is not None:
-            img_or_path = crops
+        if self.cls_algorithm is not None and crops:
             ct = time()
-            cls_res_all = self.text_classification(img_or_path)
+            cls_res_all = self.text_classification(crops)
             time_profile["cls"] = time() - ct
 
             cls_count = 0
@@ -313,20 +418,14 @@ class TextSystem(object):
                 save_fp = os.path.join(self.save_cls_dir, "cls_results.txt")
                 self.text_classification.save_cls_res(cls_res_all, fn=fn, save_path=save_fp)
 
-        # recognize cropped images
-        rs = time()
-        rec_res_all_crops = self.text_recognize(crops, do_visualize=False)
-        time_profile["rec"] = time() - rs
-
-        logger.info(
-            "Recognized texts: \n"
-            + "\n".join([f"{text}\t{score}" for text, score in rec_res_all_crops])
-            + f"\nRec time: {time_profile['rec']}"
-        )
+        return fn, det_res, data, crops, time_profile
 
-        # filter out low-score texts and merge detection and recognition results
+    def _merge_results(self, det_res, rec_res_all_crops):
+        """
+        Filter out low-score texts and merge detection and recognition results.
+        """
         boxes, text_scores = [], []
-        for i in range(len(polys)):
+        for i in range(len(rec_res_all_crops)):
             box = det_res["polys"][i]
             # box_score = det_res["scores"][i]
             text = rec_res_all_crops[i][0]
@@ -334,25 +433,20 @@ class TextSystem(object):
             if text_score >= self.drop_score:
                 boxes.append(box)
                 text_scores.append((text, text_score))
-
-        time_profile["all"] = time() - start
-
-        # visualize the overall result
-        if do_visualize:
-            vst = time()
-            vis_fp = os.path.join(self.vis_dir, fn + "_res.png")
-            # TODO: improve vis for leaning texts
-            visualize(
-                data["image_ori"],
-                boxes,
-                texts=[x[0] for x in text_scores],
-                vis_font_path=self.vis_font_path,
-                display=False,
-                save_path=vis_fp,
-                draw_texts_on_blank_page=False,
-            )  # NOTE: set as you want
-            time_profile["vis"] = time() - vst
-        return boxes, text_scores, time_profile
+        return boxes, text_scores
+
+    def _visualize(self, fn, data, boxes, text_scores):
+        vis_fp = os.path.join(self.vis_dir, fn + "_res.png")
+        # TODO: improve vis for leaning texts
+        visualize(
+            data["image_ori"],
+            boxes,
+            texts=[x[0] for x in text_scores],
+            vis_font_path=self.vis_font_path,
+            display=False,
+            save_path=vis_fp,
+            draw_texts_on_blank_page=False,
+        )  # NOTE: set as you want
 
 
 def save_res(boxes_all, text_scores_all, img_paths, save_path="system_results.txt"):
@@ -383,14 +477,19 @@ def main():
     # parse args
     args = parse_args()
     set_logger(name="mindocr")
+    ms.set_context(mode=args.mode)
+
+    if args.benchmark:
+        # sweep the benchmark settings on synthetic images
+        run_benchmark(args, TextSystem)
+        return
+
     save_dir = args.draw_img_save_dir
     img_paths = get_image_paths(args.image_dir)
 
     # uncomment it to quick test the infer FPS
     # img_paths = img_paths[:10]
 
-    ms.set_context(mode=args.mode)
-
     # init text system with detector and recognizer
     text_spot = TextSystem(args)
 
@@ -399,20 +498,34 @@ def main():
         for i in range(2):
             text_spot(img_paths[0], do_visualize=False)
 
-    # run
+    # run, preprocessing the next images for detection in the background
+    text_spot.text_detect.preprocess.schedule(img_paths)
     tot_time = {}  # {'det': 0, 'rec': 0, 'all': 0}
     boxes_all, text_scores_all = [], []
-    for i, img_path in enumerate(img_paths):
-        logger.info(f"\nINFO: Infering [{i+1}/{len(img_paths)}]: {img_path}")
-        boxes, text_scores, time_prof = text_spot(img_path, do_visualize=args.visualize_output)
-        boxes_all.append(boxes)
-        text_scores_all.append(text_scores)
-
-        for k in time_prof:
-            if k not in tot_time:
-                tot_time[k] = time_prof[k]
-            else:
-                tot_time[k] += time_prof[k]
+
+    def log_progress():
+        # logged when an image is taken for inference, before its detection
+        for i, img_path in enumerate(img_paths):
+            logger.info(f"\nINFO: Infering [{i+1}/{len(img_paths)}]: {img_path}")
+            yield img_path
+
+    if args.rec_cross_image_batch:
+        # recognition batches are filled with the crops of consecutive images
+        results = text_spot.stream(log_progress(), do_visualize=args.visualize_output)
+    else:
+        results = ((img_path, *text_spot(img_path, do_visualize=args.visualize_output)) for img_path in log_progress())
+    try:
+        for img_path, boxes, text_scores, time_prof in results:
+            boxes_all.append(boxes)
+            text_scores_all.append(text_scores)
+
+            for k in time_prof:
+                if k not in tot_time:
+                    tot_time[k] = time_prof[k]
+                else:
+                    tot_time[k] += time_prof[k]
+    finally:
+        text_spot.text_detect.preprocess.clear()
 
     fps = len(img_paths) / tot_time["all"]
     logger.info(f"Total time:{tot_time['all']}")
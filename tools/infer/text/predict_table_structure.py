@@ -13,7 +13,7 @@ from typing import Dict, Union
 import numpy as np
 from config import parse_args
 from postprocess import Postprocessor
-from preprocess import Preprocessor
+from preprocess import PrefetchPreprocessor, Preprocessor
 from utils import get_ckpt_file, get_image_paths
 
 from mindspore import Tensor
@@ -61,7 +61,9 @@ class StructureAnalyzer:
             model_name, pretrained=pretrained, ckpt_load_path=ckpt_load_path, amp_level=args.table_amp_level
         )
         self.model.set_train(False)
-        self.preprocess = Preprocessor(task="table", table_max_len=args.table_max_len)
+        self.preprocess = PrefetchPreprocessor(
+            Preprocessor(task="table", table_max_len=args.table_max_len), num_workers=args.num_preprocess_workers
+        )
         self.postprocess = Postprocessor(task="table", table_char_dict_path=args.table_char_dict_path)
         self.vis_dir = args.draw_img_save_dir
         os.makedirs(self.vis_dir, exist_ok=True)
@@ -110,9 +112,13 @@ def main():
     set_logger(name="mindocr")
     analyzer = StructureAnalyzer(args)
     img_paths = get_image_paths(args.image_dir)
-    for i, img_path in enumerate(img_paths):
-        logger.info(f"Inferring {i+1}/{len(img_paths)}: {img_path}")
-        _ = analyzer(img_path, do_visualize=True)
+    analyzer.preprocess.schedule(img_paths)
+    try:
+        for i, img_path in enumerate(img_paths):
+            logger.info(f"Inferring {i+1}/{len(img_paths)}: {img_path}")
+            _ = analyzer(img_path, do_visualize=True)
+    finally:
+        analyzer.preprocess.clear()
     logger.info(f"Done! All structure results are saved to {args.draw_img_save_dir}")
 
 
@@ -1,6 +1,11 @@
+import itertools
 import logging
 import os
 import sys
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
 
 __dir__ = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../../../")))
@@ -103,8 +108,7 @@ class Preprocessor(object):
 
             norm_before_pad = optimal_hparam[algo].get("norm_before_pad", DEFAULT_NORM_BEFORE_PAD)
 
-            # TODO: update max_wh_ratio for each batch
-            # max_wh_ratio = parsed_width /  float(parsed_height)
+            # max_wh_ratio is updated for each batch by TextRecognizer in batch mode if padding and keep_ratio are True
             # batch_num = kwargs.get('rec_batch_num', 1)
             batch_mode = kwargs.get("rec_batch_mode", False)  # and (batch_num > 1)
             if not batch_mode:
@@ -252,8 +256,12 @@ class Preprocessor(object):
         self.transforms = create_transforms(pipeline)
 
     # TODO: allow multiple image inputs and preprocess them with multi-thread
-    def __call__(self, img_or_path):
+    def __call__(self, img_or_path, **kwargs):
         """
+        Args:
+            img_or_path: path to an image, image rgb values as a numpy array or a data dict.
+            kwargs: extra data passed to the transforms, e.g. `max_wh_ratio` for recognition resizing.
+
         Return:
             dict, preprocessed data containing keys:
                 - image: np.array, transfomred image
@@ -262,14 +270,112 @@ class Preprocessor(object):
                 and other keys added in transform pipeline.
         """
         if isinstance(img_or_path, str):
-            data = {"img_path": img_or_path}
+            data = {"img_path": img_or_path, **kwargs}
             output = run_transforms(data, self.transforms)
         elif isinstance(img_or_path, dict):
+            img_or_path.update(kwargs)
             output = run_transforms(img_or_path, self.transforms)
         else:
-            data = {"image": img_or_path}
+            data = {"image": img_or_path, **kwargs}
             data["image_ori"] = img_or_path.copy()  # TODO
             data["image_shape"] = img_or_path.shape
             output = run_transforms(data, self.transforms[1:])
 
         return output
+
+
+class PrefetchPreprocessor(object):
+    """
+    Wrapper running a preprocessing function in a thread pool ahead of its use, so that the inputs of the next batch
+    are decoded and transformed while the model runs on the current batch.
+
+    Inputs to be processed are announced in advance with `schedule`. At most `max_prefetch` of them are processed
+    concurrently; the next ones are submitted as results are consumed. Calling the wrapper returns the prefetched
+    result of a scheduled input, or runs the preprocessing inline for an input that was not scheduled, so that it can
+    be used as a drop-in replacement of `Preprocessor`.
+
+    Args:
+        preprocess: preprocessing function, e.g. an instance of `Preprocessor`.
+        num_workers: number of preprocessing threads. If 0, `schedule` is a no-op and the inputs are processed inline.
+        max_prefetch: maximum number of inputs processed ahead of their use. Default: 2 * num_workers.
+
+    Notes:
+        1. Threads are used rather than processes: OpenCV and numpy release the GIL in decoding and resizing, and the
+           preprocessed arrays are shared with the model without being copied.
+        2. Inputs are matched by path for image paths and by object identity for arrays and dicts, together with the
+           extra keyword arguments (e.g. `max_wh_ratio`). Scheduled inputs are referenced until they are consumed or
+           `clear` is called, so that the identity of an array cannot be reused by another one in the meantime.
+        3. Scheduled inputs which may not be consumed, e.g. if an exception is raised while processing a batch, must
+           be dropped with `clear`, otherwise they keep holding prefetching slots.
+    """
+
+    def __init__(self, preprocess: Callable, num_workers: int = 4, max_prefetch: Optional[int] = None):
+        self.preprocess = preprocess
+        self.num_workers = num_workers
+        self.max_prefetch = max_prefetch or 2 * num_workers
+        self._executor = None
+        if num_workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="preprocess")
+            # stop the threads once the wrapper is garbage collected
+            weakref.finalize(self, self._executor.shutdown, wait=False)
+        self._scheduled = deque()  # (key, input, kwargs) waiting to be submitted
+        self._futures = {}  # key -> deque of (input, future), in submission order
+        self._num_running = 0
+
+    @staticmethod
+    def _key(img_or_path, kwargs: dict):
+        return (img_or_path if isinstance(img_or_path, str) else id(img_or_path), tuple(sorted(kwargs.items())))
+
+    def schedule(self, inputs: Iterable, kwargs_list: Optional[Iterable[dict]] = None):
+        """
+        Announce inputs that will be processed in the given order, optionally with extra keyword arguments for each.
+        """
+        if self._executor is None:
+            return
+        kwargs_list = kwargs_list if kwargs_list is not None else itertools.repeat({})
+        for img_or_path, kwargs in zip(inputs, kwargs_list):
+            self._scheduled.append((self._key(img_or_path, kwargs), img_or_path, kwargs))
+        self._submit()
+
+    def _submit(self):
+        while self._scheduled and self._num_running < self.max_prefetch:
+            key, img_or_path, kwargs = self._scheduled.popleft()
+            future = self._executor.submit(self.preprocess, img_or_path, **kwargs)
+            self._futures.setdefault(key, deque()).append((img_or_path, future))
+            self._num_running += 1
+
+    def clear(self):
+        """Drop the inputs scheduled but not consumed yet."""
+        self._scheduled.clear()
+        for futures in self._futures.values():
+            for _, future in futures:
+                future.cancel()
+        self._futures.clear()
+        self._num_running = 0
+
+    def close(self):
+        """Drop the scheduled inputs and stop the preprocessing threads."""
+        self.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __call__(self, img_or_path, **kwargs):
+        key = self._key(img_or_path, kwargs)
+        futures = self._futures.get(key)
+        if not futures or not isinstance(img_or_path, str) and futures[0][0] is not img_or_path:
+            # not scheduled, or another array having the identity of a scheduled one
+            return self.preprocess(img_or_path, **kwargs)
+
+        _, future = futures.popleft()
+        if not futures:
+            del self._futures[key]
+        self._num_running -= 1
+        self._submit()
+        return future.result()
+
+    def __getattr__(self, name):
+        # expose the attributes of the wrapped preprocessor, e.g. `pipeline` and `transforms`
+        if name == "preprocess":
+            raise AttributeError(name)
+        return getattr(self.preprocess, name)
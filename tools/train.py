@@ -205,6 +205,7 @@ def main(cfg):
         ckpt_save_policy=cfg.system.get("ckpt_save_policy", "top_k"),
         ckpt_max_keep=cfg.system.get("ckpt_max_keep", 10),
         start_epoch=start_epoch,
+        async_workers=cfg.eval.get("async_workers", 0),
     )
 
     # save args used for training